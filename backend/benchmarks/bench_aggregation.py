@@ -0,0 +1,134 @@
+"""Benchmark issue aggregation: the old per-issue scan vs the indexed engine.
+
+Static findings are synthetic cppcheck ``--enable=all`` XML for generated C
+code, run through the real XML parser. AI issues restate about half of them
+(some a line off, with reworded messages) and add AI-only findings.
+"""
+import argparse
+import random
+import time
+from xml.sax.saxutils import quoteattr
+
+import common
+from services.aggregation_engine import aggregate_issues
+from services.static_analyzer import _parse_cppcheck_xml
+
+CPPCHECK_FINDINGS = [
+    ("style", "unusedVariable", "Unused variable: tmp{n}"),
+    ("style", "variableScope", "The scope of the variable 'i{n}' can be reduced."),
+    ("warning", "uninitvar", "Uninitialized variable: buf{n}"),
+    ("error", "nullPointer", "Null pointer dereference: ptr{n}"),
+    ("error", "memleak", "Memory leak: block{n}"),
+    ("performance", "passedByValue", "Function parameter 'cfg{n}' should be passed by const reference."),
+    ("portability", "invalidPrintfArgType_sint", "%d in format string (no. 1) requires 'int' but the argument type is 'long'."),
+]
+
+
+def legacy_aggregate(static_issues: list, ai_issues: list) -> list:
+    """The previous implementation: exact-line dedup with a scan per match."""
+    aggregated = []
+    static_by_line = {}
+    for issue in static_issues:
+        static_by_line.setdefault(issue.get("line", 0), issue)
+    for issue in static_issues:
+        aggregated.append({
+            "type": issue.get("type", "general"),
+            "line": issue.get("line", 0),
+            "severity": issue.get("severity", "MEDIUM"),
+            "message": issue.get("message", ""),
+            "explanation": "",
+            "suggestion": "",
+            "source": "verified",
+        })
+    for ai_issue in ai_issues:
+        line = ai_issue.get("line", 0)
+        if line in static_by_line:
+            for agg in aggregated:
+                if agg["line"] == line and agg["source"] == "verified":
+                    agg["explanation"] = ai_issue.get("explanation", "")
+                    agg["suggestion"] = ai_issue.get("suggestion", "")
+                    break
+        else:
+            aggregated.append({
+                "type": ai_issue.get("type", "general"),
+                "line": line,
+                "severity": ai_issue.get("severity", "MEDIUM"),
+                "message": ai_issue.get("message", ""),
+                "explanation": ai_issue.get("explanation", ""),
+                "suggestion": ai_issue.get("suggestion", ""),
+                "source": "inferred",
+            })
+    return aggregated
+
+
+def make_cppcheck_xml(findings: int, rng: random.Random) -> str:
+    errors = []
+    for n in range(findings):
+        severity, error_id, msg = rng.choice(CPPCHECK_FINDINGS)
+        line = 1 + n * 3 + rng.randint(0, 2)
+        errors.append(
+            f'<error id="{error_id}" severity="{severity}" msg={quoteattr(msg.format(n=n))}>'
+            f'<location file="main.c" line="{line}" column="5"/></error>'
+        )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?><results version="2">'
+        '<cppcheck version="2.13.0"/><errors>' + "".join(errors) + "</errors></results>"
+    )
+
+
+def make_ai_issues(static_issues: list, extra: int, rng: random.Random) -> list:
+    ai_issues = []
+    for issue in static_issues[::2]:
+        ai_issues.append({
+            "type": issue["type"],
+            "line": issue["line"] + rng.choice((-1, 0, 0, 1)),
+            "severity": issue["severity"],
+            "message": f"{issue['message']} detected here",
+            "explanation": "Explains the static finding.",
+            "suggestion": "Fix it.",
+        })
+    max_line = max((issue["line"] for issue in static_issues), default=1)
+    for n in range(extra):
+        ai_issues.append({
+            "type": "performance",
+            "line": rng.randint(1, max_line),
+            "severity": "LOW",
+            "message": f"Loop {n} recomputes an invariant bound on every iteration",
+            "explanation": "Hoist it.",
+            "suggestion": "Compute once before the loop.",
+        })
+    return ai_issues
+
+
+def time_it(fn, static_issues: list, ai_issues: list, iterations: int) -> list:
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn(static_issues, ai_issues)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--iterations", type=int, default=10)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[500, 2000, 8000])
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    for size in args.sizes:
+        static_issues = _parse_cppcheck_xml(make_cppcheck_xml(size, rng))
+        ai_issues = make_ai_issues(static_issues, size // 2, rng)
+        merged = aggregate_issues(static_issues, ai_issues)
+        enriched = sum(1 for issue in merged if issue["source"] == "verified" and issue["explanation"])
+        print(
+            f"{len(static_issues)} static + {len(ai_issues)} AI issues -> {len(merged)} aggregated, "
+            f"{enriched} static findings confirmed by AI"
+        )
+        common.report(f"legacy scan [{size}]", time_it(legacy_aggregate, static_issues, ai_issues, args.iterations))
+        common.report(f"indexed [{size}]", time_it(aggregate_issues, static_issues, ai_issues, args.iterations))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Compare Python static analysis latency: bandit CLI per request vs the warm worker pool."""
+import argparse
+import asyncio
+import time
+
+import common
+from services import bandit_pool
+from services.static_analyzer import _run_bandit
+
+SNIPPET = '''import subprocess
+import pickle
+
+PASSWORD = "hunter2"
+
+
+def run(cmd):
+    return subprocess.call(cmd, shell=True)
+
+
+def load(blob):
+    return pickle.loads(blob)
+'''
+
+
+def bench_cli(iterations: int) -> list:
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        _run_bandit(SNIPPET)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+async def bench_pool(iterations: int) -> list:
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        await bandit_pool.run_bandit_pooled(SNIPPET)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    assert sorted(map(str, _run_bandit(SNIPPET))) == sorted(
+        map(str, asyncio.run(bandit_pool.run_bandit_pooled(SNIPPET)))
+    ), "pool and CLI disagree"
+
+    common.report("bandit CLI", bench_cli(args.iterations))
+    common.report("bandit warm pool", asyncio.run(bench_pool(args.iterations)))
+    bandit_pool.stop_bandit_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Compare completion tokens and latency of full-text vs unified-diff output, fully offline.
+
+Starts llm_standin.py in-process with a per-token generation cost and runs
+analyze_with_groq_async on generated Python files of several sizes, each with
+a few lines the stand-in rewrites, once per output mode. Both modes must
+produce the same optimized code.
+"""
+import argparse
+import asyncio
+import os
+import time
+
+import common
+
+
+def make_file(lines: int, changes: int) -> str:
+    body = []
+    step = max(1, lines // max(1, changes))
+    for i in range(lines):
+        if changes and i % step == step // 2 and sum("eval(" in line for line in body) < changes:
+            body.append(f"value_{i} = eval(raw_{i})")
+        else:
+            body.append(f"value_{i} = compute({i}, scale=2)")
+    return "\n".join(body)
+
+
+async def measure(code: str, output: str, repeat: int) -> tuple[list, int, str]:
+    from services import model_router
+    from services.groq_service import analyze_with_groq_async
+
+    # The output mode is read from settings at import; switch it for this run
+    model_router.LLM_OUTPUT_MODE = output
+    samples = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = await analyze_with_groq_async("python", "bug", "", code, [])
+        samples.append(time.perf_counter() - started)
+    assert not result.get("failed"), result["explanation"]
+    return samples, result["token_usage"]["completion_tokens"], result["optimized_code"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="100,400,1000", help="file sizes in lines")
+    parser.add_argument("--changes", type=int, default=3, help="lines the stand-in rewrites per file")
+    parser.add_argument("-n", "--repeat", type=int, default=3)
+    parser.add_argument("--latency-ms", type=float, default=80)
+    parser.add_argument("--ms-per-token", type=float, default=0.5)
+    args = parser.parse_args()
+
+    port = common.free_port()
+    os.environ["LLM_BASE_URL"] = f"http://127.0.0.1:{port}"
+    os.environ.setdefault("GROQ_API_KEY", "standin")
+
+    from llm_standin import Profile
+
+    common.start_standin(Profile(latency_ms=args.latency_ms, jitter=0.0, ms_per_token=args.ms_per_token), port)
+    print(f"stand-in: {args.latency_ms:.0f} ms + {args.ms_per_token:g} ms/token; {args.changes} changed lines per file")
+
+    async def scenario():
+        for size in (int(s) for s in args.sizes.split(",")):
+            code = make_file(size, args.changes)
+            optimized = {}
+            for output in ("code", "diff"):
+                samples, completion_tokens, optimized[output] = await measure(code, output, args.repeat)
+                common.report(f"{size} lines, {output} output", samples)
+                print(f"{'':<28} completion_tokens={completion_tokens}")
+            assert optimized["code"] == optimized["diff"], "diff output produced different code"
+
+    asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    main()
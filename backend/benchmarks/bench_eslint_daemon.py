@@ -0,0 +1,55 @@
+"""Compare JavaScript static analysis latency: eslint CLI per request vs the daemon pool.
+
+Requires node and eslint resolvable from the current directory.
+"""
+import argparse
+import asyncio
+import time
+
+import common
+from services import eslint_daemon
+from services.static_analyzer import _run_eslint
+
+SNIPPET = '''function total(items) {
+  var sum = 0
+  for (var i = 0; i < items.length; i++) {
+    sum += items[i].price
+  }
+  var unused = 1
+  return sum
+}
+'''
+
+
+def bench_cli(iterations: int) -> list:
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        _run_eslint(SNIPPET)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+async def bench_daemon(iterations: int) -> list:
+    await eslint_daemon.start_eslint_daemons()
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        if await eslint_daemon.lint_with_daemon(SNIPPET) is None:
+            raise SystemExit("ESLint daemon unavailable; is eslint installed?")
+        samples.append(time.perf_counter() - started)
+    await eslint_daemon.stop_eslint_daemons()
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    common.report("eslint CLI", bench_cli(args.iterations))
+    common.report("eslint daemon", asyncio.run(bench_daemon(args.iterations)))
+
+
+if __name__ == "__main__":
+    main()
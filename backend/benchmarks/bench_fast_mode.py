@@ -0,0 +1,85 @@
+"""Benchmark end-to-end latency of static-only fast mode (POST /api/analyze with "fast": true).
+
+Requests go through the FastAPI app in-process (httpx ASGI transport) as an
+anonymous user, so nothing is written to the database. "cold" makes every
+snippet unique, so each request runs Bandit; "warm" repeats one snippet and is
+served from the in-memory static result cache.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+
+import common
+
+SNIPPET = '''import subprocess
+import pickle
+
+PASSWORD = "hunter2"
+
+
+def run(cmd):
+    return subprocess.call(cmd, shell=True)
+
+
+def load(blob):
+    return pickle.loads(blob)
+'''
+
+
+async def run(client, requests: int, concurrency: int, unique: bool) -> list:
+    semaphore = asyncio.Semaphore(concurrency)
+    samples = []
+
+    async def one(i: int):
+        code = f"{SNIPPET}\n\nREQUEST_ID = {i}\n" if unique else SNIPPET
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.post("/api/analyze", json={
+                "language": "python",
+                "mode": "bug",
+                "code": code,
+                "fast": True,
+            })
+            samples.append(time.perf_counter() - started)
+        response.raise_for_status()
+        assert response.json()["static_issues"], "expected Bandit findings"
+
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--requests", type=int, default=200)
+    parser.add_argument("-c", "--concurrency", type=int, default=4)
+    parser.add_argument("--bandit-backend", choices=("pool", "cli"), default="pool")
+    args = parser.parse_args()
+
+    os.environ["BANDIT_BACKEND"] = args.bandit_backend
+
+    import httpx
+    from main import app
+    from services.bandit_pool import start_bandit_pool, stop_bandit_pool
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    if args.bandit_backend == "pool":
+        start_bandit_pool()
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            await run(client, 10, args.concurrency, unique=True)
+            for label, unique in (("cold", True), ("warm", False)):
+                samples = await run(client, args.requests, args.concurrency, unique)
+                common.report(f"fast mode {label} ({args.bandit_backend})", samples)
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        stop_bandit_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Benchmark LLM tail latency with and without hedged requests, fully offline.
+
+Starts llm_standin.py in-process with a heavy-tailed latency profile and
+transient 429/5xx errors, then sends the same request sequence through
+complete_with_policy with hedging off and on.
+"""
+import argparse
+import asyncio
+import os
+import time
+
+import common
+
+
+async def run(requests: int, concurrency: int, hedge: bool) -> tuple[list, int]:
+    from services.llm_backend import complete_with_policy, LLMError
+
+    kwargs = {
+        "model": "standin",
+        "messages": [{"role": "user", "content": "```python\nx = eval(input())\n```"}],
+    }
+    semaphore = asyncio.Semaphore(concurrency)
+    samples = []
+    failures = 0
+
+    async def one():
+        nonlocal failures
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await complete_with_policy(kwargs, hedge=hedge)
+            except LLMError:
+                failures += 1
+                return
+            samples.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return samples, failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--requests", type=int, default=400)
+    parser.add_argument("-c", "--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=60)
+    parser.add_argument("--latency-ms", type=float, default=40)
+    parser.add_argument("--tail-rate", type=float, default=0.05)
+    parser.add_argument("--tail-ms", type=float, default=1500)
+    parser.add_argument("--rate-429", type=float, default=0.02)
+    parser.add_argument("--rate-500", type=float, default=0.01)
+    parser.add_argument("--hedge-percentile", type=float, default=90,
+                        help="should sit below 100 - tail-rate to catch the tail")
+    args = parser.parse_args()
+
+    port = common.free_port()
+    os.environ["LLM_BASE_URL"] = f"http://127.0.0.1:{port}"
+    os.environ.setdefault("GROQ_API_KEY", "standin")
+    os.environ["LLM_RETRY_BASE_SECONDS"] = "0.05"
+    os.environ["LLM_HEDGE_PERCENTILE"] = str(args.hedge_percentile)
+
+    from llm_standin import Profile
+
+    profile = Profile(
+        latency_ms=args.latency_ms,
+        tail_rate=args.tail_rate,
+        tail_ms=args.tail_ms,
+        rate_429=args.rate_429,
+        rate_500=args.rate_500,
+    )
+    common.start_standin(profile, port)
+    print(
+        f"stand-in: {args.latency_ms:.0f} ms median, {args.tail_rate:.0%} at {args.tail_ms:.0f} ms, "
+        f"{args.rate_429:.0%} 429 + {args.rate_500:.0%} 5xx; {args.requests} requests x{args.concurrency}"
+    )
+
+    async def scenario():
+        from services.llm_backend import llm_stats
+
+        # Seed the latency window that picks the hedge delay
+        await run(args.warmup, args.concurrency, hedge=False)
+        for hedge in (False, True):
+            before = llm_stats()
+            samples, failures = await run(args.requests, args.concurrency, hedge)
+            after = llm_stats()
+            label = f"hedged at p{args.hedge_percentile:g}" if hedge else "no hedging"
+            common.report(label, samples)
+            print(
+                f"{'':<28} failures={failures} retries={after['retries'] - before['retries']} "
+                f"hedges={after['hedges'] - before['hedges']} hedge_wins={after['hedge_wins'] - before['hedge_wins']} "
+                f"hedge_after={after['hedge_after']}s"
+            )
+
+    asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Benchmark LLM output parsing: multi-strategy scan vs the incremental single-pass parser.
+
+Uses a synthetic response with many issues and a large optimized_code field,
+both as bare JSON and wrapped in prose plus a markdown fence.
+"""
+import argparse
+import json
+import time
+
+import common
+from services.groq_service import _scan_parse_json
+from services.llm_stream_parser import IncrementalResultParser, parse_result_json
+
+
+def make_response(issues: int, code_kb: int) -> dict:
+    line = 'def handler(request):  # {"quoted": [1, 2]} \\ escapes\n'
+    return {
+        "ai_issues": [
+            {
+                "type": "performance",
+                "line": i,
+                "severity": "MEDIUM",
+                "message": f"Issue {i}: repeated len() in loop condition",
+                "explanation": "Calling len() on every iteration adds overhead; " * 3,
+                "suggestion": 'Hoist the length: n = len(items); for i in range(n): ...',
+            }
+            for i in range(issues)
+        ],
+        "optimized_code": (line * (code_kb * 1024 // len(line) + 1))[: code_kb * 1024],
+        "explanation": "Summary of the analysis and key improvements.",
+    }
+
+
+def time_it(fn, payload: str, iterations: int) -> list:
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn(payload)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def feed_chunks(payload: str, chunk_size: int = 64) -> dict:
+    parser = IncrementalResultParser()
+    for i in range(0, len(payload), chunk_size):
+        parser.feed(payload[i:i + chunk_size])
+    return parser.result()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--iterations", type=int, default=30)
+    parser.add_argument("--issues", type=int, default=150)
+    parser.add_argument("--code-kb", type=int, default=50)
+    args = parser.parse_args()
+
+    data = make_response(args.issues, args.code_kb)
+    bare = json.dumps(data)
+    wrapped = "Here is the analysis you asked for:\n```json\n" + json.dumps(data, indent=2) + "\n```\n"
+    print(f"{args.issues} issues, {args.code_kb} KB optimized_code, {len(bare) / 1024:.0f} KB payload")
+
+    for label, payload in (("bare", bare), ("fenced+prose", wrapped)):
+        assert _scan_parse_json(payload) == parse_result_json(payload) == feed_chunks(payload) == data
+        common.report(f"scan [{label}]", time_it(_scan_parse_json, payload, args.iterations))
+        common.report(f"single-pass [{label}]", time_it(parse_result_json, payload, args.iterations))
+        common.report(f"64-char chunks [{label}]", time_it(feed_chunks, payload, args.iterations))
+
+
+if __name__ == "__main__":
+    main()
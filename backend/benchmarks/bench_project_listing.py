@@ -0,0 +1,109 @@
+"""Benchmark GET /api/projects/ for users who own hundreds of projects.
+
+Needs the PostgreSQL database from .env. Seeds throwaway users, each with
+--projects projects of --files files, then times the previous listing (one
+COUNT(*) on files per project) against the current one (files_count read from
+the projects row), counting queries with the engine instrumentation. The
+seeded users are deleted afterwards; their projects and files cascade.
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+import common
+from sqlalchemy import select, func, delete, insert
+
+from database import AsyncSessionLocal, init_db
+from database.metrics import RequestDBStats, _current
+from models.file import File
+from models.project import Project
+from models.user import User
+from routes.projects import list_projects
+import models  # noqa: F401 — register every table for init_db
+
+
+async def legacy_list_projects(db, user: User) -> list:
+    """The previous implementation: one COUNT(*) per project."""
+    result = await db.execute(
+        select(Project)
+        .where(Project.user_id == user.id, Project.is_active == True)
+        .order_by(Project.created_at.desc())
+    )
+    listing = []
+    for project in result.scalars().all():
+        count = (await db.execute(select(func.count()).where(File.project_id == project.id))).scalar() or 0
+        listing.append((project.id, count))
+    return listing
+
+
+async def seed(users: int, projects: int, files: int) -> list:
+    tag = uuid.uuid4().hex[:8]
+    async with AsyncSessionLocal() as db:
+        seeded = [
+            User(username=f"bench-{tag}-{u}", email=f"bench-{tag}-{u}@example.com", hashed_password="x")
+            for u in range(users)
+        ]
+        db.add_all(seeded)
+        await db.flush()
+        for user in seeded:
+            project_ids = (await db.execute(
+                insert(Project).returning(Project.id),
+                [{"user_id": user.id, "name": f"project {p}", "is_active": True, "files_count": files}
+                 for p in range(projects)],
+            )).scalars().all()
+            await db.execute(insert(File), [
+                {"project_id": project_id, "name": f"f{f}.py", "language": "python", "content": "x = 1\n"}
+                for project_id in project_ids for f in range(files)
+            ])
+        await db.commit()
+        return seeded
+
+
+async def timed(fn, user: User, iterations: int) -> tuple[list, int]:
+    samples = []
+    queries = 0
+    for _ in range(iterations):
+        stats = RequestDBStats("bench")
+        token = _current.set(stats)
+        try:
+            async with AsyncSessionLocal() as db:
+                started = time.perf_counter()
+                await fn(db, user)
+                samples.append(time.perf_counter() - started)
+        finally:
+            _current.reset(token)
+        queries = stats.queries
+    return samples, queries
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=3)
+    parser.add_argument("--projects", type=int, default=300)
+    parser.add_argument("--files", type=int, default=5)
+    parser.add_argument("-n", "--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    async def scenario():
+        await init_db()
+        users = await seed(args.users, args.projects, args.files)
+        try:
+            user = users[0]
+            legacy, legacy_queries = await timed(legacy_list_projects, user, args.iterations)
+            current, current_queries = await timed(
+                lambda db, u: list_projects(db=db, current_user=u), user, args.iterations
+            )
+            print(f"{args.projects} projects x {args.files} files per user, {args.users} users")
+            common.report(f"N+1 counts ({legacy_queries} queries)", legacy)
+            common.report(f"files_count ({current_queries} queries)", current)
+        finally:
+            async with AsyncSessionLocal() as db:
+                await db.execute(delete(User).where(User.id.in_([u.id for u in users])))
+                await db.commit()
+
+    asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Compare Python static analysis latency: in-process AST rules vs bandit CLI and warm pool."""
+import argparse
+import asyncio
+import time
+
+import common
+from services import bandit_pool
+from services.python_rules import run_python_rules
+from services.static_analyzer import _run_bandit
+
+SNIPPET = '''import os
+import subprocess
+
+
+def run(cmd):
+    return subprocess.call(cmd, shell=True)
+
+
+def render(rows):
+    out = ""
+    i = 0
+    while i < len(rows):
+        out += str(rows[i])
+        i += 1
+    return eval(out)
+'''
+
+
+def bench_rules(code: str, iterations: int) -> list:
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        run_python_rules(code)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def bench_cli(code: str, iterations: int) -> list:
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        _run_bandit(code)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+async def bench_pool(code: str, iterations: int) -> list:
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        await bandit_pool.run_bandit_pooled(code)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--iterations", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=1, help="concatenate the snippet this many times")
+    args = parser.parse_args()
+
+    code = "\n\n".join(SNIPPET.replace("def run", f"def run{i}").replace("def render", f"def render{i}")
+                       for i in range(args.repeat))
+    print(f"{code.count(chr(10)) + 1} lines, {len(run_python_rules(code))} rule findings")
+
+    common.report("AST rules (in-process)", bench_rules(code, args.iterations))
+    common.report("bandit CLI", bench_cli(code, args.iterations))
+    common.report("bandit warm pool", asyncio.run(bench_pool(code, args.iterations)))
+    bandit_pool.stop_bandit_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Shared helpers for the scripts in this directory.
+
+Run a benchmark from the backend directory, e.g.::
+
+    python benchmarks/bench_bandit_pool.py
+"""
+import os
+import socket
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def percentile(samples: list, pct: float) -> float:
+    """Nearest-rank percentile of *samples* (pct in 0-100)."""
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def report(name: str, samples: list) -> None:
+    """Print p50/p99/mean of *samples* (seconds) in milliseconds."""
+    print(
+        f"{name:<28} n={len(samples):<5} "
+        f"p50={percentile(samples, 50) * 1000:9.2f} ms  "
+        f"p99={percentile(samples, 99) * 1000:9.2f} ms  "
+        f"mean={statistics.fmean(samples) * 1000:9.2f} ms"
+    )
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_standin(profile, port: int) -> None:
+    """Serve llm_standin.py with *profile* on *port* in a daemon thread."""
+    import uvicorn
+    from llm_standin import create_app
+
+    server = uvicorn.Server(uvicorn.Config(create_app(profile), host="127.0.0.1", port=port, log_level="error"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
@@ -0,0 +1,244 @@
+"""Check that the routes' queries are served by indexes on large tables.
+
+Builds a scratch schema in the PostgreSQL database from .env, applies the
+migrations to it, seeds it with --scale times the default row counts (two
+thousand users with a hundred analyses each, and so on), and runs EXPLAIN on
+the queries the API issues per request, plus the foreign-key lookups that ON
+DELETE actions perform. Exits 1 if any plan has a sequential scan on a seeded
+table. The schema is dropped afterwards. From the backend directory::
+
+    python check_query_plans.py [--scale N] [--verbose]
+
+queries() takes its statements from the *_query builders in routes/ and
+services/; a new query gets a builder there and an entry here.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import uuid
+from datetime import datetime, timedelta, timezone
+from dotenv import load_dotenv
+from sqlalchemy import select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+from config.settings import DATABASE_URL, HISTORY_PAGE_SIZE
+from database import run_migrations
+from models.analysis_history import AnalysisHistory
+from models.analysis_job import AnalysisJob
+from models.project_activity import ProjectActivity
+from models.session import Session
+from models.user_stats import UserStats
+from routes.batch import batch_files_query
+from routes.files import file_in_project_query, project_activity_query, project_files_query
+from routes.history import history_item_query, history_page_query
+from routes.projects import owned_project_query, projects_query
+from services.history_rescore import rescore_batch_query
+from services.job_queue import claim_query, locked_job_query
+from services.result_cache import cache_lookup_query
+from services.user_stats import analysis_counts_query, project_counts_query
+from utils.auth import user_by_email_query, user_by_username_query
+import models  # noqa: F401 — ensure all models are registered
+
+load_dotenv()
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Rows per unit of --scale
+USERS = 2000
+PROJECTS_PER_USER = 10
+FILES_PER_PROJECT = 5
+ANALYSES_PER_USER = 100
+ACTIVITIES_PER_PROJECT = 10
+SESSIONS_PER_USER = 5
+JOBS = 50000
+CACHE_ENTRIES = 50000
+
+SEED = """
+INSERT INTO users (username, email, hashed_password, is_active, is_verified)
+SELECT 'user' || g, 'user' || g || '@example.com', 'x', true, false
+FROM generate_series(1, {users}) g;
+
+INSERT INTO user_stats (user_id) SELECT id FROM users;
+
+INSERT INTO sessions (user_id, session_token, expires_at)
+SELECT (g % {users}) + 1, md5(g::text), now() + interval '1 day'
+FROM generate_series(1, {users} * {sessions_per_user}) g;
+
+INSERT INTO projects (user_id, name, is_active, files_count, created_at)
+SELECT (g % {users}) + 1, 'project ' || g, g % 10 <> 0, {files_per_project}, now() - g * interval '1 second'
+FROM generate_series(1, {users} * {projects_per_user}) g;
+
+INSERT INTO files (project_id, name, language, content, source, created_at)
+SELECT (g % ({users} * {projects_per_user})) + 1, 'f' || g || '.py', 'python', 'x = 1', 'internal',
+       now() - g * interval '1 second'
+FROM generate_series(1, {users} * {projects_per_user} * {files_per_project}) g;
+
+INSERT INTO analysis_history (user_id, project_id, language, mode, code_snippet, explanation, created_at)
+SELECT (g % {users}) + 1, CASE WHEN g % 3 = 0 THEN (g % ({users} * {projects_per_user})) + 1 END,
+       (ARRAY['python', 'javascript', 'java', 'cpp'])[g % 4 + 1], (ARRAY['bug', 'security', 'performance'])[g % 3 + 1],
+       repeat('x = 1' || chr(10), 50), 'explanation', now() - g * interval '1 second'
+FROM generate_series(1, {users} * {analyses_per_user}) g;
+
+INSERT INTO project_activities (user_id, project_id, file_id, action_type, file_name, timestamp)
+SELECT (((g % ({users} * {projects_per_user})) + 1) % {users}) + 1, (g % ({users} * {projects_per_user})) + 1,
+       (g % ({users} * {projects_per_user} * {files_per_project})) + 1, 'ANALYZE_FILE', 'f.py',
+       now() - g * interval '1 second'
+FROM generate_series(1, {users} * {projects_per_user} * {activities_per_project}) g;
+
+INSERT INTO analysis_jobs (id, user_id, file_id, analysis_id, language, mode, code, status, attempts, max_attempts,
+                           run_after, finished_at)
+SELECT md5(g::text), (g % {users}) + 1, CASE WHEN g % 2 = 0 THEN g % ({users} * {projects_per_user}) + 1 END,
+       g % ({users} * {analyses_per_user}) + 1, 'python', 'bug', 'x = 1', 'succeeded', 1, 3,
+       now() - g * interval '1 second', now()
+FROM generate_series(1, {jobs}) g;
+
+INSERT INTO analysis_cache (key, payload, expires_at)
+SELECT encode(sha256(g::text::bytea), 'hex'), '{{}}', now() + interval '1 day'
+FROM generate_series(1, {cache_entries}) g;
+"""
+
+SEEDED_TABLES = {
+    "users", "user_stats", "sessions", "projects", "files",
+    "analysis_history", "project_activities", "analysis_jobs", "analysis_cache",
+}
+
+
+def queries(scale: int) -> list:
+    """(name, statement) for each query to check, with ids from the middle of the seeded data.
+
+    The statements come from the same *_query builders the routes and
+    services execute, so a changed query is checked as it now stands.
+    """
+    user_id = USERS * scale // 2
+    project_id = USERS * scale * PROJECTS_PER_USER // 2
+    # A project owned by user_id, per the seeding formula
+    owned_project_id = user_id - 1
+    file_id = project_id * FILES_PER_PROJECT // 2
+    analysis_id = USERS * scale * ANALYSES_PER_USER // 2
+    now = datetime.now(timezone.utc)
+    page_size = HISTORY_PAGE_SIZE
+    next_page = (now - timedelta(hours=1), analysis_id)
+    return [
+        # utils/auth.py, routes/auth.py
+        ("user by username", user_by_username_query(f"user{user_id}")),
+        ("user by email", user_by_email_query(f"user{user_id}@example.com")),
+        # routes/profile.py: what Session.get(UserStats, user_id) issues
+        ("profile stats", select(UserStats).where(UserStats.user_id == user_id)),
+        # routes/projects.py, routes/files.py
+        ("list projects", projects_query(user_id)),
+        ("owned project", owned_project_query(owned_project_id, user_id)),
+        ("list files", project_files_query(project_id)),
+        ("file in project", file_in_project_query(file_id, project_id)),
+        ("project activity", project_activity_query(owned_project_id, user_id)),
+        # routes/batch.py
+        ("batch files", batch_files_query(project_id)),
+        # routes/history.py
+        ("history first page", history_page_query(user_id, page_size)),
+        ("history next page", history_page_query(user_id, page_size, cursor=next_page)),
+        ("history by language", history_page_query(user_id, page_size, language="python")),
+        ("history by mode", history_page_query(user_id, page_size, cursor=next_page, mode="bug")),
+        ("history item", history_item_query(analysis_id, user_id)),
+        # services/user_stats.py (a small batch, as for the profile backfill)
+        ("stats recount projects", project_counts_query([user_id])),
+        ("stats recount analyses", analysis_counts_query([user_id])),
+        # services/job_queue.py
+        ("claim job", claim_query(now, now - timedelta(minutes=10))),
+        ("locked job", locked_job_query("0" * 32, "worker")),
+        # services/result_cache.py
+        ("cache lookup", cache_lookup_query("0" * 64, now)),
+        # services/history_rescore.py
+        ("rescore batch", rescore_batch_query(analysis_id, 1000)),
+        # Rows ON DELETE CASCADE / SET NULL visit when a user, file or analysis is deleted
+        ("fk sessions.user_id", select(Session.id).where(Session.user_id == user_id)),
+        ("fk project_activities.user_id", select(ProjectActivity.id).where(ProjectActivity.user_id == user_id)),
+        ("fk project_activities.file_id", select(ProjectActivity.id).where(ProjectActivity.file_id == file_id)),
+        ("fk analysis_history.project_id", select(AnalysisHistory.id).where(
+            AnalysisHistory.project_id == project_id
+        )),
+        ("fk analysis_jobs.user_id", select(AnalysisJob.id).where(AnalysisJob.user_id == user_id)),
+        ("fk analysis_jobs.file_id", select(AnalysisJob.id).where(AnalysisJob.file_id == file_id)),
+        ("fk analysis_jobs.analysis_id", select(AnalysisJob.id).where(AnalysisJob.analysis_id == analysis_id)),
+    ]
+
+
+def _seq_scans(plan: dict) -> list:
+    """Relations read with a Seq Scan anywhere in an EXPLAIN (FORMAT JSON) plan node."""
+    found = []
+    if plan.get("Node Type") == "Seq Scan":
+        found.append(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        found.extend(_seq_scans(child))
+    return found
+
+
+async def explain(conn, statement) -> dict:
+    compiled = statement.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
+    result = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}")
+    plan = result.scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]
+
+
+async def check(scale: int, verbose: bool) -> bool:
+    schema = f"plan_check_{uuid.uuid4().hex[:8]}"
+    engine = create_async_engine(
+        DATABASE_URL,
+        poolclass=NullPool,
+        connect_args={"server_settings": {"search_path": schema}},
+    )
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(text(f"CREATE SCHEMA {schema}"))
+        async with engine.connect() as conn:
+            await conn.run_sync(run_migrations)
+        logger.info(f"Migrated scratch schema {schema}; seeding at scale {scale}")
+
+        async with engine.begin() as conn:
+            params = {
+                "users": USERS * scale,
+                "projects_per_user": PROJECTS_PER_USER,
+                "files_per_project": FILES_PER_PROJECT,
+                "analyses_per_user": ANALYSES_PER_USER,
+                "activities_per_project": ACTIVITIES_PER_PROJECT,
+                "sessions_per_user": SESSIONS_PER_USER,
+                "jobs": JOBS * scale,
+                "cache_entries": CACHE_ENTRIES * scale,
+            }
+            for statement in SEED.format(**params).split(";\n"):
+                if statement.strip():
+                    await conn.exec_driver_sql(statement)
+            await conn.execute(text("ANALYZE"))
+
+        checks = queries(scale)
+        failures = 0
+        async with engine.connect() as conn:
+            for name, statement in checks:
+                plan = await explain(conn, statement)
+                scans = sorted(set(_seq_scans(plan)) & SEEDED_TABLES)
+                status = f"SEQ SCAN on {', '.join(scans)}" if scans else "ok"
+                print(f"{name:<32} {plan['Node Type']:<24} cost={plan['Total Cost']:<10} {status}")
+                if verbose or scans:
+                    print(json.dumps(plan, indent=2))
+                failures += bool(scans)
+        print(f"{failures} of {len(checks)} queries use a sequential scan")
+        return failures == 0
+    finally:
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="EXPLAIN the API's queries on seeded tables; fail on sequential scans.")
+    parser.add_argument("--scale", type=int, default=1, help="multiplier for the seeded row counts")
+    parser.add_argument("--verbose", action="store_true", help="print every plan, not only failing ones")
+    args = parser.parse_args()
+    sys.exit(0 if asyncio.run(check(args.scale, args.verbose)) else 1)
@@ -10,6 +10,127 @@ logger = logging.getLogger(__name__)
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 ALLOWED_ORIGINS = os.getenv("ALLOWED_ORIGINS", "*").split(",")
 
+# LLM Client
+GROQ_MAX_CONCURRENCY = int(os.getenv("GROQ_MAX_CONCURRENCY", "32"))
+GROQ_MAX_CONNECTIONS = int(os.getenv("GROQ_MAX_CONNECTIONS", "64"))
+GROQ_TIMEOUT_SECONDS = float(os.getenv("GROQ_TIMEOUT_SECONDS", "120"))
+# Estimated prompt size above which license headers and literal tables are elided
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "6000"))
+
+# LLM Backend: provider, model, and the call policy (overall deadline, jittered
+# retries on 429/5xx/timeouts, hedged duplicate requests after the recent
+# LLM_HEDGE_PERCENTILE latency). LLM_BASE_URL points the Groq backend at
+# another server speaking its API, e.g. `python llm_standin.py`.
+LLM_BACKEND = os.getenv("LLM_BACKEND", "groq")
+LLM_BASE_URL = os.getenv("LLM_BASE_URL", "")
+LLM_MODEL = os.getenv("LLM_MODEL", "llama-3.3-70b-versatile")
+LLM_DEADLINE_SECONDS = float(os.getenv("LLM_DEADLINE_SECONDS", "90"))
+LLM_MAX_ATTEMPTS = int(os.getenv("LLM_MAX_ATTEMPTS", "3"))
+LLM_RETRY_BASE_SECONDS = float(os.getenv("LLM_RETRY_BASE_SECONDS", "0.5"))
+LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "false").lower() == "true"
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+
+# Model Routing: pick the model, max_tokens and prompt variant per call from
+# code size, language, mode and client load. MODEL_ROUTES overrides the default
+# table in services/model_router.py with a JSON list (or the path of a JSON file).
+MODEL_ROUTING_ENABLED = os.getenv("MODEL_ROUTING_ENABLED", "true").lower() == "true"
+LLM_FAST_MODEL = os.getenv("LLM_FAST_MODEL", "llama-3.1-8b-instant")
+MODEL_ROUTES = os.getenv("MODEL_ROUTES", "")
+# How the model returns optimized code: "code" (full text), "diff" (unified-diff
+# hunks applied server-side, with a full-text retry if they do not apply) or
+# "auto" (diff for files of at least DIFF_OUTPUT_MIN_LINES lines).
+LLM_OUTPUT_MODE = os.getenv("LLM_OUTPUT_MODE", "auto").lower()
+DIFF_OUTPUT_MIN_LINES = int(os.getenv("DIFF_OUTPUT_MIN_LINES", "80"))
+
+# Static Analysis Executor
+STATIC_ANALYSIS_MAX_CONCURRENCY = int(os.getenv("STATIC_ANALYSIS_MAX_CONCURRENCY", str(os.cpu_count() or 2)))
+STATIC_ANALYSIS_MAX_QUEUE = int(os.getenv("STATIC_ANALYSIS_MAX_QUEUE", "64"))
+STATIC_ANALYSIS_TIMEOUT_SECONDS = float(os.getenv("STATIC_ANALYSIS_TIMEOUT_SECONDS", "30"))
+
+# Python static analysis backend: "cli" spawns bandit per request, "pool" keeps
+# BANDIT_POOL_SIZE warm worker processes with Bandit's plugins preloaded.
+BANDIT_BACKEND = os.getenv("BANDIT_BACKEND", "cli").lower()
+BANDIT_POOL_SIZE = int(os.getenv("BANDIT_POOL_SIZE", "2"))
+# Python rule engine: "bandit" runs Bandit only, "ast" only the in-process
+# rules in services/python_rules.py (no subprocess), "both" the rules first and
+# then Bandit, merged.
+PYTHON_STATIC_ENGINE = os.getenv("PYTHON_STATIC_ENGINE", "bandit").lower()
+
+# JavaScript static analysis backend: "cli" spawns eslint per request, "daemon"
+# keeps ESLINT_DAEMON_POOL_SIZE supervised Node processes with the config loaded.
+ESLINT_BACKEND = os.getenv("ESLINT_BACKEND", "cli").lower()
+ESLINT_DAEMON_POOL_SIZE = int(os.getenv("ESLINT_DAEMON_POOL_SIZE", "2"))
+ESLINT_DAEMON_MAX_RSS_MB = int(os.getenv("ESLINT_DAEMON_MAX_RSS_MB", "512"))
+
+# Analysis Result Cache
+ANALYSIS_CACHE_ENABLED = os.getenv("ANALYSIS_CACHE_ENABLED", "true").lower() == "true"
+ANALYSIS_CACHE_MAX_ENTRIES = int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", "512"))
+ANALYSIS_CACHE_TTL_SECONDS = int(os.getenv("ANALYSIS_CACHE_TTL_SECONDS", "86400"))
+
+# Request Coalescing: identical concurrent analyses share one computation,
+# across workers through a Postgres advisory lock when DISTRIBUTED is on.
+SINGLE_FLIGHT_ENABLED = os.getenv("SINGLE_FLIGHT_ENABLED", "true").lower() == "true"
+SINGLE_FLIGHT_DISTRIBUTED = os.getenv("SINGLE_FLIGHT_DISTRIBUTED", "true").lower() == "true"
+SINGLE_FLIGHT_WAIT_SECONDS = float(os.getenv("SINGLE_FLIGHT_WAIT_SECONDS", "180"))
+SINGLE_FLIGHT_POLL_SECONDS = float(os.getenv("SINGLE_FLIGHT_POLL_SECONDS", "0.25"))
+# Connections reserved for the advisory locks, separate from DB_POOL_SIZE. A
+# leader holds one for its whole LLM call, so the default matches the LLM
+# concurrency cap; past it, computations run without the lock
+SINGLE_FLIGHT_LOCK_POOL_SIZE = int(os.getenv("SINGLE_FLIGHT_LOCK_POOL_SIZE", str(GROQ_MAX_CONCURRENCY)))
+
+# Large-File Mode: files above the threshold are split at function/class
+# boundaries into chunks of about CHUNK_MAX_LINES analyzed concurrently.
+LARGE_FILE_LINE_THRESHOLD = int(os.getenv("LARGE_FILE_LINE_THRESHOLD", "400"))
+CHUNK_MAX_LINES = int(os.getenv("CHUNK_MAX_LINES", "250"))
+
+# Incremental Re-analysis: after an edit to a project file only the changed
+# regions (plus context, widened to whole definitions) are re-analyzed.
+INCREMENTAL_CONTEXT_LINES = int(os.getenv("INCREMENTAL_CONTEXT_LINES", "5"))
+INCREMENTAL_MAX_CHANGED_RATIO = float(os.getenv("INCREMENTAL_MAX_CHANGED_RATIO", "0.5"))
+
+# Project Batch Analysis
+BATCH_DEFAULT_CONCURRENCY = int(os.getenv("BATCH_DEFAULT_CONCURRENCY", "4"))
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "16"))
+BATCH_FLUSH_SIZE = int(os.getenv("BATCH_FLUSH_SIZE", "10"))
+BATCH_JOB_TTL_SECONDS = int(os.getenv("BATCH_JOB_TTL_SECONDS", "3600"))
+# How often the running worker saves a batch's progress and checks for a
+# cancel from another worker; a batch not saved for BATCH_STALE_SECONDS is
+# reported as interrupted (its worker stopped or restarted).
+BATCH_SYNC_SECONDS = float(os.getenv("BATCH_SYNC_SECONDS", "2"))
+BATCH_STALE_SECONDS = int(os.getenv("BATCH_STALE_SECONDS", "30"))
+
+# Durable Analysis Job Queue
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_RETRY_BASE_SECONDS = float(os.getenv("JOB_RETRY_BASE_SECONDS", "10"))
+JOB_LOCK_TIMEOUT_SECONDS = int(os.getenv("JOB_LOCK_TIMEOUT_SECONDS", "600"))
+# A running job's worker renews its lock this often; keep well below the timeout
+JOB_HEARTBEAT_SECONDS = float(os.getenv("JOB_HEARTBEAT_SECONDS", "60"))
+JOB_WORKER_CONCURRENCY = int(os.getenv("JOB_WORKER_CONCURRENCY", "8"))
+JOB_POLL_INTERVAL_SECONDS = float(os.getenv("JOB_POLL_INTERVAL_SECONDS", "1"))
+
+# Confidence Scoring: (score, weight) per issue category. Re-score stored
+# history after changing them with `python rescore_history.py`.
+CONFIDENCE_CONFIRMED_SCORE = float(os.getenv("CONFIDENCE_CONFIRMED_SCORE", "0.90"))
+CONFIDENCE_CONFIRMED_WEIGHT = float(os.getenv("CONFIDENCE_CONFIRMED_WEIGHT", "2.0"))
+CONFIDENCE_STATIC_SCORE = float(os.getenv("CONFIDENCE_STATIC_SCORE", "0.85"))
+CONFIDENCE_STATIC_WEIGHT = float(os.getenv("CONFIDENCE_STATIC_WEIGHT", "1.5"))
+CONFIDENCE_INFERRED_SCORE = float(os.getenv("CONFIDENCE_INFERRED_SCORE", "0.75"))
+CONFIDENCE_INFERRED_WEIGHT = float(os.getenv("CONFIDENCE_INFERRED_WEIGHT", "1.0"))
+CONFIDENCE_EMPTY_SCORE = float(os.getenv("CONFIDENCE_EMPTY_SCORE", "0.75"))
+CONFIDENCE_MIN = float(os.getenv("CONFIDENCE_MIN", "0.60"))
+CONFIDENCE_MAX = float(os.getenv("CONFIDENCE_MAX", "0.95"))
+RESCORE_BATCH_SIZE = int(os.getenv("RESCORE_BATCH_SIZE", "1000"))
+
+# User Stats: profile totals are maintained incrementally; repair drift with
+# `python reconcile_user_stats.py`.
+USER_STATS_RECONCILE_BATCH_SIZE = int(os.getenv("USER_STATS_RECONCILE_BATCH_SIZE", "500"))
+
+# History Listing: GET /api/history/ returns pages of summaries (newest first)
+# with a keyset cursor; full analyses come from GET /api/history/{id}.
+HISTORY_PAGE_SIZE = int(os.getenv("HISTORY_PAGE_SIZE", "50"))
+HISTORY_MAX_PAGE_SIZE = int(os.getenv("HISTORY_MAX_PAGE_SIZE", "200"))
+
 # Database Configuration
 POSTGRES_USER = os.getenv("POSTGRES_USER", "postgres")
 POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD", "postgres")
@@ -18,6 +139,19 @@ POSTGRES_PORT = os.getenv("POSTGRES_PORT", "5432")
 POSTGRES_DB = os.getenv("POSTGRES_DB", "coderefine")
 
 DATABASE_URL = f"postgresql+asyncpg://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+
+# Database Instrumentation: per-request query counts and DB time are collected
+# from engine events (see GET /api/metrics/db). DB_ECHO logs every statement;
+# DB_DEBUG_HEADERS adds X-DB-* headers to responses.
+DB_ECHO = os.getenv("DB_ECHO", "false").lower() == "true"
+DB_SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", "200"))
+DB_DEBUG_HEADERS = os.getenv("DB_DEBUG_HEADERS", "false").lower() == "true"
+
+# Operational Metrics: /api/metrics/* and /api/analyze/*-stats need an
+# X-Metrics-Token header equal to METRICS_TOKEN; unset, they are disabled.
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
 
 # Security
 _DEFAULT_SECRET_KEY = "your-secret-key-change-this-in-production"
@@ -1,6 +1,11 @@
+import os
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect, text
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
-from config.settings import DATABASE_URL
+from config.settings import DATABASE_URL, DB_ECHO, DB_POOL_SIZE, DB_MAX_OVERFLOW
+from database.metrics import InstrumentedQueuePool, instrument_engine
 import logging
 
 logger = logging.getLogger(__name__)
@@ -9,12 +14,14 @@ Base = declarative_base()
 
 engine = create_async_engine(
     DATABASE_URL,
-    echo=True,
+    echo=DB_ECHO,
     future=True,
     pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20
+    poolclass=InstrumentedQueuePool,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW
 )
+instrument_engine(engine)
 
 AsyncSessionLocal = async_sessionmaker(
     engine,
@@ -36,8 +43,46 @@ async def get_db():
         finally:
             await session.close()
 
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The revision matching the tables create_all made before migrations existed
+BASELINE_REVISION = "6629ad5091e1"
+
+# Serializes migrations when several workers start at once
+MIGRATION_LOCK_ID = 0x436f646552656669
+
+
+def run_migrations(connection) -> None:
+    """Apply the Alembic migrations on a sync *connection*, stamping a pre-migration schema first.
+
+    Pass a connection with no transaction open: each revision commits on its
+    own, and some commit part-way to build indexes CONCURRENTLY. The advisory
+    lock is therefore session-level, held across those commits.
+    """
+    connection.execute(text("SELECT pg_advisory_lock(:id)"), {"id": MIGRATION_LOCK_ID})
+    connection.commit()
+    try:
+        config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+        config.set_main_option("script_location", os.path.join(BACKEND_DIR, "migrations"))
+        config.attributes["connection"] = connection
+
+        tables = inspect(connection).get_table_names()
+        # Alembic only manages transactions it began itself
+        connection.commit()
+        if "users" in tables and "alembic_version" not in tables:
+            logger.info(f"Existing schema has no migration history; stamping baseline {BASELINE_REVISION}")
+            command.stamp(config, BASELINE_REVISION)
+        command.upgrade(config, "head")
+        # Reading the version table when nothing was pending began one more
+        connection.commit()
+    finally:
+        connection.rollback()
+        connection.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": MIGRATION_LOCK_ID})
+        connection.commit()
+
+
 async def init_db():
-    """Initialize database tables."""
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-    logger.info("Database tables created successfully")
+    """Bring the schema up to date by applying the Alembic migrations."""
+    async with engine.connect() as conn:
+        await conn.run_sync(run_migrations)
+    logger.info("Database migrations applied successfully")
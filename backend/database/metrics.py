@@ -0,0 +1,184 @@
+import logging
+import time
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from config.settings import DB_SLOW_QUERY_MS, DB_DEBUG_HEADERS
+
+logger = logging.getLogger(__name__)
+
+
+class RequestDBStats:
+    """Database work done on behalf of one HTTP request."""
+
+    __slots__ = ("path", "queries", "db_time", "checkout_wait", "slow_queries")
+
+    def __init__(self, path: str = ""):
+        self.path = path
+        self.queries = 0
+        self.db_time = 0.0
+        self.checkout_wait = 0.0
+        self.slow_queries = 0
+
+    def headers(self) -> dict:
+        return {
+            "X-DB-Queries": str(self.queries),
+            "X-DB-Time-Ms": f"{self.db_time * 1000:.1f}",
+            "X-DB-Pool-Wait-Ms": f"{self.checkout_wait * 1000:.1f}",
+        }
+
+
+_current: ContextVar[Optional[RequestDBStats]] = ContextVar("request_db_stats", default=None)
+
+_stats = {
+    "queries": 0,
+    "db_time_seconds": 0.0,
+    "slow_queries": 0,
+    "errors": 0,
+    "checkouts": 0,
+    "checkout_wait_seconds": 0.0,
+    "checkout_wait_max_seconds": 0.0,
+    "connections_opened": 0,
+    "invalidations": 0,
+}
+
+# Per endpoint ("GET /api/history/"): requests, queries, DB time, worst request
+_endpoints: dict[str, dict] = {}
+
+_pool = None
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """The asyncio queue pool, timing how long each checkout waits for a connection."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - started
+            _stats["checkouts"] += 1
+            _stats["checkout_wait_seconds"] += waited
+            _stats["checkout_wait_max_seconds"] = max(_stats["checkout_wait_max_seconds"], waited)
+            current = _current.get()
+            if current is not None:
+                current.checkout_wait += waited
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    _stats["queries"] += 1
+    _stats["db_time_seconds"] += elapsed
+    current = _current.get()
+    if current is not None:
+        current.queries += 1
+        current.db_time += elapsed
+    if elapsed * 1000 >= DB_SLOW_QUERY_MS:
+        _stats["slow_queries"] += 1
+        where = ""
+        if current is not None:
+            current.slow_queries += 1
+            where = f" in {current.path}"
+        logger.warning(f"Slow query ({elapsed * 1000:.1f} ms{where}): {' '.join(statement.split())[:500]}")
+
+
+def _handle_error(exception_context):
+    _stats["errors"] += 1
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_started"):
+        conn.info["query_started"].pop()
+
+
+def _on_connect(dbapi_connection, connection_record):
+    _stats["connections_opened"] += 1
+
+
+def _on_invalidate(dbapi_connection, connection_record, exception):
+    _stats["invalidations"] += 1
+
+
+def instrument_engine(engine) -> None:
+    """Attach query timing and pool listeners to an async engine."""
+    global _pool
+    sync_engine = engine.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+    event.listen(sync_engine.pool, "connect", _on_connect)
+    event.listen(sync_engine.pool, "invalidate", _on_invalidate)
+    _pool = sync_engine.pool
+
+
+def _record_request(endpoint: str, stats: RequestDBStats) -> None:
+    entry = _endpoints.get(endpoint)
+    if entry is None:
+        entry = _endpoints[endpoint] = {
+            "requests": 0,
+            "queries": 0,
+            "db_time_seconds": 0.0,
+            "checkout_wait_seconds": 0.0,
+            "slow_queries": 0,
+            "max_queries": 0,
+        }
+    entry["requests"] += 1
+    entry["queries"] += stats.queries
+    entry["db_time_seconds"] += stats.db_time
+    entry["checkout_wait_seconds"] += stats.checkout_wait
+    entry["slow_queries"] += stats.slow_queries
+    entry["max_queries"] = max(entry["max_queries"], stats.queries)
+
+
+async def db_metrics_middleware(request, call_next):
+    """Count the queries, DB time and pool wait of each request.
+
+    Totals are kept per route; with DB_DEBUG_HEADERS they are also returned
+    as X-DB-* response headers. Work done while a streaming body is sent
+    happens after this returns and is only counted in the global totals.
+    """
+    stats = RequestDBStats(request.url.path)
+    token = _current.set(stats)
+    try:
+        response = await call_next(request)
+    finally:
+        _current.reset(token)
+    route = request.scope.get("route")
+    if route is not None:
+        _record_request(f"{request.method} {route.path}", stats)
+    if DB_DEBUG_HEADERS:
+        response.headers.update(stats.headers())
+    return response
+
+
+def _rounded(values: dict) -> dict:
+    return {key: round(value, 4) if isinstance(value, float) else value for key, value in values.items()}
+
+
+def db_stats() -> dict:
+    """Global query and pool counters, live pool gauges, and per-endpoint averages."""
+    pool = {}
+    if _pool is not None:
+        pool = {
+            "size": _pool.size(),
+            "in_use": _pool.checkedout(),
+            "idle": _pool.checkedin(),
+            "overflow": max(0, _pool.overflow()),
+        }
+    endpoints = {}
+    for endpoint, entry in sorted(_endpoints.items()):
+        requests = entry["requests"]
+        endpoints[endpoint] = _rounded({
+            **entry,
+            "avg_queries": entry["queries"] / requests,
+            "avg_db_time_seconds": entry["db_time_seconds"] / requests,
+        })
+    return {
+        **_rounded(_stats),
+        "slow_query_ms": DB_SLOW_QUERY_MS,
+        "pool": pool,
+        "endpoints": endpoints,
+    }
@@ -0,0 +1,206 @@
+"""Deterministic local stand-in for the Groq chat-completions API.
+
+Serves POST /openai/v1/chat/completions (plain and streamed) with answers
+derived from the prompt, and latency/error behaviour drawn from a seeded
+profile, so retries, hedging and tail latency can be exercised offline::
+
+    python llm_standin.py --port 8100 --latency-ms 300 --tail-rate 0.05 --tail-ms 4000 --rate-429 0.02
+
+then run the API with LLM_BASE_URL=http://127.0.0.1:8100. The n-th request
+always gets the same latency and outcome for a given --seed.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import re
+import time
+from dataclasses import dataclass
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.requests import ClientDisconnect
+from services.prompt_builder import estimate_tokens
+from services.code_diff import make_unified_diff
+
+_CODE_BLOCK = re.compile(r"```[\w+#-]*\n(.*?)\n```", re.DOTALL)
+
+# (pattern, type, severity, message, replacement or None) checks applied line by line
+_CHECKS = [
+    (re.compile(r"\beval\("), "security", "HIGH", "Use of eval on dynamic input", "ast.literal_eval("),
+    (re.compile(r"\bexec\("), "security", "HIGH", "Use of exec on dynamic input", None),
+    (re.compile(r"shell\s*=\s*True"), "security", "HIGH", "Subprocess call with shell=True", "shell=False"),
+    (re.compile(r"except\s*:"), "reliability", "MEDIUM", "Bare except swallows all errors", "except Exception:"),
+    (re.compile(r"\bprint\("), "style", "LOW", "Debug print left in code", None),
+]
+
+
+@dataclass
+class Profile:
+    latency_ms: float = 200.0
+    jitter: float = 0.25
+    tail_rate: float = 0.0
+    tail_ms: float = 3000.0
+    rate_429: float = 0.0
+    rate_500: float = 0.0
+    retry_after: float = 0.0
+    chunk_ms: float = 5.0
+    # Generation time per completion token, so latency grows with the answer's length
+    ms_per_token: float = 0.0
+    seed: int = 0
+
+
+def analyze(prompt: str) -> str:
+    """The stand-in's answer: a valid analysis JSON derived only from the prompt."""
+    match = _CODE_BLOCK.search(prompt)
+    code = match.group(1) if match else ""
+    issues = []
+    fixed = []
+    for number, line in enumerate(code.split("\n"), 1):
+        for pattern, issue_type, severity, message, replacement in _CHECKS:
+            if pattern.search(line):
+                if replacement is not None:
+                    line = pattern.sub(replacement, line)
+                issues.append({
+                    "type": issue_type,
+                    "line": number,
+                    "severity": severity,
+                    "message": message,
+                    "explanation": f"Line {number} matches a risky pattern.",
+                    "suggestion": "Replace it with a safer alternative.",
+                })
+        fixed.append(line)
+    digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+    optimized = "\n".join(fixed)
+    # Answer in whichever output form the prompt asks for
+    if '"optimized_diff"' in prompt:
+        output = {"optimized_diff": make_unified_diff(code, optimized)}
+    else:
+        output = {"optimized_code": optimized}
+    return json.dumps({
+        "ai_issues": issues,
+        **output,
+        "explanation": f"Stand-in analysis {digest}: {len(issues)} issue(s) in {code.count(chr(10)) + 1} lines.",
+    })
+
+
+def create_app(profile: Profile) -> FastAPI:
+    app = FastAPI(title="LLM stand-in")
+    counter = {"requests": 0}
+
+    def _draw() -> tuple[float, int]:
+        """(latency seconds, error status or 0) for the next request."""
+        counter["requests"] += 1
+        rng = random.Random(f"{profile.seed}:{counter['requests']}")
+        latency = profile.latency_ms * rng.lognormvariate(0, profile.jitter) / 1000
+        if rng.random() < profile.tail_rate:
+            latency = profile.tail_ms / 1000
+        roll = rng.random()
+        if roll < profile.rate_429:
+            return latency / 4, 429
+        if roll < profile.rate_429 + profile.rate_500:
+            return latency / 4, rng.choice((500, 503))
+        return latency, 0
+
+    def _usage(prompt: str, content: str) -> dict:
+        prompt_tokens = estimate_tokens(prompt)
+        completion_tokens = estimate_tokens(content)
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+
+    @app.post("/openai/v1/chat/completions")
+    async def chat_completions(request: Request):
+        try:
+            body = await request.json()
+        except ClientDisconnect:
+            # A cancelled retry or hedge
+            return Response(status_code=499)
+        prompt = "\n".join(str(m.get("content", "")) for m in body.get("messages", []))
+        model = body.get("model", "standin")
+        latency, status = _draw()
+
+        if status:
+            await asyncio.sleep(latency)
+            headers = {"retry-after": str(profile.retry_after)} if status == 429 and profile.retry_after else {}
+            kind = "rate_limit_exceeded" if status == 429 else "internal_server_error"
+            return JSONResponse(
+                status_code=status,
+                content={"error": {"message": f"Stand-in {kind}", "type": kind}},
+                headers=headers,
+            )
+
+        content = analyze(prompt)
+        completion_id = f"chatcmpl-{counter['requests']}"
+        created = int(time.time())
+
+        if not body.get("stream"):
+            await asyncio.sleep(latency + estimate_tokens(content) * profile.ms_per_token / 1000)
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }],
+                "usage": _usage(prompt, content),
+            }
+
+        async def events():
+            # Time to first token is the drawn latency; the rest trickles out
+            await asyncio.sleep(latency)
+            base = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model}
+            for i in range(0, len(content), 48):
+                piece = content[i:i + 48]
+                delta = {"index": 0, "delta": {"content": piece}, "finish_reason": None}
+                yield f"data: {json.dumps({**base, 'choices': [delta]})}\n\n"
+                await asyncio.sleep((profile.chunk_ms + estimate_tokens(piece) * profile.ms_per_token) / 1000)
+            final = {
+                **base,
+                "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                "x_groq": {"id": completion_id, "usage": _usage(prompt, content)},
+            }
+            yield f"data: {json.dumps(final)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.get("/stats")
+    async def stats():
+        return {"requests": counter["requests"], "profile": profile.__dict__}
+
+    return app
+
+
+def profile_from_args(args: argparse.Namespace) -> Profile:
+    return Profile(**{field: getattr(args, field) for field in Profile.__dataclass_fields__})
+
+
+def add_profile_args(parser: argparse.ArgumentParser) -> None:
+    defaults = Profile()
+    parser.add_argument("--latency-ms", dest="latency_ms", type=float, default=defaults.latency_ms)
+    parser.add_argument("--jitter", type=float, default=defaults.jitter, help="lognormal sigma of the latency")
+    parser.add_argument("--tail-rate", dest="tail_rate", type=float, default=defaults.tail_rate)
+    parser.add_argument("--tail-ms", dest="tail_ms", type=float, default=defaults.tail_ms)
+    parser.add_argument("--rate-429", dest="rate_429", type=float, default=defaults.rate_429)
+    parser.add_argument("--rate-500", dest="rate_500", type=float, default=defaults.rate_500)
+    parser.add_argument("--retry-after", dest="retry_after", type=float, default=defaults.retry_after)
+    parser.add_argument("--chunk-ms", dest="chunk_ms", type=float, default=defaults.chunk_ms)
+    parser.add_argument("--ms-per-token", dest="ms_per_token", type=float, default=defaults.ms_per_token)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Deterministic local stand-in for the Groq API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    add_profile_args(parser)
+    args = parser.parse_args()
+    uvicorn.run(create_app(profile_from_args(args)), host=args.host, port=args.port, log_level="warning")
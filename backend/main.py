@@ -1,3 +1,4 @@
+import asyncio
 import uvicorn
 import logging
 from fastapi import FastAPI
@@ -10,8 +11,18 @@ from routes.history import router as history_router
 from routes.projects import router as projects_router
 from routes.profile import router as profile_router
 from routes.files import router as files_router
-from config.settings import ALLOWED_ORIGINS
+from routes.batch import router as batch_router
+from routes.jobs import router as jobs_router
+from routes.metrics import router as metrics_router
+from config.settings import ALLOWED_ORIGINS, BANDIT_BACKEND, ESLINT_BACKEND
 from database import init_db
+from database.metrics import db_metrics_middleware
+from services.llm_backend import close_llm_backend
+from services.single_flight import close_single_flight
+from services.result_cache import purge_expired
+from services.bandit_pool import start_bandit_pool, stop_bandit_pool
+from services.eslint_daemon import start_eslint_daemons, stop_eslint_daemons
+from services.batch_jobs import cancel_all_batch_jobs
 import models  # noqa: F401 — ensure all models are registered before init_db
 
 load_dotenv()
@@ -29,9 +40,20 @@ async def lifespan(app: FastAPI):
     logger.info("Initializing database...")
     await init_db()
     logger.info("Database initialized successfully")
+    purged = await purge_expired()
+    logger.info(f"Purged {purged} expired analysis cache entries")
+    if BANDIT_BACKEND == "pool":
+        await asyncio.to_thread(start_bandit_pool)
+    if ESLINT_BACKEND == "daemon":
+        await start_eslint_daemons()
     yield
     # Shutdown
     logger.info("Shutting down...")
+    await cancel_all_batch_jobs()
+    await close_llm_backend()
+    await close_single_flight()
+    stop_bandit_pool()
+    await stop_eslint_daemons()
 
 
 app = FastAPI(title="CodeRefine Backend", lifespan=lifespan)
@@ -43,13 +65,17 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.middleware("http")(db_metrics_middleware)
 
+app.include_router(jobs_router)
 app.include_router(analyze_router)
 app.include_router(auth_router)
 app.include_router(history_router)
 app.include_router(projects_router)
 app.include_router(profile_router)
 app.include_router(files_router)
+app.include_router(batch_router)
+app.include_router(metrics_router)
 
 
 @app.get("/health")
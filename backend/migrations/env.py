@@ -11,15 +11,16 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 from database import Base
 from config.settings import DATABASE_URL
-from models.user import User
-from models.session import Session
-from models.analysis_history import AnalysisHistory
-from models.project import Project
+import models  # noqa: F401 — register every table on Base.metadata
 
 config = context.config
 config.set_main_option('sqlalchemy.url', DATABASE_URL.replace('+asyncpg', '+psycopg'))
 
-if config.config_file_name is not None:
+# When the app runs the migrations (database.init_db) it passes its own
+# connection, outside any transaction, and keeps its own logging configuration
+connection = config.attributes.get("connection")
+
+if config.config_file_name is not None and connection is None:
     fileConfig(config.config_file_name)
 
 target_metadata = Base.metadata
@@ -32,6 +33,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        transaction_per_migration=True,
     )
 
     with context.begin_transaction():
@@ -39,7 +41,13 @@ def run_migrations_offline() -> None:
 
 
 def do_run_migrations(connection: Connection) -> None:
-    context.configure(connection=connection, target_metadata=target_metadata)
+    # One transaction per revision, so a revision can commit mid-way to build
+    # indexes CONCURRENTLY (autocommit_block) without committing the others
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        transaction_per_migration=True,
+    )
 
     with context.begin_transaction():
         context.run_migrations()
@@ -59,7 +67,10 @@ async def run_async_migrations() -> None:
 
 
 def run_migrations_online() -> None:
-    asyncio.run(run_async_migrations())
+    if connection is not None:
+        do_run_migrations(connection)
+    else:
+        asyncio.run(run_async_migrations())
 
 
 if context.is_offline_mode():
@@ -0,0 +1,41 @@
+"""projects.files_count
+
+The counter GET /api/projects/ reads instead of counting each project's
+files; the file routes keep it up to date. Added with a server default so
+existing rows are valid at once, then backfilled from the files table (only
+projects that have files need touching).
+
+Its own revision, directly after the baseline, so the column ships with the
+backfill that makes it correct.
+
+Revision ID: 0a62c04e7a0b
+Revises: 6629ad5091e1
+Create Date: 2026-10-18 03:40:30.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0a62c04e7a0b'
+down_revision = '6629ad5091e1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'projects',
+        sa.Column('files_count', sa.Integer(), server_default='0', nullable=False),
+        if_not_exists=True,
+    )
+    op.execute(
+        'UPDATE projects SET files_count = counts.files '
+        'FROM (SELECT project_id, count(*) AS files FROM files GROUP BY project_id) AS counts '
+        'WHERE counts.project_id = projects.id AND projects.files_count <> counts.files'
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('projects', 'files_count')
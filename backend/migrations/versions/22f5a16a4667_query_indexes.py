@@ -0,0 +1,100 @@
+"""indexes for the routes' access patterns
+
+Composite indexes matching each listing's filter and sort, and indexes on
+the foreign keys that ON DELETE CASCADE / SET NULL follow when a user, file
+or analysis is deleted. check_query_plans.py runs EXPLAIN on the queries
+these serve.
+
+The tables are live and large by now, so every index is built and dropped
+CONCURRENTLY, outside a transaction: writes carry on during the builds, and
+an interrupted run keeps the indexes it finished. A build that failed
+part-way leaves an INVALID index behind, which the next run drops and builds
+again.
+
+Revision ID: 22f5a16a4667
+Revises: 2356885bd7f1
+Create Date: 2026-10-18 03:42:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '22f5a16a4667'
+down_revision = '2356885bd7f1'
+branch_labels = None
+depends_on = None
+
+# (name, table, columns) of the plain foreign-key indexes
+FOREIGN_KEY_INDEXES = (
+    ('ix_sessions_user_id', 'sessions', ['user_id']),
+    ('ix_project_activities_user_id', 'project_activities', ['user_id']),
+    ('ix_project_activities_file_id', 'project_activities', ['file_id']),
+    ('ix_analysis_history_project_id', 'analysis_history', ['project_id']),
+    ('ix_analysis_jobs_user_id', 'analysis_jobs', ['user_id']),
+    ('ix_analysis_jobs_project_id', 'analysis_jobs', ['project_id']),
+    ('ix_analysis_jobs_file_id', 'analysis_jobs', ['file_id']),
+    ('ix_analysis_jobs_analysis_id', 'analysis_jobs', ['analysis_id']),
+)
+
+
+def _create_index(name, table, columns, **kw) -> None:
+    """CREATE INDEX CONCURRENTLY IF NOT EXISTS, replacing an invalid one left by a failed build."""
+    if not op.get_context().as_sql:
+        invalid = op.get_bind().execute(
+            sa.text('SELECT NOT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)'),
+            {'name': name},
+        ).scalar()
+        if invalid:
+            _drop_index(name, table)
+    op.create_index(name, table, columns, if_not_exists=True, postgresql_concurrently=True, **kw)
+
+
+def _drop_index(name, table) -> None:
+    op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        # GET /api/projects/: WHERE user_id AND is_active ORDER BY created_at DESC
+        _create_index(
+            'ix_projects_user_id_is_active_created_at', 'projects',
+            ['user_id', 'is_active', 'created_at'],
+        )
+
+        # Project file listing and batch analysis: WHERE project_id ORDER BY created_at.
+        # Supersedes the single-column index create_all may have added, which
+        # is dropped once the new one is there to take its lookups.
+        _create_index('ix_files_project_id_created_at', 'files', ['project_id', 'created_at'])
+        _drop_index('ix_files_project_id', 'files')
+
+        # GET /api/projects/{id}/history: WHERE project_id AND user_id ORDER BY timestamp DESC
+        _create_index(
+            'ix_project_activities_project_id_user_id_timestamp', 'project_activities',
+            ['project_id', 'user_id', 'timestamp'],
+        )
+
+        # GET /api/history/ keyset pages; language, mode and confidence_score
+        # included for the stats recount. create_all may have built it without
+        # the INCLUDE columns, so the replacement is built under another name
+        # and swapped in, leaving the history pages an index throughout.
+        _create_index(
+            'ix_analysis_history_user_created_id_new', 'analysis_history',
+            ['user_id', 'created_at', 'id'], postgresql_include=['language', 'mode', 'confidence_score'],
+        )
+        _drop_index('ix_analysis_history_user_created_id', 'analysis_history')
+        op.execute('ALTER INDEX ix_analysis_history_user_created_id_new RENAME TO ix_analysis_history_user_created_id')
+
+        for name, table, columns in FOREIGN_KEY_INDEXES:
+            _create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(FOREIGN_KEY_INDEXES):
+            _drop_index(name, table)
+        _drop_index('ix_analysis_history_user_created_id', 'analysis_history')
+        _drop_index('ix_project_activities_project_id_user_id_timestamp', 'project_activities')
+        _drop_index('ix_files_project_id_created_at', 'files')
+        _drop_index('ix_projects_user_id_is_active_created_at', 'projects')
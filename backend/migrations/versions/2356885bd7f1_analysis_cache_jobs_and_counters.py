@@ -0,0 +1,120 @@
+"""analysis cache, jobs, snapshots and maintained counters
+
+Everything added to the models after the baseline apart from
+projects.files_count (0a62c04e7a0b): the shared result cache, the durable
+job queue, incremental-analysis snapshots, per-user stats (filled in on
+first profile read or by reconcile_user_stats.py), and token usage and
+routing on history rows.
+
+Written with IF NOT EXISTS throughout because create_all may already have
+created some of these tables (though never new columns on existing tables)
+on databases stamped at the baseline.
+
+Revision ID: 2356885bd7f1
+Revises: 0a62c04e7a0b
+Create Date: 2026-10-18 03:41:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '2356885bd7f1'
+down_revision = '0a62c04e7a0b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('analysis_history', sa.Column('prompt_tokens', sa.Integer(), nullable=True), if_not_exists=True)
+    op.add_column('analysis_history', sa.Column('completion_tokens', sa.Integer(), nullable=True), if_not_exists=True)
+    op.add_column('analysis_history', sa.Column('routing', sa.JSON(), nullable=True), if_not_exists=True)
+
+    op.create_table(
+        'analysis_cache',
+        sa.Column('key', sa.String(length=64), nullable=False),
+        sa.Column('payload', sa.JSON(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('key'),
+        if_not_exists=True,
+    )
+    op.create_index('ix_analysis_cache_expires_at', 'analysis_cache', ['expires_at'], if_not_exists=True)
+
+    op.create_table(
+        'analysis_jobs',
+        sa.Column('id', sa.String(length=32), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('project_id', sa.Integer(), nullable=True),
+        sa.Column('file_id', sa.Integer(), nullable=True),
+        sa.Column('file_name', sa.String(length=255), nullable=True),
+        sa.Column('language', sa.String(length=50), nullable=False),
+        sa.Column('mode', sa.String(length=50), nullable=False),
+        sa.Column('code', sa.Text(), nullable=False),
+        sa.Column('instruction', sa.Text(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('max_attempts', sa.Integer(), nullable=False),
+        sa.Column('run_after', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('locked_by', sa.String(length=100), nullable=True),
+        sa.Column('locked_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('result', sa.JSON(), nullable=True),
+        sa.Column('analysis_id', sa.Integer(), nullable=True),
+        sa.Column('enrichment', sa.Boolean(), server_default='false', nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ondelete='SET NULL'),
+        sa.ForeignKeyConstraint(['file_id'], ['files.id'], ondelete='SET NULL'),
+        sa.ForeignKeyConstraint(['analysis_id'], ['analysis_history.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True,
+    )
+    # Added to the model after the table, so create_all may have made it without
+    op.add_column(
+        'analysis_jobs',
+        sa.Column('enrichment', sa.Boolean(), server_default='false', nullable=False),
+        if_not_exists=True,
+    )
+    op.create_index('ix_analysis_jobs_status_run_after', 'analysis_jobs', ['status', 'run_after'], if_not_exists=True)
+
+    op.create_table(
+        'file_analysis_snapshots',
+        sa.Column('file_id', sa.Integer(), nullable=False),
+        sa.Column('language', sa.String(length=50), nullable=False),
+        sa.Column('mode', sa.String(length=50), nullable=False),
+        sa.Column('instruction', sa.Text(), nullable=False),
+        sa.Column('code', sa.Text(), nullable=False),
+        sa.Column('result', sa.JSON(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['file_id'], ['files.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('file_id'),
+        if_not_exists=True,
+    )
+
+    op.create_table(
+        'user_stats',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('projects_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('analyses_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('languages', postgresql.JSONB(), server_default='{}', nullable=False),
+        sa.Column('modes', postgresql.JSONB(), server_default='{}', nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('reconciled_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id'),
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('user_stats')
+    op.drop_table('file_analysis_snapshots')
+    op.drop_table('analysis_jobs')
+    op.drop_table('analysis_cache')
+    op.drop_column('analysis_history', 'routing')
+    op.drop_column('analysis_history', 'completion_tokens')
+    op.drop_column('analysis_history', 'prompt_tokens')
@@ -0,0 +1,48 @@
+"""analysis_batches
+
+Project batch analyses were kept in the memory of the API worker that
+started them, so other workers could not report or cancel them and a
+restart lost them. Their state now lives in this table.
+
+Revision ID: 5b8d2e6a1c94
+Revises: 9c3e1f4b7d20
+Create Date: 2026-10-18 03:44:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b8d2e6a1c94'
+down_revision = '9c3e1f4b7d20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'analysis_batches',
+        sa.Column('id', sa.String(length=32), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('project_id', sa.Integer(), nullable=False),
+        sa.Column('mode', sa.String(length=50), nullable=False),
+        sa.Column('instruction', sa.Text(), nullable=True),
+        sa.Column('concurrency', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('files', sa.JSON(), nullable=False),
+        sa.Column('cancel_requested', sa.Boolean(), server_default='false', nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('heartbeat_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True,
+    )
+    op.create_index('ix_analysis_batches_user_id', 'analysis_batches', ['user_id'], if_not_exists=True)
+    op.create_index('ix_analysis_batches_project_id', 'analysis_batches', ['project_id'], if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_table('analysis_batches')
@@ -0,0 +1,137 @@
+"""baseline schema
+
+The tables init_db created with Base.metadata.create_all before migrations
+were introduced. Databases created that way are stamped at this revision by
+init_db and upgraded from here.
+
+Revision ID: 6629ad5091e1
+Revises:
+Create Date: 2026-10-18 03:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6629ad5091e1'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'users',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('username', sa.String(length=50), nullable=False),
+        sa.Column('email', sa.String(length=255), nullable=False),
+        sa.Column('hashed_password', sa.String(length=255), nullable=False),
+        sa.Column('full_name', sa.String(length=100), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('is_verified', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_users_id', 'users', ['id'])
+    op.create_index('ix_users_username', 'users', ['username'], unique=True)
+    op.create_index('ix_users_email', 'users', ['email'], unique=True)
+
+    op.create_table(
+        'sessions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('session_token', sa.String(length=255), nullable=False),
+        sa.Column('ip_address', sa.String(length=45), nullable=True),
+        sa.Column('user_agent', sa.Text(), nullable=True),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_sessions_id', 'sessions', ['id'])
+    op.create_index('ix_sessions_session_token', 'sessions', ['session_token'], unique=True)
+
+    op.create_table(
+        'projects',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('language', sa.String(length=50), nullable=True),
+        sa.Column('repository_url', sa.String(length=500), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_projects_id', 'projects', ['id'])
+
+    op.create_table(
+        'files',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('project_id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('language', sa.String(length=50), nullable=False),
+        sa.Column('content', sa.Text(), nullable=True),
+        sa.Column('source', sa.String(length=20), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_files_id', 'files', ['id'])
+
+    op.create_table(
+        'analysis_history',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('project_id', sa.Integer(), nullable=True),
+        sa.Column('language', sa.String(length=50), nullable=False),
+        sa.Column('mode', sa.String(length=50), nullable=False),
+        sa.Column('code_snippet', sa.Text(), nullable=False),
+        sa.Column('instruction', sa.Text(), nullable=True),
+        sa.Column('static_issues', sa.JSON(), nullable=True),
+        sa.Column('ai_suggestions', sa.JSON(), nullable=True),
+        sa.Column('aggregated_issues', sa.JSON(), nullable=True),
+        sa.Column('optimized_code', sa.Text(), nullable=True),
+        sa.Column('explanation', sa.Text(), nullable=True),
+        sa.Column('confidence_score', sa.Float(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_analysis_history_id', 'analysis_history', ['id'])
+
+    op.create_table(
+        'project_activities',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('project_id', sa.Integer(), nullable=False),
+        sa.Column('file_id', sa.Integer(), nullable=True),
+        sa.Column(
+            'action_type',
+            sa.Enum('CREATE_FILE', 'UPLOAD_FILE', 'EDIT_FILE', 'ANALYZE_FILE', 'EXPORT_FILE', name='actiontype'),
+            nullable=False,
+        ),
+        sa.Column('file_name', sa.String(length=255), nullable=False),
+        sa.Column('timestamp', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['file_id'], ['files.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_project_activities_id', 'project_activities', ['id'])
+
+
+def downgrade() -> None:
+    op.drop_table('project_activities')
+    op.execute('DROP TYPE actiontype')
+    op.drop_table('analysis_history')
+    op.drop_table('files')
+    op.drop_table('projects')
+    op.drop_table('sessions')
+    op.drop_table('users')
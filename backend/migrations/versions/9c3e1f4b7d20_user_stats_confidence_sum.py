@@ -0,0 +1,39 @@
+"""user_stats.confidence_sum
+
+The running sum of confidence_score behind the profile's average confidence,
+kept by services.user_stats alongside analyses_count. Added with a server
+default and backfilled from analysis_history for users that already have a
+stats row; rows created later are counted in full, sum included.
+
+Revision ID: 9c3e1f4b7d20
+Revises: 22f5a16a4667
+Create Date: 2026-10-18 03:43:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c3e1f4b7d20'
+down_revision = '22f5a16a4667'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'user_stats',
+        sa.Column('confidence_sum', sa.Float(), server_default='0', nullable=False),
+        if_not_exists=True,
+    )
+    op.execute(
+        'UPDATE user_stats SET confidence_sum = sums.confidence '
+        'FROM (SELECT user_id, sum(confidence_score) AS confidence FROM analysis_history '
+        'WHERE confidence_score IS NOT NULL GROUP BY user_id) AS sums '
+        'WHERE sums.user_id = user_stats.user_id'
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('user_stats', 'confidence_sum')
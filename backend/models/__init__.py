@@ -4,3 +4,8 @@ from models.file import File
 from models.analysis_history import AnalysisHistory
 from models.session import Session
 from models.project_activity import ProjectActivity
+from models.analysis_cache import AnalysisCacheEntry
+from models.analysis_job import AnalysisJob
+from models.file_analysis_snapshot import FileAnalysisSnapshot
+from models.user_stats import UserStats
+from models.analysis_batch import AnalysisBatch
@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, JSON, Boolean
+from sqlalchemy.sql import func
+from database import Base
+
+
+class AnalysisBatch(Base):
+    """Progress of a project batch analysis, shared by every API worker.
+
+    The worker that started the batch runs it and writes its state here; any
+    worker can read it or set cancel_requested.
+    """
+    __tablename__ = "analysis_batches"
+
+    id = Column(String(32), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False, index=True)
+    mode = Column(String(50), nullable=False)
+    instruction = Column(Text)
+    concurrency = Column(Integer, nullable=False)
+    status = Column(String(20), nullable=False)  # pending / running / done / cancelled / interrupted
+    # Per-file state: file_id, file_name, language, status, cached, error, analysis_id
+    files = Column(JSON, nullable=False)
+    cancel_requested = Column(Boolean, nullable=False, default=False, server_default="false")
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Renewed by the running worker; a stale one means the worker went away
+    heartbeat_at = Column(DateTime(timezone=True), server_default=func.now())
+    finished_at = Column(DateTime(timezone=True))
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, String, DateTime, JSON
+from sqlalchemy.sql import func
+from database import Base
+
+
+class AnalysisCacheEntry(Base):
+    __tablename__ = "analysis_cache"
+
+    key = Column(String(64), primary_key=True)
+    payload = Column(JSON, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
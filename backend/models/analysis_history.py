@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, JSON, Float
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, JSON, Float, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from database import Base
@@ -6,10 +6,19 @@ from database import Base
 
 class AnalysisHistory(Base):
     __tablename__ = "analysis_history"
+    __table_args__ = (
+        # Keyset pagination of a user's history, newest first. language, mode and
+        # confidence_score are included so the per-user stats recount is an
+        # index-only scan.
+        Index(
+            "ix_analysis_history_user_created_id", "user_id", "created_at", "id",
+            postgresql_include=["language", "mode", "confidence_score"],
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
-    project_id = Column(Integer, ForeignKey("projects.id", ondelete="SET NULL"), nullable=True)
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="SET NULL"), nullable=True, index=True)
     language = Column(String(50), nullable=False)
     mode = Column(String(50), nullable=False)
     code_snippet = Column(Text, nullable=False)
@@ -20,6 +29,9 @@ class AnalysisHistory(Base):
     optimized_code = Column(Text)
     explanation = Column(Text)
     confidence_score = Column(Float)
+    prompt_tokens = Column(Integer)
+    completion_tokens = Column(Integer)
+    routing = Column(JSON)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     user = relationship("User", backref="analyses")
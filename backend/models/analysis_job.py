@@ -0,0 +1,33 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, JSON, Index, Boolean
+from sqlalchemy.sql import func
+from database import Base
+
+
+class AnalysisJob(Base):
+    __tablename__ = "analysis_jobs"
+    __table_args__ = (
+        Index("ix_analysis_jobs_status_run_after", "status", "run_after"),
+    )
+
+    id = Column(String(32), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=True, index=True)
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="SET NULL"), nullable=True, index=True)
+    file_id = Column(Integer, ForeignKey("files.id", ondelete="SET NULL"), nullable=True, index=True)
+    file_name = Column(String(255))
+    language = Column(String(50), nullable=False)
+    mode = Column(String(50), nullable=False)
+    code = Column(Text, nullable=False)
+    instruction = Column(Text)
+    status = Column(String(20), nullable=False, default="queued")  # queued / running / succeeded / failed
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    run_after = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    locked_by = Column(String(100))
+    locked_at = Column(DateTime(timezone=True))
+    last_error = Column(Text)
+    result = Column(JSON)
+    analysis_id = Column(Integer, ForeignKey("analysis_history.id", ondelete="SET NULL"), nullable=True, index=True)
+    # Enrichment jobs update the fast-mode history row in analysis_id instead of adding one
+    enrichment = Column(Boolean, nullable=False, default=False, server_default="false")
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    finished_at = Column(DateTime(timezone=True))
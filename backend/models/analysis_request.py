@@ -9,3 +9,11 @@ class AnalysisRequest(BaseModel):
     instruction: str = ""
     project_id: Optional[int] = None
     file_id: Optional[int] = None
+    # None = split automatically when the file exceeds LARGE_FILE_LINE_THRESHOLD lines
+    chunked: Optional[bool] = None
+    # Re-analyze only what changed since the file's last analysis
+    incremental: bool = True
+    # Static analysis only, no LLM call; with enrich, the full analysis is
+    # queued as a job that later updates the same history row
+    fast: bool = False
+    enrich: bool = False
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from database import Base
@@ -6,6 +6,10 @@ from database import Base
 
 class File(Base):
     __tablename__ = "files"
+    __table_args__ = (
+        # A project's files in creation order; also serves project_id lookups
+        Index("ix_files_project_id_created_at", "project_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
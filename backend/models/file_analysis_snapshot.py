@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, JSON
+from sqlalchemy.sql import func
+from database import Base
+
+
+class FileAnalysisSnapshot(Base):
+    """The code and result of the last analysis of a project file, for incremental re-analysis."""
+    __tablename__ = "file_analysis_snapshots"
+
+    file_id = Column(Integer, ForeignKey("files.id", ondelete="CASCADE"), primary_key=True)
+    language = Column(String(50), nullable=False)
+    mode = Column(String(50), nullable=False)
+    instruction = Column(Text, nullable=False, default="")
+    code = Column(Text, nullable=False)
+    result = Column(JSON, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
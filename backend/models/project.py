@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Boolean, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from database import Base
@@ -6,6 +6,10 @@ from database import Base
 
 class Project(Base):
     __tablename__ = "projects"
+    __table_args__ = (
+        # A user's active projects, newest first, and their count
+        Index("ix_projects_user_id_is_active_created_at", "user_id", "is_active", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
@@ -14,6 +18,8 @@ class Project(Base):
     language = Column(String(50))
     repository_url = Column(String(500))
     is_active = Column(Boolean, default=True)
+    # Maintained by the file routes in the same transaction as the insert/delete
+    files_count = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
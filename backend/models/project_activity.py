@@ -1,5 +1,5 @@
 import enum
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum as SAEnum
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, Enum as SAEnum
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from database import Base
@@ -15,11 +15,15 @@ class ActionType(str, enum.Enum):
 
 class ProjectActivity(Base):
     __tablename__ = "project_activities"
+    __table_args__ = (
+        # A project's activity for its owner, newest first
+        Index("ix_project_activities_project_id_user_id_timestamp", "project_id", "user_id", "timestamp"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
-    file_id = Column(Integer, ForeignKey("files.id", ondelete="SET NULL"), nullable=True)
+    file_id = Column(Integer, ForeignKey("files.id", ondelete="SET NULL"), nullable=True, index=True)
     action_type = Column(SAEnum(ActionType), nullable=False)
     file_name = Column(String(255), nullable=False)
     timestamp = Column(DateTime(timezone=True), server_default=func.now())
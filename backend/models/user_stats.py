@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+from database import Base
+
+
+class UserStats(Base):
+    """Per-user totals shown on the profile, kept up to date by services.user_stats."""
+    __tablename__ = "user_stats"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    projects_count = Column(Integer, nullable=False, default=0, server_default="0")
+    analyses_count = Column(Integer, nullable=False, default=0, server_default="0")
+    # Sum of confidence_score over the analyses (unscored ones add 0); average = sum / analyses_count
+    confidence_sum = Column(Float, nullable=False, default=0, server_default="0")
+    # {"python": 12, "javascript": 3} / {"bug": 10, "security": 5}
+    languages = Column(JSONB, nullable=False, default=dict, server_default="{}")
+    modes = Column(JSONB, nullable=False, default=dict, server_default="{}")
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    reconciled_at = Column(DateTime(timezone=True))
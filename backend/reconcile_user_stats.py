@@ -0,0 +1,37 @@
+"""Recount the per-user profile totals in user_stats.
+
+The totals are updated incrementally as projects and analyses are written;
+run this to repair drift (or to fill in users created before the table
+existed), from the backend directory::
+
+    python reconcile_user_stats.py [--batch-size N]
+
+Safe to run while the API is serving and to interrupt and re-run.
+"""
+import argparse
+import asyncio
+import logging
+from dotenv import load_dotenv
+from services.user_stats import reconcile_user_stats
+from config.settings import USER_STATS_RECONCILE_BATCH_SIZE
+import models  # noqa: F401 — ensure all models are registered
+
+load_dotenv()
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+async def main(batch_size: int) -> None:
+    totals = await reconcile_user_stats(batch_size=batch_size)
+    logger.info(f"Reconciliation finished: {totals['drifted']} of {totals['scanned']} users corrected")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recount the per-user profile totals in user_stats.")
+    parser.add_argument("--batch-size", type=int, default=USER_STATS_RECONCILE_BATCH_SIZE)
+    args = parser.parse_args()
+    asyncio.run(main(args.batch_size))
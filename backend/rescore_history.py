@@ -0,0 +1,36 @@
+"""Recompute confidence_score across analysis_history.
+
+Run after changing the CONFIDENCE_* weights, from the backend directory::
+
+    python rescore_history.py [--batch-size N]
+
+Weights come from the environment / .env, like the API's. Safe to interrupt
+and re-run; rows that already have the right score are left alone.
+"""
+import argparse
+import asyncio
+import logging
+from dotenv import load_dotenv
+from services.history_rescore import rescore_history
+from config.settings import RESCORE_BATCH_SIZE
+import models  # noqa: F401 — ensure all models are registered
+
+load_dotenv()
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+async def main(batch_size: int) -> None:
+    totals = await rescore_history(batch_size=batch_size)
+    logger.info(f"Re-scoring finished: {totals['updated']} of {totals['scanned']} analyses changed")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recompute confidence_score across analysis_history.")
+    parser.add_argument("--batch-size", type=int, default=RESCORE_BATCH_SIZE)
+    args = parser.parse_args()
+    asyncio.run(main(args.batch_size))
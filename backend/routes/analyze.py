@@ -1,26 +1,129 @@
 from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
+import asyncio
+import json
 import logging
 from typing import Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from database import get_db
+from database import get_db, AsyncSessionLocal
 from models.analysis_request import AnalysisRequest
-from models.analysis_history import AnalysisHistory
-from models.project_activity import ProjectActivity, ActionType
 from models.project import Project
 from models.file import File
 from models.user import User
-from services.static_analyzer import run_static_analysis
-from services.groq_service import analyze_with_groq
-from services.aggregation_engine import aggregate_issues
-from services.confidence_engine import compute_confidence
-from utils.auth import get_current_user_optional
+from services.static_executor import run_static_analysis_async, executor_stats, StaticAnalysisBusy
+from services.groq_service import stream_analysis_with_groq, diff_output_stats
+from services.llm_backend import llm_stats
+from services.model_router import routing_stats
+from services.analysis_pipeline import (
+    run_analysis,
+    run_static_only,
+    build_result,
+    history_records,
+    should_chunk,
+    analyze_chunked,
+)
+from services.job_queue import enqueue_job
+from services.result_cache import cache_key_for, get_cached, put_cached, cache_stats
+from services.single_flight import inflight, single_flight_stats
+from services.user_stats import count_analyses
+from utils.auth import get_current_user_optional, require_metrics_access
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
 
+@router.get("/api/analyze/cache-stats", dependencies=[Depends(require_metrics_access)])
+async def analyze_cache_stats():
+    return {**cache_stats(), "single_flight": single_flight_stats()}
+
+
+@router.get("/api/analyze/static-stats", dependencies=[Depends(require_metrics_access)])
+async def analyze_static_stats():
+    return executor_stats()
+
+
+@router.get("/api/analyze/llm-stats", dependencies=[Depends(require_metrics_access)])
+async def analyze_llm_stats():
+    return {**llm_stats(), "routing": routing_stats(), "diff_output": diff_output_stats()}
+
+
+async def _resolve_code(
+    request: AnalysisRequest,
+    db: AsyncSession,
+    current_user: Optional[User],
+) -> tuple[str, Optional[str]]:
+    """Return (code, file_name), loading the file from the DB when project_id/file_id are given."""
+    if not (request.project_id and request.file_id and current_user):
+        return request.code, None
+
+    proj_result = await db.execute(
+        select(Project).where(
+            Project.id == request.project_id,
+            Project.user_id == current_user.id,
+        )
+    )
+    project = proj_result.scalar_one_or_none()
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    file_result = await db.execute(
+        select(File).where(
+            File.id == request.file_id,
+            File.project_id == request.project_id,
+        )
+    )
+    db_file = file_result.scalar_one_or_none()
+    if not db_file:
+        raise HTTPException(status_code=404, detail="File not found")
+    if not db_file.content:
+        raise HTTPException(status_code=422, detail="Selected file has no content to analyze")
+
+    return db_file.content, db_file.name
+
+
+async def _run_static(language: str, code: str) -> list:
+    try:
+        return await run_static_analysis_async(language, code)
+    except StaticAnalysisBusy:
+        raise _capacity_error()
+
+
+def _capacity_error() -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="Static analysis is at capacity. Please retry shortly.",
+        headers={"Retry-After": "5"},
+    )
+
+
+async def _save_analysis(
+    db: AsyncSession,
+    user_id: int,
+    request: AnalysisRequest,
+    code: str,
+    file_name: Optional[str],
+    result: dict,
+) -> int:
+    records = history_records(
+        user_id=user_id,
+        language=request.language,
+        mode=request.mode,
+        instruction=request.instruction,
+        code=code,
+        result=result,
+        project_id=request.project_id if file_name else None,
+        file_id=request.file_id,
+        file_name=file_name,
+    )
+    db.add_all(records)
+    await count_analyses(db, records)
+    await db.commit()
+    analysis_record = records[0]
+    await db.refresh(analysis_record)
+    return analysis_record.id
+
+
 @router.post("/api/analyze")
 async def analyze(
     request: AnalysisRequest,
@@ -28,96 +131,35 @@ async def analyze(
     current_user: Optional[User] = Depends(get_current_user_optional),
 ):
     try:
-        code = request.code
-        file_name = None
-
-        # If project_id and file_id provided, fetch file content from DB
-        if request.project_id and request.file_id and current_user:
-            proj_result = await db.execute(
-                select(Project).where(
-                    Project.id == request.project_id,
-                    Project.user_id == current_user.id,
-                )
-            )
-            project = proj_result.scalar_one_or_none()
-            if not project:
-                raise HTTPException(status_code=404, detail="Project not found")
-
-            file_result = await db.execute(
-                select(File).where(
-                    File.id == request.file_id,
-                    File.project_id == request.project_id,
-                )
-            )
-            db_file = file_result.scalar_one_or_none()
-            if not db_file:
-                raise HTTPException(status_code=404, detail="File not found")
-            if not db_file.content:
-                raise HTTPException(status_code=422, detail="Selected file has no content to analyze")
-
-            code = db_file.content
-            file_name = db_file.name
-
-        # 1. Run static analysis
-        static_issues = run_static_analysis(request.language, code)
-
-        # 2. Get AI analysis from Groq
-        groq_result = analyze_with_groq(
-            language=request.language,
-            mode=request.mode,
-            instruction=request.instruction,
-            code=code,
-            static_issues=static_issues,
-        )
-
-        # 3. Aggregate static + AI issues
-        aggregated = aggregate_issues(static_issues, groq_result["ai_issues"])
+        code, file_name = await _resolve_code(request, db, current_user)
+        if request.fast:
+            return await _analyze_fast(request, db, current_user, code, file_name)
 
-        # 4. Compute confidence score
-        confidence = compute_confidence(aggregated)
+        # 1-4. Static analysis, AI analysis, aggregation and scoring
+        # (identical submissions are served from the result cache)
+        try:
+            result, cached = await run_analysis(
+                request.language,
+                request.mode,
+                request.instruction,
+                code,
+                chunked=request.chunked,
+                file_id=request.file_id if file_name else None,
+                incremental=request.incremental,
+            )
+        except StaticAnalysisBusy:
+            raise _capacity_error()
 
         # 5. Save to database ONLY if user is logged in
         analysis_id = None
         if current_user:
-            analysis_record = AnalysisHistory(
-                user_id=current_user.id,
-                language=request.language,
-                mode=request.mode,
-                code_snippet=code[:10000],  # Limit to 10k chars
-                instruction=request.instruction,
-                static_issues=static_issues,
-                ai_suggestions=groq_result["ai_issues"],
-                aggregated_issues=aggregated,
-                optimized_code=groq_result["optimized_code"],
-                explanation=groq_result.get("explanation", ""),
-                confidence_score=confidence,
-            )
-            db.add(analysis_record)
-
-            # Log ANALYZE_FILE activity when analyzing a project file
-            if request.project_id and request.file_id and file_name:
-                activity = ProjectActivity(
-                    user_id=current_user.id,
-                    project_id=request.project_id,
-                    file_id=request.file_id,
-                    action_type=ActionType.ANALYZE_FILE,
-                    file_name=file_name,
-                )
-                db.add(activity)
-
-            await db.commit()
-            await db.refresh(analysis_record)
-            analysis_id = analysis_record.id
+            analysis_id = await _save_analysis(db, current_user.id, request, code, file_name, result)
 
         return {
-            "static_issues": static_issues,
-            "ai_suggestions": groq_result["ai_issues"],
-            "aggregated_issues": aggregated,
-            "optimized_code": groq_result["optimized_code"],
-            "explanation": groq_result.get("explanation", ""),
-            "confidence_score": confidence,
+            **result,
             "analysis_id": analysis_id,
             "saved": current_user is not None,
+            "cached": cached,
         }
     except HTTPException:
         raise
@@ -131,3 +173,154 @@ async def analyze(
             "explanation": f"Server error: {str(e)}",
             "confidence_score": 0,
         })
+
+
+async def _analyze_fast(
+    request: AnalysisRequest,
+    db: AsyncSession,
+    current_user: Optional[User],
+    code: str,
+    file_name: Optional[str],
+) -> dict:
+    """Static-only analysis for latency-sensitive callers such as editor save hooks.
+
+    With request.enrich, the full LLM analysis is queued as a durable job
+    that updates the same history row when it finishes.
+    """
+    try:
+        result, cached = await run_static_only(request.language, code)
+    except StaticAnalysisBusy:
+        raise _capacity_error()
+
+    analysis_id = None
+    if current_user:
+        analysis_id = await _save_analysis(db, current_user.id, request, code, file_name, result)
+
+    enrichment = None
+    if request.enrich:
+        job = await enqueue_job(
+            db,
+            language=request.language,
+            mode=request.mode,
+            instruction=request.instruction,
+            code=code,
+            user_id=current_user.id if current_user else None,
+            project_id=request.project_id if file_name else None,
+            file_id=request.file_id if file_name else None,
+            file_name=file_name,
+            analysis_id=analysis_id,
+            enrichment=True,
+        )
+        enrichment = {"job_id": job.id, "status_url": f"/api/analyze/jobs/{job.id}"}
+
+    return {
+        **result,
+        "analysis_id": analysis_id,
+        "saved": current_user is not None,
+        "cached": cached,
+        "fast": True,
+        "enrichment": enrichment,
+    }
+
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.post("/api/analyze/stream")
+async def analyze_stream(
+    request: AnalysisRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: Optional[User] = Depends(get_current_user_optional),
+):
+    """Server-sent events variant of /api/analyze.
+
+    Events, in order: "static_issues", one "ai_issue" per issue as the model
+    produces it, "optimized_code", and "result" carrying the same payload as
+    /api/analyze. Failures after the stream has started arrive as "error".
+    Chunked large-file analyses emit their issues once all chunks finish.
+    """
+    code, file_name = await _resolve_code(request, db, current_user)
+    user_id = current_user.id if current_user else None
+    use_chunks = should_chunk(code, request.chunked)
+    cache_key = await cache_key_for(
+        code, request.language, request.mode, request.instruction, variant="chunked" if use_chunks else ""
+    )
+    static_issues = None
+    cached = await get_cached(cache_key)
+    running = inflight(cache_key) if cached is None else None
+    if running is not None:
+        # An identical analysis is already running here; replay its result when done
+        try:
+            shared_result, failed, _ = await asyncio.shield(running)
+            if not failed:
+                cached = shared_result
+        except Exception:
+            pass
+    if cached is None:
+        # Run before the response starts so capacity errors are still a real 503
+        static_issues = await _run_static(request.language, code)
+
+    async def events():
+        try:
+            if cached is not None:
+                result = cached
+                yield _sse("static_issues", result["static_issues"])
+                for issue in result["ai_suggestions"]:
+                    yield _sse("ai_issue", issue)
+            else:
+                yield _sse("static_issues", static_issues)
+                groq_result = None
+                optimized_sent = False
+                if use_chunks:
+                    groq_result = await analyze_chunked(
+                        request.language, request.mode, request.instruction, code, static_issues
+                    )
+                    for issue in groq_result["ai_issues"]:
+                        yield _sse("ai_issue", issue)
+                else:
+                    async for kind, payload in stream_analysis_with_groq(
+                        language=request.language,
+                        mode=request.mode,
+                        instruction=request.instruction,
+                        code=code,
+                        static_issues=static_issues,
+                    ):
+                        if kind == "ai_issue":
+                            yield _sse("ai_issue", payload)
+                        elif kind == "field":
+                            key, value = payload
+                            if key == "optimized_code" and isinstance(value, str):
+                                yield _sse("optimized_code", value)
+                                optimized_sent = True
+                        else:
+                            groq_result = payload
+                result = build_result(static_issues, groq_result)
+                if not groq_result.get("failed") and not (groq_result.get("routing") or {}).get("load_shed"):
+                    await put_cached(cache_key, result)
+
+            # A truncated stream is re-run on the fallback route, which replaces what was sent
+            if cached is not None or not optimized_sent or (result.get("routing") or {}).get("escalated_from"):
+                yield _sse("optimized_code", result["optimized_code"])
+
+            analysis_id = None
+            if user_id is not None:
+                # The request-scoped session may already be closed while streaming
+                async with AsyncSessionLocal() as session:
+                    analysis_id = await _save_analysis(session, user_id, request, code, file_name, result)
+
+            yield _sse("result", {
+                **result,
+                "analysis_id": analysis_id,
+                "saved": user_id is not None,
+                "cached": cached is not None,
+            })
+        except Exception as e:
+            logger.error(f"Streaming analysis error: {e}", exc_info=True)
+            yield _sse("error", {"detail": f"Server error: {str(e)}"})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,15 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
 from datetime import timedelta
 from database import get_db
 from models.user import User
+from models.user_stats import UserStats
 from utils.auth import (
     verify_password,
     get_password_hash,
     create_access_token,
     get_current_active_user,
+    user_by_username_query,
+    user_by_email_query,
 )
 from config.settings import ACCESS_TOKEN_EXPIRE_MINUTES
 from pydantic import BaseModel, EmailStr, field_validator
@@ -53,11 +55,11 @@ class Token(BaseModel):
 @router.post("/signup", response_model=Token, status_code=status.HTTP_201_CREATED)
 async def signup(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
     # Check if user exists
-    result = await db.execute(select(User).where(User.username == user_data.username))
+    result = await db.execute(user_by_username_query(user_data.username))
     if result.scalar_one_or_none():
         raise HTTPException(status_code=400, detail="Username already registered")
 
-    result = await db.execute(select(User).where(User.email == user_data.email))
+    result = await db.execute(user_by_email_query(user_data.email))
     if result.scalar_one_or_none():
         raise HTTPException(status_code=400, detail="Email already registered")
 
@@ -70,6 +72,9 @@ async def signup(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
         full_name=user_data.full_name,
     )
     db.add(new_user)
+    await db.flush()
+    # Start the profile totals at zero so later writes only need to increment them
+    db.add(UserStats(user_id=new_user.id))
     await db.commit()
     await db.refresh(new_user)
 
@@ -91,7 +96,7 @@ async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: AsyncSession = Depends(get_db),
 ):
-    result = await db.execute(select(User).where(User.username == form_data.username))
+    result = await db.execute(user_by_username_query(form_data.username))
     user = result.scalar_one_or_none()
 
     if not user or not verify_password(form_data.password, user.hashed_password):
@@ -0,0 +1,91 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from database import get_db
+from models.analysis_batch import AnalysisBatch
+from models.file import File
+from models.user import User
+from routes.files import _get_owned_project
+from services.batch_jobs import (
+    start_batch_job,
+    get_batch_job,
+    cancel_batch_job,
+    batch_to_dict,
+    batch_to_dict_with_results,
+)
+from utils.auth import get_current_active_user
+from pydantic import BaseModel
+from typing import Optional
+
+router = APIRouter(prefix="/api/projects", tags=["batch"])
+
+
+class BatchAnalysisRequest(BaseModel):
+    mode: str
+    instruction: str = ""
+    concurrency: Optional[int] = None
+
+
+def batch_files_query(project_id: int):
+    return (
+        select(File.id, File.name, File.language, File.content)
+        .where(File.project_id == project_id)
+        .order_by(File.created_at.asc())
+    )
+
+
+async def _get_owned_job(project_id: int, job_id: str, current_user: User, db: AsyncSession) -> AnalysisBatch:
+    job = await get_batch_job(db, job_id, current_user.id, project_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Batch job not found")
+    return job
+
+
+@router.post("/{project_id}/analyze-batch", status_code=202)
+async def create_batch_analysis(
+    project_id: int,
+    batch_data: BatchAnalysisRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    await _get_owned_project(project_id, current_user, db)
+    result = await db.execute(batch_files_query(project_id))
+    files = [row._asdict() for row in result.all()]
+    if not files:
+        raise HTTPException(status_code=422, detail="Project has no files to analyze")
+
+    return await start_batch_job(
+        db,
+        user_id=current_user.id,
+        project_id=project_id,
+        mode=batch_data.mode,
+        instruction=batch_data.instruction,
+        files=files,
+        concurrency=batch_data.concurrency,
+    )
+
+
+@router.get("/{project_id}/analyze-batch/{job_id}")
+async def get_batch_analysis(
+    project_id: int,
+    job_id: str,
+    include_results: bool = True,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    job = await _get_owned_job(project_id, job_id, current_user, db)
+    if include_results:
+        return await batch_to_dict_with_results(db, job)
+    return batch_to_dict(job, include_results=False)
+
+
+@router.delete("/{project_id}/analyze-batch/{job_id}")
+async def cancel_batch_analysis(
+    project_id: int,
+    job_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    job = await _get_owned_job(project_id, job_id, current_user, db)
+    await cancel_batch_job(db, job)
+    return batch_to_dict(job, include_results=False)
@@ -5,12 +5,13 @@ import zipfile
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File as FastAPIFile
 from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update
 from database import get_db
 from models.project import Project
 from models.file import File
 from models.user import User
 from models.project_activity import ProjectActivity, ActionType
+from routes.projects import owned_project_query
 from utils.auth import get_current_active_user
 from pydantic import BaseModel
 from typing import List,Optional
@@ -55,19 +56,40 @@ class FileResponse(BaseModel):
         from_attributes = True
 
 
-async def _get_owned_project(project_id: int, current_user: User, db: AsyncSession) -> Project:
-    result = await db.execute(
-        select(Project).where(
-            Project.id == project_id,
-            Project.user_id == current_user.id,
-        )
+def project_files_query(project_id: int):
+    return select(File).where(File.project_id == project_id).order_by(File.created_at.asc())
+
+
+def file_in_project_query(file_id: int, project_id: int):
+    return select(File).where(File.id == file_id, File.project_id == project_id)
+
+
+def project_activity_query(project_id: int, user_id: int):
+    return (
+        select(ProjectActivity)
+        .where(ProjectActivity.project_id == project_id, ProjectActivity.user_id == user_id)
+        .order_by(ProjectActivity.timestamp.desc())
     )
+
+
+async def _get_owned_project(project_id: int, current_user: User, db: AsyncSession) -> Project:
+    result = await db.execute(owned_project_query(project_id, current_user.id))
     project = result.scalar_one_or_none()
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     return project
 
 
+async def _adjust_files_count(db: AsyncSession, project_id: int, delta: int) -> None:
+    """Keep projects.files_count in step with the files table, in the caller's transaction."""
+    await db.execute(
+        update(Project)
+        .where(Project.id == project_id)
+        .values(files_count=Project.files_count + delta)
+        .execution_options(synchronize_session=False)
+    )
+
+
 async def _log_activity(
     db: AsyncSession,
     user_id: int,
@@ -93,14 +115,7 @@ async def get_project_history(
     current_user: User = Depends(get_current_active_user),
 ):
     await _get_owned_project(project_id, current_user, db)
-    result = await db.execute(
-        select(ProjectActivity)
-        .where(
-            ProjectActivity.project_id == project_id,
-            ProjectActivity.user_id == current_user.id,
-        )
-        .order_by(ProjectActivity.timestamp.desc())
-    )
+    result = await db.execute(project_activity_query(project_id, current_user.id))
     activities = result.scalars().all()
     return {
         "success": True,
@@ -123,9 +138,7 @@ async def list_files(
     current_user: User = Depends(get_current_active_user),
 ):
     await _get_owned_project(project_id, current_user, db)
-    result = await db.execute(
-        select(File).where(File.project_id == project_id).order_by(File.created_at.asc())
-    )
+    result = await db.execute(project_files_query(project_id))
     return result.scalars().all()
 
 
@@ -146,6 +159,7 @@ async def create_file(
     )
     db.add(new_file)
     await db.flush()
+    await _adjust_files_count(db, project_id, 1)
     await _log_activity(db, current_user.id, project_id, ActionType.CREATE_FILE, new_file.name, new_file.id)
     await db.commit()
     await db.refresh(new_file)
@@ -184,6 +198,7 @@ async def upload_file(
     )
     db.add(new_file)
     await db.flush()
+    await _adjust_files_count(db, project_id, 1)
     await _log_activity(db, current_user.id, project_id, ActionType.UPLOAD_FILE, new_file.name, new_file.id)
     await db.commit()
     await db.refresh(new_file)
@@ -199,9 +214,7 @@ async def save_file(
     current_user: User = Depends(get_current_active_user),
 ):
     await _get_owned_project(project_id, current_user, db)
-    result = await db.execute(
-        select(File).where(File.id == file_id, File.project_id == project_id)
-    )
+    result = await db.execute(file_in_project_query(file_id, project_id))
     db_file = result.scalar_one_or_none()
     if not db_file:
         raise HTTPException(status_code=404, detail="File not found")
@@ -225,13 +238,12 @@ async def delete_file(
     current_user: User = Depends(get_current_active_user),
 ):
     await _get_owned_project(project_id, current_user, db)
-    result = await db.execute(
-        select(File).where(File.id == file_id, File.project_id == project_id)
-    )
+    result = await db.execute(file_in_project_query(file_id, project_id))
     db_file = result.scalar_one_or_none()
     if not db_file:
         raise HTTPException(status_code=404, detail="File not found")
     await db.delete(db_file)
+    await _adjust_files_count(db, project_id, -1)
     await db.commit()
 
 
@@ -243,9 +255,7 @@ async def download_file(
     current_user: User = Depends(get_current_active_user),
 ):
     await _get_owned_project(project_id, current_user, db)
-    result = await db.execute(
-        select(File).where(File.id == file_id, File.project_id == project_id)
-    )
+    result = await db.execute(file_in_project_query(file_id, project_id))
     db_file = result.scalar_one_or_none()
     if not db_file:
         raise HTTPException(status_code=404, detail="File not found")
@@ -265,9 +275,7 @@ async def export_zip(
     current_user: User = Depends(get_current_active_user),
 ):
     project = await _get_owned_project(project_id, current_user, db)
-    result = await db.execute(
-        select(File).where(File.project_id == project_id).order_by(File.created_at.asc())
-    )
+    result = await db.execute(project_files_query(project_id))
     files = result.scalars().all()
 
     zip_buffer = io.BytesIO()
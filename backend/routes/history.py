@@ -1,16 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException
+import base64
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, func, tuple_
 from database import get_db
 from models.analysis_history import AnalysisHistory
 from models.user import User
 from utils.auth import get_current_active_user
+from config.settings import HISTORY_PAGE_SIZE, HISTORY_MAX_PAGE_SIZE
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime
 
 router = APIRouter(prefix="/api/history", tags=["history"])
 
+# Characters of code_snippet returned with each summary, for the list title/preview
+PREVIEW_CHARS = 200
+
 
 class AnalysisHistoryResponse(BaseModel):
     id: int
@@ -21,23 +26,125 @@ class AnalysisHistoryResponse(BaseModel):
     optimized_code: Optional[str]
     explanation: Optional[str]
     confidence_score: Optional[float]
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    routing: Optional[dict] = None
     created_at: Optional[datetime]
 
     class Config:
         from_attributes = True
 
 
-@router.get("/", response_model=List[AnalysisHistoryResponse])
+class AnalysisHistorySummary(BaseModel):
+    id: int
+    project_id: Optional[int] = None
+    language: str
+    mode: str
+    code_preview: str
+    confidence_score: Optional[float]
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    created_at: Optional[datetime]
+
+    class Config:
+        from_attributes = True
+
+
+class AnalysisHistoryPage(BaseModel):
+    items: List[AnalysisHistorySummary]
+    # Pass back as ?cursor= for the next (older) page; null on the last page
+    next_cursor: Optional[str] = None
+
+
+def _encode_cursor(created_at: datetime, analysis_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{analysis_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        created_at, analysis_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(analysis_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def history_page_query(
+    user_id: int,
+    limit: int,
+    cursor: Optional[tuple] = None,
+    language: Optional[str] = None,
+    mode: Optional[str] = None,
+    search: Optional[str] = None,
+):
+    """SELECT of one summary page (limit + 1 rows, to tell whether another follows).
+
+    *cursor* is a decoded (created_at, id). language matches exactly, ignoring
+    case; mode and search match a substring of the mode and of the code, so
+    ?mode=bug finds "Bug Detection". The filters leave the ordering alone, so
+    the same cursors page through filtered results.
+    """
+    # Only the summary columns are selected; code, results and explanations stay in the table
+    query = (
+        select(
+            AnalysisHistory.id,
+            AnalysisHistory.project_id,
+            AnalysisHistory.language,
+            AnalysisHistory.mode,
+            func.substr(AnalysisHistory.code_snippet, 1, PREVIEW_CHARS).label("code_preview"),
+            AnalysisHistory.confidence_score,
+            AnalysisHistory.prompt_tokens,
+            AnalysisHistory.completion_tokens,
+            AnalysisHistory.created_at,
+        )
+        .where(AnalysisHistory.user_id == user_id)
+        .order_by(AnalysisHistory.created_at.desc(), AnalysisHistory.id.desc())
+        .limit(limit + 1)
+    )
+    if cursor:
+        query = query.where(tuple_(AnalysisHistory.created_at, AnalysisHistory.id) < tuple_(*cursor))
+    if language:
+        query = query.where(func.lower(AnalysisHistory.language) == language.lower())
+    if mode:
+        query = query.where(AnalysisHistory.mode.icontains(mode, autoescape=True))
+    if search:
+        query = query.where(AnalysisHistory.code_snippet.icontains(search, autoescape=True))
+    return query
+
+
+def history_item_query(analysis_id: int, user_id: int):
+    return select(AnalysisHistory).where(AnalysisHistory.id == analysis_id, AnalysisHistory.user_id == user_id)
+
+
+@router.get("/", response_model=AnalysisHistoryPage)
 async def get_history(
+    cursor: Optional[str] = None,
+    limit: int = Query(HISTORY_PAGE_SIZE, ge=1, le=HISTORY_MAX_PAGE_SIZE),
+    language: Optional[str] = None,
+    mode: Optional[str] = None,
+    search: Optional[str] = None,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
 ):
-    result = await db.execute(
-        select(AnalysisHistory)
-        .where(AnalysisHistory.user_id == current_user.id)
-        .order_by(AnalysisHistory.created_at.desc())
+    """One page of the user's analyses, newest first, without the large columns.
+
+    Pages are keyset-paginated on (created_at, id), so each costs the same
+    however deep it is and rows added meanwhile do not shift later pages.
+    Pass the same filters with each cursor.
+    """
+    query = history_page_query(
+        current_user.id, limit,
+        cursor=_decode_cursor(cursor) if cursor else None,
+        language=language, mode=mode, search=search,
     )
-    return result.scalars().all()
+    rows = (await db.execute(query)).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_cursor(rows[-1].created_at, rows[-1].id)
+    return {"items": rows, "next_cursor": next_cursor}
 
 
 @router.get("/{analysis_id}", response_model=AnalysisHistoryResponse)
@@ -46,13 +153,7 @@ async def get_analysis(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
 ):
-    from fastapi import HTTPException
-    result = await db.execute(
-        select(AnalysisHistory).where(
-            AnalysisHistory.id == analysis_id,
-            AnalysisHistory.user_id == current_user.id,
-        )
-    )
+    result = await db.execute(history_item_query(analysis_id, current_user.id))
     analysis = result.scalar_one_or_none()
     if not analysis:
         raise HTTPException(status_code=404, detail="Analysis not found")
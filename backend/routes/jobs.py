@@ -0,0 +1,66 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from database import get_db
+from models.analysis_request import AnalysisRequest
+from models.analysis_job import AnalysisJob
+from models.user import User
+from routes.analyze import _resolve_code
+from services.job_queue import enqueue_job, SUCCEEDED
+from utils.auth import get_current_user_optional
+
+router = APIRouter(prefix="/api/analyze/jobs", tags=["jobs"])
+
+
+def _job_response(job: AnalysisJob) -> dict:
+    response = {
+        "job_id": job.id,
+        "status": job.status,
+        "attempts": job.attempts,
+        "max_attempts": job.max_attempts,
+        "created_at": job.created_at,
+        "finished_at": job.finished_at,
+        "error": job.last_error,
+        "status_url": f"/api/analyze/jobs/{job.id}",
+    }
+    if job.status == SUCCEEDED:
+        response["result"] = {
+            **job.result,
+            "analysis_id": job.analysis_id,
+            "saved": job.user_id is not None,
+        }
+    return response
+
+
+@router.post("", status_code=202)
+async def submit_analysis_job(
+    request: AnalysisRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: Optional[User] = Depends(get_current_user_optional),
+):
+    code, file_name = await _resolve_code(request, db, current_user)
+    job = await enqueue_job(
+        db,
+        language=request.language,
+        mode=request.mode,
+        instruction=request.instruction,
+        code=code,
+        user_id=current_user.id if current_user else None,
+        project_id=request.project_id if file_name else None,
+        file_id=request.file_id if file_name else None,
+        file_name=file_name,
+    )
+    return _job_response(job)
+
+
+@router.get("/{job_id}")
+async def get_analysis_job(
+    job_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: Optional[User] = Depends(get_current_user_optional),
+):
+    job = await db.get(AnalysisJob, job_id)
+    # Jobs submitted while logged in are only visible to their owner
+    if not job or (job.user_id is not None and (current_user is None or current_user.id != job.user_id)):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _job_response(job)
@@ -0,0 +1,11 @@
+from fastapi import APIRouter, Depends
+from database.metrics import db_stats
+from utils.auth import require_metrics_access
+
+router = APIRouter(prefix="/api/metrics", tags=["metrics"], dependencies=[Depends(require_metrics_access)])
+
+
+@router.get("/db")
+async def database_metrics():
+    """Query counts, DB time, slow queries and pool gauges, overall and per endpoint."""
+    return db_stats()
@@ -1,13 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
 from database import get_db
 from models.user import User
-from models.project import Project
-from models.analysis_history import AnalysisHistory
+from services.user_stats import get_user_stats
 from utils.auth import get_current_active_user, get_password_hash, verify_password
 from pydantic import BaseModel, EmailStr
-from typing import Optional
+from typing import Dict, Optional
 from datetime import datetime
 
 router = APIRouter(prefix="/api/profile", tags=["profile"])
@@ -33,24 +31,17 @@ class ProfileResponse(BaseModel):
     created_at: Optional[datetime]
     projects_count: int = 0
     total_analyses: int = 0
+    # Mean confidence_score over all the user's analyses, unscored ones counting as 0
+    average_confidence: float = 0
+    analyses_by_language: Dict[str, int] = {}
+    analyses_by_mode: Dict[str, int] = {}
 
     class Config:
         from_attributes = True
 
 
 async def _build_profile_response(user: User, db: AsyncSession) -> dict:
-    projects_result = await db.execute(
-        select(func.count()).where(
-            Project.user_id == user.id, Project.is_active == True
-        )
-    )
-    projects_count = projects_result.scalar() or 0
-
-    analyses_result = await db.execute(
-        select(func.count()).where(AnalysisHistory.user_id == user.id)
-    )
-    total_analyses = analyses_result.scalar() or 0
-
+    stats = await get_user_stats(db, user.id)
     return {
         "id": user.id,
         "username": user.username,
@@ -59,8 +50,13 @@ async def _build_profile_response(user: User, db: AsyncSession) -> dict:
         "is_active": user.is_active,
         "is_verified": user.is_verified,
         "created_at": user.created_at,
-        "projects_count": projects_count,
-        "total_analyses": total_analyses,
+        "projects_count": stats["projects_count"],
+        "total_analyses": stats["analyses_count"],
+        "average_confidence": (
+            stats["confidence_sum"] / stats["analyses_count"] if stats["analyses_count"] else 0
+        ),
+        "analyses_by_language": stats["languages"],
+        "analyses_by_mode": stats["modes"],
     }
 
 
@@ -1,10 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select
 from database import get_db
 from models.project import Project
-from models.file import File
 from models.user import User
+from services.user_stats import count_project
 from utils.auth import get_current_active_user
 from pydantic import BaseModel
 from typing import List, Optional
@@ -34,11 +34,7 @@ class ProjectResponse(BaseModel):
         from_attributes = True
 
 
-async def _project_response(project: Project, db: AsyncSession) -> dict:
-    count_result = await db.execute(
-        select(func.count()).where(File.project_id == project.id)
-    )
-    files_count = count_result.scalar() or 0
+def _project_response(project: Project) -> dict:
     return {
         "id": project.id,
         "name": project.name,
@@ -47,22 +43,30 @@ async def _project_response(project: Project, db: AsyncSession) -> dict:
         "repository_url": project.repository_url,
         "is_active": project.is_active,
         "created_at": project.created_at,
-        "files_count": files_count,
+        "files_count": project.files_count or 0,
     }
 
 
+def projects_query(user_id: int):
+    return (
+        select(Project)
+        .where(Project.user_id == user_id, Project.is_active == True)
+        .order_by(Project.created_at.desc())
+    )
+
+
+def owned_project_query(project_id: int, user_id: int):
+    return select(Project).where(Project.id == project_id, Project.user_id == user_id)
+
+
 @router.get("/", response_model=List[ProjectResponse])
 async def list_projects(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
 ):
-    result = await db.execute(
-        select(Project)
-        .where(Project.user_id == current_user.id, Project.is_active == True)
-        .order_by(Project.created_at.desc())
-    )
+    result = await db.execute(projects_query(current_user.id))
     projects = result.scalars().all()
-    return [await _project_response(p, db) for p in projects]
+    return [_project_response(p) for p in projects]
 
 
 @router.post("/", response_model=ProjectResponse, status_code=201)
@@ -73,9 +77,10 @@ async def create_project(
 ):
     project = Project(user_id=current_user.id, **project_data.model_dump())
     db.add(project)
+    await count_project(db, current_user.id, 1)
     await db.commit()
     await db.refresh(project)
-    return await _project_response(project, db)
+    return _project_response(project)
 
 
 @router.get("/{project_id}", response_model=ProjectResponse)
@@ -84,16 +89,11 @@ async def get_project(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
 ):
-    result = await db.execute(
-        select(Project).where(
-            Project.id == project_id,
-            Project.user_id == current_user.id,
-        )
-    )
+    result = await db.execute(owned_project_query(project_id, current_user.id))
     project = result.scalar_one_or_none()
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
-    return await _project_response(project, db)
+    return _project_response(project)
 
 
 @router.put("/{project_id}", response_model=ProjectResponse)
@@ -103,12 +103,7 @@ async def update_project(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
 ):
-    result = await db.execute(
-        select(Project).where(
-            Project.id == project_id,
-            Project.user_id == current_user.id,
-        )
-    )
+    result = await db.execute(owned_project_query(project_id, current_user.id))
     project = result.scalar_one_or_none()
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
@@ -117,7 +112,7 @@ async def update_project(
         setattr(project, key, value)
     await db.commit()
     await db.refresh(project)
-    return await _project_response(project, db)
+    return _project_response(project)
 
 
 @router.delete("/{project_id}", status_code=204)
@@ -126,15 +121,13 @@ async def delete_project(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
 ):
-    result = await db.execute(
-        select(Project).where(
-            Project.id == project_id,
-            Project.user_id == current_user.id,
-        )
-    )
+    result = await db.execute(owned_project_query(project_id, current_user.id))
     project = result.scalar_one_or_none()
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
 
+    # Deleting an already deleted project must not count it twice
+    if project.is_active:
+        await count_project(db, current_user.id, -1)
     project.is_active = False
     await db.commit()
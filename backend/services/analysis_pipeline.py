@@ -0,0 +1,383 @@
+import asyncio
+from typing import Optional
+from models.analysis_history import AnalysisHistory
+from models.project_activity import ProjectActivity, ActionType
+from services.static_executor import run_static_analysis_async
+from services.groq_service import analyze_with_groq_async
+from services.aggregation_engine import aggregate_issues, _line_of
+from services.confidence_engine import compute_confidence
+from services.result_cache import cache_key_for, get_cached, put_cached
+from services.code_chunker import split_code
+from services.single_flight import single_flight
+from services.model_router import merge_routing
+from services.incremental_analysis import (
+    plan_edit,
+    carry_forward,
+    rebase_edits,
+    stitch_code,
+    load_snapshot,
+    save_snapshot,
+)
+from config.settings import LARGE_FILE_LINE_THRESHOLD, CHUNK_MAX_LINES
+
+
+class LLMAnalysisFailed(Exception):
+    """The LLM call failed and only a fallback result is available."""
+
+
+def build_result(static_issues: list, groq_result: dict) -> dict:
+    """Aggregate static + AI issues and score them into the /api/analyze payload."""
+    aggregated = aggregate_issues(static_issues, groq_result["ai_issues"])
+    confidence = compute_confidence(aggregated)
+    return {
+        "static_issues": static_issues,
+        "ai_suggestions": groq_result["ai_issues"],
+        "aggregated_issues": aggregated,
+        "optimized_code": groq_result["optimized_code"],
+        "explanation": groq_result.get("explanation", ""),
+        "confidence_score": confidence,
+        "token_usage": groq_result.get("token_usage"),
+        "routing": groq_result.get("routing"),
+    }
+
+
+def merge_token_usage(usages: list) -> dict:
+    """Sum the token_usage of several LLM calls that make up one analysis."""
+    usages = [usage for usage in usages if usage]
+    return {
+        "prompt_tokens": sum(usage["prompt_tokens"] for usage in usages),
+        "completion_tokens": sum(usage["completion_tokens"] for usage in usages),
+        "measured": all(usage["measured"] for usage in usages),
+        "calls": len(usages),
+    }
+
+
+def should_chunk(code: str, chunked: Optional[bool] = None) -> bool:
+    """Whether *code* goes through the chunked large-file path.
+
+    None means automatic: files longer than LARGE_FILE_LINE_THRESHOLD lines.
+    """
+    if chunked is None:
+        return code.count("\n") + 1 > LARGE_FILE_LINE_THRESHOLD
+    return chunked
+
+
+async def _analyze_chunk(language: str, mode: str, instruction: str, chunk: dict, static_issues: list) -> dict:
+    """Run the LLM on one chunk and map its issue lines back to file coordinates."""
+    start, end = chunk["start_line"], chunk["end_line"]
+    offset = start - 1
+    # Give the model the static findings for its excerpt, in excerpt coordinates
+    local_static = [
+        {**issue, "line": issue["line"] - offset}
+        for issue in static_issues
+        if start <= issue.get("line", 0) <= end
+    ]
+    note = (
+        f"This is an excerpt of a larger file (lines {start}-{end}). "
+        f"Report line numbers relative to the excerpt, starting at 1, and return "
+        f"only the excerpt as optimized_code."
+    )
+    groq_result = await analyze_with_groq_async(
+        language=language,
+        mode=mode,
+        instruction=f"{instruction}\n\n{note}" if instruction else note,
+        code=chunk["code"],
+        static_issues=local_static,
+    )
+    for issue in groq_result["ai_issues"]:
+        line = issue.get("line", 0)
+        if isinstance(line, int) and line > 0:
+            issue["line"] = min(line, end - offset) + offset
+    return groq_result
+
+
+async def analyze_chunked(language: str, mode: str, instruction: str, code: str, static_issues: list) -> dict:
+    """Analyze *code* as concurrent per-chunk LLM calls and merge them into one groq-style result."""
+    chunks = split_code(language, code, CHUNK_MAX_LINES)
+    results = await asyncio.gather(*(
+        _analyze_chunk(language, mode, instruction, chunk, static_issues) for chunk in chunks
+    ))
+
+    ai_issues = []
+    optimized_parts = []
+    explanations = []
+    failed = False
+    for chunk, groq_result in zip(chunks, results):
+        ai_issues.extend(groq_result["ai_issues"])
+        if groq_result.get("failed"):
+            # Keep the original code for chunks the model could not handle
+            failed = True
+            optimized_parts.append(chunk["code"])
+        else:
+            optimized_parts.append(groq_result["optimized_code"])
+        explanation = groq_result.get("explanation", "")
+        if explanation:
+            explanations.append(f"Lines {chunk['start_line']}-{chunk['end_line']}: {explanation}")
+
+    merged = {
+        "ai_issues": ai_issues,
+        "optimized_code": "\n".join(optimized_parts),
+        "explanation": "\n\n".join(explanations),
+        "token_usage": merge_token_usage([groq_result.get("token_usage") for groq_result in results]),
+        "routing": merge_routing([groq_result.get("routing") for groq_result in results]),
+    }
+    if failed:
+        merged["failed"] = True
+    return merged
+
+
+def _issue_key(issue: dict) -> tuple:
+    """(line, message) identifying an issue across analyses, hashable whatever the model sent."""
+    return _line_of(issue), str(issue.get("message", ""))
+
+
+async def analyze_incremental(
+    language: str,
+    mode: str,
+    instruction: str,
+    code: str,
+    previous_code: str,
+    previous_result: dict,
+) -> Optional[dict]:
+    """Re-analyze only what changed since *previous_code* was analyzed.
+
+    Static analysis is cheap and not local (an edit can add or clear findings
+    elsewhere in the file), so it runs on the whole file, as in chunked mode.
+    Only the changed regions go to the LLM; its issues outside them are carried
+    over from *previous_result* with their lines shifted and "reused" set, and
+    the previous optimized code is rebased onto the edit around the regions'
+    new optimized code. Returns None when the edit is too large to be worth it.
+    """
+    plan = plan_edit(language, previous_code, code)
+    if plan is None:
+        return None
+
+    static_issues = await run_static_analysis_async(language, code)
+    results = await asyncio.gather(*(
+        _analyze_chunk(
+            language,
+            mode,
+            instruction,
+            {"start_line": start, "end_line": end, "code": "\n".join(code.splitlines()[start - 1:end])},
+            static_issues,
+        )
+        for start, end in plan.regions
+    ))
+
+    # A finding is reused when the previous analysis reported it at the shifted line
+    previous_static = {
+        _issue_key(issue) for issue in carry_forward(previous_result.get("static_issues") or [], plan)
+    }
+    static_issues = [{**issue, "reused": _issue_key(issue) in previous_static} for issue in static_issues]
+    ai_issues = carry_forward(previous_result.get("ai_suggestions") or [], plan)
+    replacements = []
+    previous_optimized = previous_result.get("optimized_code")
+    if previous_optimized and not previous_result.get("failed"):
+        replacements = rebase_edits(previous_code, previous_optimized, plan)
+    explanations = []
+    failed = False
+    for region, groq_result in zip(plan.regions, results):
+        ai_issues.extend({**issue, "reused": False} for issue in groq_result["ai_issues"])
+        if groq_result.get("failed"):
+            failed = True
+        else:
+            replacements.append((region[0], region[1], groq_result["optimized_code"]))
+        if groq_result.get("explanation"):
+            explanations.append(f"Lines {region[0]}-{region[1]}: {groq_result['explanation']}")
+    ai_issues.sort(key=_line_of)
+    replacements.sort(key=lambda replacement: (replacement[0], replacement[1]))
+
+    result = build_result(static_issues, {
+        "ai_issues": ai_issues,
+        "optimized_code": stitch_code(code, replacements),
+        "explanation": "\n\n".join(explanations) or previous_result.get("explanation", ""),
+        "token_usage": merge_token_usage([groq_result.get("token_usage") for groq_result in results]),
+        "routing": merge_routing([groq_result.get("routing") for groq_result in results]),
+    })
+    # aggregate_issues rebuilds the dicts, so carry the flag over by identity
+    reused_keys = {_issue_key(issue) for issue in static_issues + ai_issues if issue["reused"]}
+    for issue in result["aggregated_issues"]:
+        issue["reused"] = _issue_key(issue) in reused_keys
+    result["incremental"] = {
+        "regions": [list(region) for region in plan.regions],
+        "reanalyzed_lines": plan.changed_lines,
+        "total_lines": plan.total_lines,
+        "reused_issues": sum(1 for issue in result["aggregated_issues"] if issue["reused"]),
+        "new_issues": sum(1 for issue in result["aggregated_issues"] if not issue["reused"]),
+    }
+    if failed:
+        result["failed"] = True
+    return result
+
+
+async def _compute(
+    language: str,
+    mode: str,
+    instruction: str,
+    code: str,
+    use_chunks: bool,
+    cache_key: str,
+) -> tuple[dict, bool, bool]:
+    """Static + LLM analysis of *code*. Returns (result, llm_failed, cached=False)."""
+    static_issues = await run_static_analysis_async(language, code)
+    if use_chunks:
+        groq_result = await analyze_chunked(language, mode, instruction, code, static_issues)
+    else:
+        groq_result = await analyze_with_groq_async(
+            language=language,
+            mode=mode,
+            instruction=instruction,
+            code=code,
+            static_issues=static_issues,
+        )
+    result = build_result(static_issues, groq_result)
+
+    # Never cache fallback results from a failed LLM call, nor results from a
+    # load-shedding route that an idle server would have sent to a larger model
+    failed = bool(groq_result.get("failed"))
+    load_shed = bool((groq_result.get("routing") or {}).get("load_shed"))
+    if not failed and not load_shed:
+        await put_cached(cache_key, result)
+    return result, failed, False
+
+
+async def run_analysis(
+    language: str,
+    mode: str,
+    instruction: str,
+    code: str,
+    raise_on_llm_failure: bool = False,
+    chunked: Optional[bool] = None,
+    file_id: Optional[int] = None,
+    incremental: bool = True,
+) -> tuple[dict, bool]:
+    """Run the full analysis pipeline for one piece of code.
+
+    Returns (result, cached). Raises StaticAnalysisBusy when the static
+    analysis queue for the language is full, and LLMAnalysisFailed instead of
+    returning a fallback result when raise_on_llm_failure is set.
+
+    Large files (see should_chunk) are split at function/class boundaries and
+    the chunks sent to the LLM concurrently; static analysis always sees the
+    whole file.
+
+    Concurrent calls for the same content are coalesced (see single_flight):
+    one computes, the others wait for its result, within this process and
+    across workers.
+
+    For project files (*file_id*), the last successful analysis is kept and,
+    with *incremental*, a later call with edited code only re-analyzes the
+    changed regions (see analyze_incremental).
+    """
+    use_chunks = should_chunk(code, chunked)
+    cache_key = await cache_key_for(code, language, mode, instruction, variant="chunked" if use_chunks else "")
+    result = await get_cached(cache_key)
+    if result is not None:
+        return result, True
+
+    if file_id is not None and incremental:
+        snapshot = await load_snapshot(file_id)
+        if (
+            snapshot is not None
+            and (snapshot.language, snapshot.mode, snapshot.instruction) == (language, mode, instruction or "")
+        ):
+            result = await analyze_incremental(language, mode, instruction, code, snapshot.code, snapshot.result)
+            if result is not None:
+                if result.get("failed"):
+                    if raise_on_llm_failure:
+                        raise LLMAnalysisFailed(result["explanation"])
+                    result.pop("failed")
+                else:
+                    await save_snapshot(file_id, language, mode, instruction, code, result)
+                return result, False
+
+    async def recheck():
+        cached_result = await get_cached(cache_key)
+        return (cached_result, False, True) if cached_result is not None else None
+
+    # Identical concurrent submissions share one static + LLM run
+    result, failed, cached = await single_flight(
+        cache_key,
+        lambda: _compute(language, mode, instruction, code, use_chunks, cache_key),
+        recheck,
+    )
+    if failed and raise_on_llm_failure:
+        raise LLMAnalysisFailed(result["explanation"])
+    if not failed and file_id is not None:
+        await save_snapshot(file_id, language, mode, instruction, code, result)
+    return result, cached
+
+
+async def run_static_only(language: str, code: str) -> tuple[dict, bool]:
+    """Static analysis, aggregation and scoring only; no LLM call.
+
+    Returns (result, cached) in the /api/analyze shape, with no AI
+    suggestions and the code unchanged. Raises StaticAnalysisBusy when the
+    static analysis queue for the language is full.
+    """
+    # Static results are cheap to recompute; a shared-tier round trip would cost more than it saves
+    cache_key = await cache_key_for(code, language, "", "", variant="static")
+    result = await get_cached(cache_key, memory_only=True)
+    if result is not None:
+        return result, True
+
+    static_issues = await run_static_analysis_async(language, code)
+    result = build_result(static_issues, {"ai_issues": [], "optimized_code": code, "explanation": ""})
+    await put_cached(cache_key, result, memory_only=True)
+    return result, False
+
+
+def history_records(
+    user_id: int,
+    language: str,
+    mode: str,
+    instruction: str,
+    code: str,
+    result: dict,
+    project_id: Optional[int] = None,
+    file_id: Optional[int] = None,
+    file_name: Optional[str] = None,
+) -> list:
+    """Build the AnalysisHistory row (plus ANALYZE_FILE activity for project files) for a result."""
+    records = [AnalysisHistory(
+        user_id=user_id,
+        project_id=project_id,
+        language=language,
+        mode=mode,
+        code_snippet=code[:10000],  # Limit to 10k chars
+        instruction=instruction,
+        static_issues=result["static_issues"],
+        ai_suggestions=result["ai_suggestions"],
+        aggregated_issues=result["aggregated_issues"],
+        optimized_code=result["optimized_code"],
+        explanation=result["explanation"],
+        confidence_score=result["confidence_score"],
+        # Cache hits make no LLM call
+        prompt_tokens=(result.get("token_usage") or {}).get("prompt_tokens", 0),
+        completion_tokens=(result.get("token_usage") or {}).get("completion_tokens", 0),
+        routing=result.get("routing"),
+    )]
+
+    # Log ANALYZE_FILE activity when analyzing a project file
+    if project_id and file_id and file_name:
+        records.append(ProjectActivity(
+            user_id=user_id,
+            project_id=project_id,
+            file_id=file_id,
+            action_type=ActionType.ANALYZE_FILE,
+            file_name=file_name,
+        ))
+    return records
+
+
+def apply_enrichment(record: AnalysisHistory, result: dict) -> None:
+    """Overwrite a static-only history row with the full analysis *result*."""
+    record.static_issues = result["static_issues"]
+    record.ai_suggestions = result["ai_suggestions"]
+    record.aggregated_issues = result["aggregated_issues"]
+    record.optimized_code = result["optimized_code"]
+    record.explanation = result["explanation"]
+    record.confidence_score = result["confidence_score"]
+    record.prompt_tokens = (result.get("token_usage") or {}).get("prompt_tokens", 0)
+    record.completion_tokens = (result.get("token_usage") or {}).get("completion_tokens", 0)
+    record.routing = result.get("routing")
@@ -0,0 +1,160 @@
+import asyncio
+import io
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool, _RemoteTraceback
+from typing import Optional
+from config.settings import BANDIT_POOL_SIZE, STATIC_ANALYSIS_TIMEOUT_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Name Bandit reports for in-memory snippets; must end in .py for module resolution.
+_SNIPPET_NAME = "snippet.py"
+
+# Worker-process state, populated once by _init_worker.
+_bandit_config = None
+
+_executor: Optional[ProcessPoolExecutor] = None
+_start_lock = asyncio.Lock()
+# Set when the installed Bandit lacks the internals _scan relies on
+_api_incompatible = False
+
+_stats = {
+    "scans": 0,
+    "timeouts": 0,
+    "recycled": 0,
+    "crashes": 0,
+    "fallbacks": 0,
+}
+
+
+def _init_worker() -> None:
+    """Load Bandit's config and plugin set once per worker process."""
+    global _bandit_config
+    logging.getLogger("bandit").setLevel(logging.ERROR)
+    from bandit.core import config
+
+    _bandit_config = config.BanditConfig()
+
+
+def _scan(code: str) -> list:
+    """Run Bandit on *code* inside a warm worker. Returns static_analyzer issue dicts.
+
+    Uses BanditManager internals (_parse_file), which is why requirements.txt
+    pins Bandit to the versions this was tested with.
+    """
+    from bandit.core import manager
+
+    mgr = manager.BanditManager(_bandit_config, "file", quiet=True)
+    mgr.files_list = [_SNIPPET_NAME]
+    mgr._parse_file(_SNIPPET_NAME, io.BytesIO(code.encode("utf-8")), [_SNIPPET_NAME])
+    mgr.metrics.aggregate()
+
+    issues = []
+    for item in mgr.get_issue_list():
+        issues.append({
+            "type": "security",
+            "line": item.lineno,
+            "severity": item.severity.upper(),
+            "message": item.text,
+            "source": "static",
+        })
+    return issues
+
+
+def _warmup() -> bool:
+    _scan("import os\n")
+    return True
+
+
+def start_bandit_pool() -> None:
+    """Spawn the worker processes and run one scan in each so plugins are loaded."""
+    global _executor
+    if _executor is not None:
+        return
+    _executor = ProcessPoolExecutor(
+        max_workers=BANDIT_POOL_SIZE,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+    )
+    for future in [_executor.submit(_warmup) for _ in range(BANDIT_POOL_SIZE)]:
+        future.result()
+    logger.info(f"Bandit worker pool started with {BANDIT_POOL_SIZE} workers")
+
+
+def stop_bandit_pool(terminate: bool = False) -> None:
+    """Shut the pool down; with *terminate*, kill workers still running a scan."""
+    global _executor
+    if _executor is not None:
+        executor, _executor = _executor, None
+        if terminate:
+            # ProcessPoolExecutor cannot cancel a running call; stop its processes
+            for process in list((executor._processes or {}).values()):
+                process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def run_bandit_pooled(code: str) -> Optional[list]:
+    """Scan Python *code* on the warm pool without blocking the event loop.
+
+    Returns None when the caller should run the Bandit CLI instead: the pool
+    crashed, or the installed Bandit does not have the internals _scan uses.
+    On timeout the caller gets no issues and the pool is recycled, since a
+    scan stuck in a worker would otherwise hold it indefinitely; scans running
+    in the other workers then fall back to the CLI.
+    """
+    global _api_incompatible
+    if _api_incompatible:
+        _stats["fallbacks"] += 1
+        return None
+    if _executor is None:
+        async with _start_lock:
+            await asyncio.to_thread(start_bandit_pool)
+    # A concurrent timeout may already have stopped the pool again; never
+    # hand None to run_in_executor, which would scan on the default thread pool
+    executor = _executor
+    if executor is None:
+        _stats["fallbacks"] += 1
+        return None
+
+    loop = asyncio.get_running_loop()
+    try:
+        issues = await asyncio.wait_for(
+            loop.run_in_executor(executor, _scan, code),
+            timeout=STATIC_ANALYSIS_TIMEOUT_SECONDS,
+        )
+    except asyncio.TimeoutError:
+        logger.warning("Bandit worker timed out; skipping Python static analysis and recycling the pool.")
+        _stats["timeouts"] += 1
+        _stats["recycled"] += 1
+        stop_bandit_pool(terminate=True)
+        return []
+    except BrokenProcessPool:
+        logger.error("Bandit worker pool crashed; restarting it and using the CLI for this scan.")
+        _stats["crashes"] += 1
+        _stats["fallbacks"] += 1
+        stop_bandit_pool()
+        return None
+    except (AttributeError, TypeError) as e:
+        _stats["fallbacks"] += 1
+        # Only _scan failing inside a worker says anything about the installed
+        # Bandit; such errors carry the worker's traceback as their cause
+        if not isinstance(e.__cause__, _RemoteTraceback):
+            logger.error(f"Pooled Bandit scan failed outside the workers, using the CLI for this scan: {e}")
+            return None
+        logger.error(f"Installed Bandit is incompatible with the worker pool, using the CLI from now on: {e}")
+        _api_incompatible = True
+        stop_bandit_pool()
+        return None
+    _stats["scans"] += 1
+    return issues
+
+
+def bandit_pool_stats() -> dict:
+    return {
+        **_stats,
+        "pool_size": BANDIT_POOL_SIZE,
+        "running": _executor is not None,
+        "api_incompatible": _api_incompatible,
+    }
@@ -0,0 +1,319 @@
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from sqlalchemy import select, update, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import AsyncSessionLocal
+from models.analysis_batch import AnalysisBatch
+from models.analysis_history import AnalysisHistory
+from services.analysis_pipeline import run_analysis, history_records
+from services.user_stats import count_analyses
+from config.settings import (
+    BATCH_DEFAULT_CONCURRENCY,
+    BATCH_MAX_CONCURRENCY,
+    BATCH_FLUSH_SIZE,
+    BATCH_JOB_TTL_SECONDS,
+    BATCH_SYNC_SECONDS,
+    BATCH_STALE_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+# Per-file and per-batch states
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+SKIPPED = "skipped"
+CANCELLED = "cancelled"
+# The batch's worker stopped (shutdown or crash) before it finished
+INTERRUPTED = "interrupted"
+
+FILE_STATES = (PENDING, RUNNING, DONE, FAILED, SKIPPED, CANCELLED, INTERRUPTED)
+
+
+class BatchJob:
+    """Analysis of every file in a project, run in the background on this worker.
+
+    Its state is mirrored to an analysis_batches row, written with each bulk
+    flush of results and every BATCH_SYNC_SECONDS, so any worker can report
+    progress and request cancellation.
+    """
+
+    def __init__(self, user_id: int, project_id: int, mode: str, instruction: str, files: list, concurrency: int):
+        self.id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.project_id = project_id
+        self.mode = mode
+        self.instruction = instruction
+        self.concurrency = concurrency
+        self.status = PENDING
+        self.finished_at: Optional[datetime] = None
+        self.task: Optional[asyncio.Task] = None
+        self.files = {
+            f["id"]: {
+                "file_id": f["id"],
+                "file_name": f["name"],
+                "language": f["language"],
+                "status": PENDING if f["content"] else SKIPPED,
+                "cached": False,
+                "error": None,
+                # The AnalysisHistory row holding the result, once flushed
+                "analysis_id": None,
+            }
+            for f in files
+        }
+        self._contents = {f["id"]: f["content"] for f in files if f["content"]}
+        # (file_id, records) analyzed but not yet written
+        self._unsaved: list = []
+        # Set before cancelling on shutdown, so the batch ends interrupted rather than cancelled
+        self.shutting_down = False
+
+    def row(self) -> AnalysisBatch:
+        return AnalysisBatch(
+            id=self.id,
+            user_id=self.user_id,
+            project_id=self.project_id,
+            mode=self.mode,
+            instruction=self.instruction,
+            concurrency=self.concurrency,
+            status=self.status,
+            files=list(self.files.values()),
+        )
+
+    def snapshot(self) -> dict:
+        """Column values that bring the batch's row up to date."""
+        return {
+            "status": self.status,
+            "files": [dict(entry) for entry in self.files.values()],
+            "heartbeat_at": datetime.now(timezone.utc),
+            "finished_at": self.finished_at,
+        }
+
+    async def run(self) -> None:
+        self.status = RUNNING
+        semaphore = asyncio.Semaphore(self.concurrency)
+        sync = asyncio.create_task(self._sync_loop())
+        try:
+            await asyncio.gather(*(
+                self._analyze_file(file_id, semaphore) for file_id in self._contents
+            ))
+            self.status = DONE
+        except asyncio.CancelledError:
+            ended = INTERRUPTED if self.shutting_down else CANCELLED
+            for entry in self.files.values():
+                if entry["status"] in (PENDING, RUNNING):
+                    entry["status"] = ended
+            self.status = ended
+        finally:
+            sync.cancel()
+            self.finished_at = datetime.now(timezone.utc)
+            # Keep what finished before a cancellation, and record the outcome
+            unsaved, self._unsaved = self._unsaved, []
+            await asyncio.shield(self._flush(unsaved))
+            self._contents.clear()
+            _running.pop(self.id, None)
+
+    async def _analyze_file(self, file_id: int, semaphore: asyncio.Semaphore) -> None:
+        entry = self.files[file_id]
+        code = self._contents[file_id]
+        async with semaphore:
+            entry["status"] = RUNNING
+            try:
+                result, cached = await run_analysis(
+                    entry["language"], self.mode, self.instruction, code, file_id=file_id
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Batch analysis of file {file_id} failed: {e}", exc_info=True)
+                entry["status"] = FAILED
+                entry["error"] = str(e)
+                return
+
+        entry["status"] = DONE
+        entry["cached"] = cached
+        self._unsaved.append((file_id, history_records(
+            user_id=self.user_id,
+            language=entry["language"],
+            mode=self.mode,
+            instruction=self.instruction,
+            code=code,
+            result=result,
+            project_id=self.project_id,
+            file_id=file_id,
+            file_name=entry["file_name"],
+        )))
+        if len(self._unsaved) >= BATCH_FLUSH_SIZE:
+            unsaved, self._unsaved = self._unsaved, []
+            # Shielded so a cancellation cannot drop rows already taken off the buffer
+            await asyncio.shield(self._flush(unsaved))
+
+    async def _flush(self, unsaved: list) -> None:
+        """Write *unsaved* AnalysisHistory/ProjectActivity rows and the batch state in one transaction."""
+        records = [record for _, batch in unsaved for record in batch]
+        try:
+            async with AsyncSessionLocal() as session:
+                if records:
+                    session.add_all(records)
+                    await count_analyses(session, records)
+                    await session.flush()
+                    for file_id, batch in unsaved:
+                        self.files[file_id]["analysis_id"] = batch[0].id
+                await session.execute(
+                    update(AnalysisBatch).where(AnalysisBatch.id == self.id).values(**self.snapshot())
+                )
+                await session.commit()
+        except Exception as e:
+            logger.error(f"Saving batch analysis results failed: {e}", exc_info=True)
+
+    async def _sync_loop(self) -> None:
+        """Save progress every BATCH_SYNC_SECONDS; stop the batch if a cancel was requested or its row is gone."""
+        while True:
+            await asyncio.sleep(BATCH_SYNC_SECONDS)
+            try:
+                async with AsyncSessionLocal() as session:
+                    row = (await session.execute(
+                        update(AnalysisBatch)
+                        .where(AnalysisBatch.id == self.id)
+                        .values(**self.snapshot())
+                        .returning(AnalysisBatch.cancel_requested)
+                    )).first()
+                    await session.commit()
+            except Exception as e:
+                logger.warning(f"Saving progress of batch {self.id} failed: {e}")
+                continue
+            if row is None or row.cancel_requested:
+                logger.info(f"Batch {self.id} cancelled")
+                self.task.cancel()
+                return
+
+
+# Batches running on this worker, by id
+_running: dict[str, BatchJob] = {}
+
+
+def batch_query(job_id: str, user_id: int, project_id: int):
+    return select(AnalysisBatch).where(
+        AnalysisBatch.id == job_id,
+        AnalysisBatch.user_id == user_id,
+        AnalysisBatch.project_id == project_id,
+    )
+
+
+async def start_batch_job(
+    db: AsyncSession,
+    user_id: int,
+    project_id: int,
+    mode: str,
+    instruction: str,
+    files: list,
+    concurrency: Optional[int] = None,
+) -> dict:
+    """Create a batch for *files* (dicts with id, name, language, content), start it here and return its state."""
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=BATCH_JOB_TTL_SECONDS)
+    await db.execute(delete(AnalysisBatch).where(AnalysisBatch.finished_at < cutoff))
+    limit = max(1, min(concurrency or BATCH_DEFAULT_CONCURRENCY, BATCH_MAX_CONCURRENCY))
+    job = BatchJob(user_id, project_id, mode, instruction, files, limit)
+    row = job.row()
+    db.add(row)
+    await db.commit()
+    _running[job.id] = job
+    job.task = asyncio.create_task(job.run())
+    return batch_to_dict(row, include_results=False)
+
+
+def _stale(row: AnalysisBatch, now: datetime) -> bool:
+    """Whether *row* is unfinished but its worker has stopped saving it."""
+    return (
+        row.status in (PENDING, RUNNING)
+        and row.heartbeat_at is not None
+        and row.heartbeat_at < now - timedelta(seconds=BATCH_STALE_SECONDS)
+    )
+
+
+def _mark_interrupted(row: AnalysisBatch) -> None:
+    row.files = [
+        {**entry, "status": INTERRUPTED} if entry["status"] in (PENDING, RUNNING) else entry
+        for entry in row.files
+    ]
+    row.status = INTERRUPTED
+    row.finished_at = datetime.now(timezone.utc)
+
+
+async def get_batch_job(db: AsyncSession, job_id: str, user_id: int, project_id: int) -> Optional[AnalysisBatch]:
+    """The user's batch from any worker, marked interrupted if its worker went away."""
+    row = (await db.execute(batch_query(job_id, user_id, project_id))).scalar_one_or_none()
+    if row is None:
+        return None
+    job = _running.get(job_id)
+    if job is not None:
+        # Fresher than the last save; shown only, the batch's own saves write it
+        db.expunge(row)
+        row.status = job.status
+        row.files = list(job.files.values())
+    elif _stale(row, datetime.now(timezone.utc)):
+        _mark_interrupted(row)
+        await db.commit()
+    return row
+
+
+async def cancel_batch_job(db: AsyncSession, row: AnalysisBatch) -> None:
+    """Stop *row*'s batch: directly if it runs here, else through cancel_requested for its worker."""
+    job = _running.get(row.id)
+    if job is not None and job.task is not None and not job.task.done():
+        job.task.cancel()
+        return
+    if row.status in (PENDING, RUNNING):
+        row.cancel_requested = True
+        await db.commit()
+
+
+async def batch_to_dict_with_results(db: AsyncSession, row: AnalysisBatch) -> dict:
+    """batch_to_dict with each saved file's result, read from its history row."""
+    ids = [entry["analysis_id"] for entry in row.files if entry.get("analysis_id")]
+    results = {}
+    if ids:
+        for analysis in (await db.execute(
+            select(AnalysisHistory).where(AnalysisHistory.id.in_(ids))
+        )).scalars():
+            results[analysis.id] = {
+                "static_issues": analysis.static_issues,
+                "ai_suggestions": analysis.ai_suggestions,
+                "aggregated_issues": analysis.aggregated_issues,
+                "optimized_code": analysis.optimized_code,
+                "explanation": analysis.explanation,
+                "confidence_score": analysis.confidence_score,
+            }
+    return batch_to_dict(row, include_results=True, results=results)
+
+
+def batch_to_dict(row: AnalysisBatch, include_results: bool, results: Optional[dict] = None) -> dict:
+    counts = {state: 0 for state in FILE_STATES}
+    for entry in row.files:
+        counts[entry["status"]] += 1
+    files = [dict(entry) for entry in row.files]
+    if include_results:
+        # Results appear once flushed, every BATCH_FLUSH_SIZE files
+        for entry in files:
+            entry["result"] = (results or {}).get(entry.get("analysis_id"))
+    return {
+        "job_id": row.id,
+        "project_id": row.project_id,
+        "mode": row.mode,
+        "status": row.status,
+        "concurrency": row.concurrency,
+        "progress": {"total": len(files), **counts},
+        "files": files,
+    }
+
+
+async def cancel_all_batch_jobs() -> None:
+    """Stop this worker's batches on shutdown, saving completed results and marking them interrupted."""
+    jobs = [job for job in _running.values() if job.task is not None and not job.task.done()]
+    for job in jobs:
+        job.shutting_down = True
+        job.task.cancel()
+    await asyncio.gather(*(job.task for job in jobs), return_exceptions=True)
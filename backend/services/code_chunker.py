@@ -0,0 +1,141 @@
+import ast
+import bisect
+import re
+
+# Strings, character literals and comments, so braces inside them are ignored.
+_C_LIKE_NOISE = re.compile(
+    r'"(?:[^"\\\n]|\\.)*"'
+    r"|'(?:[^'\\\n]|\\.)*'"
+    r"|`(?:[^`\\]|\\.)*`"
+    r"|//[^\n]*"
+    r"|/\*.*?\*/",
+    re.DOTALL,
+)
+
+
+def split_code(language: str, code: str, max_lines: int) -> list:
+    """Split *code* into contiguous chunks of at most ~max_lines at syntactic boundaries.
+
+    Returns a list of {"start_line": int, "end_line": int, "code": str} dicts
+    (1-based, inclusive) that together cover every line of the input. A single
+    definition longer than max_lines is kept whole unless it is more than twice
+    that size, in which case it is cut at line boundaries.
+    """
+    lines = code.splitlines()
+    if len(lines) <= max_lines:
+        return [_chunk(lines, 1, len(lines))]
+
+    boundaries = definition_boundaries(language, code, lines)
+    return [_chunk(lines, start, end) for start, end in _group(boundaries, len(lines), max_lines)]
+
+
+def definition_boundaries(language: str, code: str, lines: list = None) -> list:
+    """Line numbers where a top-level definition starts, falling back to blank lines."""
+    if lines is None:
+        lines = code.splitlines()
+    language = language.lower()
+    boundaries = None
+    if language == "python":
+        boundaries = _python_boundaries(code)
+    elif language in ("javascript", "java", "c", "cpp"):
+        boundaries = _brace_boundaries(code)
+    if not boundaries:
+        boundaries = _blank_line_boundaries(lines)
+    return boundaries
+
+
+def expand_to_definitions(language: str, code: str, ranges: list, max_lines: int) -> list:
+    """Widen each (start, end) line range to the top-level definitions it touches.
+
+    Ranges whose enclosing definitions would exceed max_lines are left as
+    they are. Overlapping or adjacent results are merged.
+    """
+    lines = code.splitlines()
+    total = len(lines)
+    points = sorted({b for b in definition_boundaries(language, code, lines) if 1 < b <= total} | {1, total + 1})
+
+    expanded = []
+    for start, end in ranges:
+        low = points[bisect.bisect_right(points, start) - 1]
+        high = points[bisect.bisect_right(points, end)] - 1 if end < total else total
+        if high - low + 1 <= max_lines:
+            start, end = low, high
+        expanded.append((start, end))
+    return merge_ranges(expanded)
+
+
+def merge_ranges(ranges: list) -> list:
+    """Merge overlapping or adjacent inclusive (start, end) ranges."""
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _chunk(lines: list, start: int, end: int) -> dict:
+    return {"start_line": start, "end_line": end, "code": "\n".join(lines[start - 1:end])}
+
+
+def _python_boundaries(code: str) -> list:
+    """Line numbers where a top-level statement (with its decorators) begins."""
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return []
+    starts = []
+    for node in tree.body:
+        decorators = getattr(node, "decorator_list", [])
+        starts.append(min([node.lineno] + [d.lineno for d in decorators]))
+    return starts
+
+
+def _brace_boundaries(code: str) -> list:
+    """Line numbers following a line that closes back to brace depth 0."""
+    cleaned = _C_LIKE_NOISE.sub(lambda m: re.sub(r"[^\n]", " ", m.group(0)), code)
+    starts = []
+    depth = 0
+    for number, line in enumerate(cleaned.splitlines(), 1):
+        opened = line.count("{")
+        closed = line.count("}")
+        was_nested = depth > 0 or opened > 0
+        depth = max(0, depth + opened - closed)
+        if depth == 0 and was_nested:
+            starts.append(number + 1)
+    return starts
+
+
+def _blank_line_boundaries(lines: list) -> list:
+    return [number + 1 for number, line in enumerate(lines, 1) if not line.strip()]
+
+
+def _group(boundaries: list, total: int, max_lines: int) -> list:
+    """Pack the segments between boundaries into (start, end) ranges of <= max_lines."""
+    points = sorted({b for b in boundaries if 1 < b <= total})
+    segments = []
+    start = 1
+    for point in points + [total + 1]:
+        segments.append((start, point - 1))
+        start = point
+
+    ranges = []
+    current_start, current_end = segments[0]
+    for seg_start, seg_end in segments[1:]:
+        if seg_end - current_start + 1 <= max_lines:
+            current_end = seg_end
+        else:
+            ranges.append((current_start, current_end))
+            current_start, current_end = seg_start, seg_end
+    ranges.append((current_start, current_end))
+
+    # Cut anything far beyond the budget (e.g. one enormous function)
+    result = []
+    for start, end in ranges:
+        if end - start + 1 > 2 * max_lines:
+            for cut in range(start, end + 1, max_lines):
+                result.append((cut, min(end, cut + max_lines - 1)))
+        else:
+            result.append((start, end))
+    return result
@@ -0,0 +1,146 @@
+import difflib
+import re
+from typing import NamedTuple
+
+_HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+# How far from its stated position a hunk's context may be found, as `patch` does
+MAX_FUZZ_LINES = 20
+
+
+class DiffApplyError(ValueError):
+    """The diff is malformed or does not match the code it is applied to."""
+
+
+class Hunk(NamedTuple):
+    old_start: int
+    old_lines: list
+    new_lines: list
+
+
+def _is_file_header(lines: list, index: int) -> bool:
+    line = lines[index]
+    if line.startswith("diff "):
+        return True
+    # "--- " alone may be a removed line starting with "-- " (a SQL or Lua comment)
+    return line.startswith("--- ") and index + 1 < len(lines) and lines[index + 1].startswith("+++ ")
+
+
+def _hunk_counts(body: list) -> tuple:
+    old = sum(1 for line in body if not line.startswith("+"))
+    new = sum(1 for line in body if not line.startswith("-"))
+    return old, new
+
+
+def parse_unified_diff(diff: str) -> list:
+    """Parse the hunks of a unified diff. File headers and "\\ No newline" lines are skipped.
+
+    A hunk's body runs to the next hunk or file header, whatever line counts
+    its header states, since models often miscount them; the counts are only
+    used to drop trailing blank lines that would otherwise become context. A
+    blank line inside a hunk counts as blank context, since models often drop
+    the leading space. A +/- line outside any hunk raises DiffApplyError
+    rather than being lost.
+    """
+    hunks = []
+    lines = diff.replace("\r\n", "\n").split("\n")
+    if lines[-1] == "":
+        # The diff's final newline ends the last line; it is not a blank line
+        lines.pop()
+    index = 0
+    while index < len(lines):
+        line = lines[index]
+        match = _HUNK_HEADER.match(line)
+        if not match:
+            if line.startswith(("--- ", "+++ ", "diff ")):
+                index += 1
+                continue
+            if line.startswith(("+", "-")):
+                raise DiffApplyError(f"line outside any hunk: {line[:60]!r}")
+            index += 1
+            continue
+        index += 1
+        old_start = int(match.group(1))
+        old_count = int(match.group(2)) if match.group(2) is not None else 1
+        new_count = int(match.group(4)) if match.group(4) is not None else 1
+
+        body = []
+        while index < len(lines) and not _HUNK_HEADER.match(lines[index]) and not _is_file_header(lines, index):
+            if not lines[index].startswith("\\"):
+                body.append(lines[index])
+            index += 1
+        # Blank lines at the end are separators (or the diff's final newline) unless the header needs them
+        while body and body[-1] == "":
+            old, new = _hunk_counts(body[:-1])
+            if old < old_count and new < new_count:
+                break
+            body.pop()
+
+        old_lines, new_lines = [], []
+        for line in body:
+            tag, text = (line[0], line[1:]) if line else (" ", "")
+            if tag == " ":
+                old_lines.append(text)
+                new_lines.append(text)
+            elif tag == "-":
+                old_lines.append(text)
+            elif tag == "+":
+                new_lines.append(text)
+            else:
+                raise DiffApplyError(f"unexpected line in hunk at -{old_start}: {line[:60]!r}")
+        if not old_lines and not new_lines:
+            raise DiffApplyError(f"empty hunk at -{old_start}")
+        hunks.append(Hunk(old_start, old_lines, new_lines))
+    return hunks
+
+
+def _matches(lines: list, at: int, expected: list) -> bool:
+    if at < 0 or at + len(expected) > len(lines):
+        return False
+    return all(lines[at + i].rstrip() == text.rstrip() for i, text in enumerate(expected))
+
+
+def _locate(lines: list, hunk: Hunk, low: int, offset: int) -> int:
+    """Index where *hunk*'s old lines start, searching outward from the stated position."""
+    if not hunk.old_lines:
+        # Pure insertion: old_start is the line it goes after
+        return max(low, min(len(lines), hunk.old_start + offset))
+    expected = max(low, hunk.old_start - 1 + offset)
+    for distance in range(MAX_FUZZ_LINES + 1):
+        for at in (expected - distance, expected + distance):
+            if at >= low and _matches(lines, at, hunk.old_lines):
+                return at
+    raise DiffApplyError(f"hunk at -{hunk.old_start} does not match the code")
+
+
+def apply_unified_diff(code: str, diff: str) -> str:
+    """Apply *diff* to *code* and return the result.
+
+    Hunks apply in order and may not overlap. Context is compared ignoring
+    trailing whitespace and may be found up to MAX_FUZZ_LINES from where the
+    header says. Raises DiffApplyError when any hunk does not apply; an empty
+    diff returns *code* unchanged.
+    """
+    hunks = parse_unified_diff(diff)
+    if not hunks and diff.strip():
+        raise DiffApplyError("no hunks found")
+
+    lines = code.split("\n")
+    result = []
+    position = 0
+    offset = 0
+    for hunk in hunks:
+        at = _locate(lines, hunk, position, offset)
+        result.extend(lines[position:at])
+        result.extend(hunk.new_lines)
+        position = at + len(hunk.old_lines)
+        offset = at - (hunk.old_start - 1) if hunk.old_lines else offset
+    result.extend(lines[position:])
+    return "\n".join(result)
+
+
+def make_unified_diff(old: str, new: str, context: int = 3) -> str:
+    """Unified diff from *old* to *new*, in the form the model is asked to produce."""
+    return "\n".join(difflib.unified_diff(
+        old.split("\n"), new.split("\n"), "original", "optimized", n=context, lineterm=""
+    ))
@@ -1,42 +1,127 @@
-def compute_confidence(aggregated_issues: list) -> float:
+from typing import NamedTuple, Optional
+import numpy as np
+from config.settings import (
+    CONFIDENCE_CONFIRMED_SCORE,
+    CONFIDENCE_CONFIRMED_WEIGHT,
+    CONFIDENCE_STATIC_SCORE,
+    CONFIDENCE_STATIC_WEIGHT,
+    CONFIDENCE_INFERRED_SCORE,
+    CONFIDENCE_INFERRED_WEIGHT,
+    CONFIDENCE_EMPTY_SCORE,
+    CONFIDENCE_MIN,
+    CONFIDENCE_MAX,
+)
+
+
+class ConfidenceWeights(NamedTuple):
+    """Per-category (score, weight) pairs plus the empty-list score and clamp range."""
+    confirmed_score: float = CONFIDENCE_CONFIRMED_SCORE
+    confirmed_weight: float = CONFIDENCE_CONFIRMED_WEIGHT
+    static_score: float = CONFIDENCE_STATIC_SCORE
+    static_weight: float = CONFIDENCE_STATIC_WEIGHT
+    inferred_score: float = CONFIDENCE_INFERRED_SCORE
+    inferred_weight: float = CONFIDENCE_INFERRED_WEIGHT
+    empty_score: float = CONFIDENCE_EMPTY_SCORE
+    minimum: float = CONFIDENCE_MIN
+    maximum: float = CONFIDENCE_MAX
+
+
+DEFAULT_WEIGHTS = ConfidenceWeights()
+
+# Issue categories, indexes into _scores_and_weights
+_CONFIRMED, _STATIC, _INFERRED = 0, 1, 2
+
+
+def _category(issue: dict) -> int:
+    if issue.get("source", "inferred") == "verified":
+        return _CONFIRMED if issue.get("explanation") else _STATIC
+    return _INFERRED
+
+
+def _scores_and_weights(weights: ConfidenceWeights) -> tuple:
+    """Per-category score * weight products and weights."""
+    return (
+        (
+            weights.confirmed_score * weights.confirmed_weight,
+            weights.static_score * weights.static_weight,
+            weights.inferred_score * weights.inferred_weight,
+        ),
+        (weights.confirmed_weight, weights.static_weight, weights.inferred_weight),
+    )
+
+
+def compute_confidence(aggregated_issues: list, weights: Optional[ConfidenceWeights] = None) -> float:
     """Compute a weighted confidence score based on issue sources.
 
-    Score ranges:
+    Score ranges (with the default weights):
     - verified (static + AI confirmed): 0.85–0.95
     - inferred (AI-only):               0.70–0.84
     - verified (static-only):           0.80–0.90
 
     Returns a single float in the range [0.60, 0.95].
     """
+    weights = weights or DEFAULT_WEIGHTS
     if not aggregated_issues:
-        return 0.75
+        return weights.empty_score
 
+    products, category_weights = _scores_and_weights(weights)
     total_weight = 0.0
     total_score = 0.0
-
+    # Summed one issue at a time in list order: float addition is not
+    # associative, and stored scores must not move by an ulp
     for issue in aggregated_issues:
-        source = issue.get("source", "inferred")
-        has_explanation = bool(issue.get("explanation"))
-
-        if source == "verified" and has_explanation:
-            # Static + AI confirmed
-            score = 0.90
-            weight = 2.0
-        elif source == "verified":
-            # Static-only
-            score = 0.85
-            weight = 1.5
-        else:
-            # AI-only / inferred
-            score = 0.75
-            weight = 1.0
-
-        total_score += score * weight
-        total_weight += weight
+        category = _category(issue)
+        total_score += products[category]
+        total_weight += category_weights[category]
 
     if total_weight == 0:
-        return 0.75
+        return weights.empty_score
 
     raw = total_score / total_weight
     # Clamp to [0.60, 0.95]
-    return round(max(0.60, min(0.95, raw)), 4)
+    return round(max(weights.minimum, min(weights.maximum, raw)), 4)
+
+
+def compute_confidence_batch(issue_lists: list, weights: Optional[ConfidenceWeights] = None) -> list:
+    """Score many aggregated issue lists at once; identical to compute_confidence per list.
+
+    Issues are laid out in a (lists x longest list) matrix of per-issue
+    products and weights, zero-padded, and the columns are added up one at a
+    time. Each list is thus summed in its own issue order, as in
+    compute_confidence (adding the 0.0 padding is exact), while every step
+    runs over all lists at once.
+    """
+    weights = weights or DEFAULT_WEIGHTS
+    if not issue_lists:
+        return []
+
+    lengths = np.fromiter((len(issues or ()) for issues in issue_lists), dtype=np.int64, count=len(issue_lists))
+    categories = np.fromiter(
+        (_category(issue) for issues in issue_lists for issue in (issues or ())),
+        dtype=np.int64,
+        count=int(lengths.sum()),
+    )
+    owners = np.repeat(np.arange(len(issue_lists)), lengths)
+    positions = np.arange(len(categories)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    products, category_weights = (np.array(values, dtype=np.float64) for values in _scores_and_weights(weights))
+
+    width = int(lengths.max())
+    score_matrix = np.zeros((len(issue_lists), width))
+    weight_matrix = np.zeros((len(issue_lists), width))
+    score_matrix[owners, positions] = products[categories]
+    weight_matrix[owners, positions] = category_weights[categories]
+
+    total_score = np.zeros(len(issue_lists))
+    total_weight = np.zeros(len(issue_lists))
+    for column in range(width):
+        total_score += score_matrix[:, column]
+        total_weight += weight_matrix[:, column]
+
+    empty = total_weight == 0
+    raw = np.divide(total_score, total_weight, out=np.zeros_like(total_score), where=~empty)
+    clamped = np.maximum(weights.minimum, np.minimum(weights.maximum, raw))
+    # Python's round() is correctly rounded; np.round is not, and scores must match exactly
+    return [
+        weights.empty_score if is_empty else round(float(value), 4)
+        for value, is_empty in zip(clamped.tolist(), empty.tolist())
+    ]
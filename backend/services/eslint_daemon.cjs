@@ -0,0 +1,61 @@
+// Long-lived ESLint worker used by services/eslint_daemon.py.
+//
+// Protocol: newline-delimited JSON over stdin/stdout.
+//   startup  -> {"ready": true} | {"ready": false, "error": "..."}
+//   request  <- {"id": 1, "code": "..."}
+//   response -> {"id": 1, "results": [...], "rss": <bytes>} | {"id": 1, "error": "..."}
+// "results" is exactly what `eslint --format json` prints, so the Python side
+// reuses the CLI parser.
+'use strict'
+
+const path = require('path')
+const readline = require('readline')
+const { createRequire } = require('module')
+
+const SNIPPET_PATH = path.join(process.cwd(), '__coderefine_snippet__.js')
+
+function send(message) {
+  process.stdout.write(JSON.stringify(message) + '\n')
+}
+
+function loadESLint() {
+  try {
+    return createRequire(SNIPPET_PATH)('eslint').ESLint
+  } catch (err) {
+    return require('eslint').ESLint
+  }
+}
+
+async function main() {
+  let eslint
+  try {
+    const ESLint = loadESLint()
+    eslint = new ESLint({ cwd: process.cwd() })
+    // Resolve and cache the config before reporting ready
+    await eslint.lintText('', { filePath: SNIPPET_PATH })
+  } catch (err) {
+    send({ ready: false, error: String(err && err.message ? err.message : err) })
+    process.exit(1)
+  }
+  send({ ready: true })
+
+  const rl = readline.createInterface({ input: process.stdin, crlfDelay: Infinity })
+  for await (const line of rl) {
+    if (!line.trim()) continue
+    let request
+    try {
+      request = JSON.parse(line)
+    } catch (err) {
+      send({ id: null, error: 'invalid request' })
+      continue
+    }
+    try {
+      const results = await eslint.lintText(request.code, { filePath: SNIPPET_PATH })
+      send({ id: request.id, results, rss: process.memoryUsage().rss })
+    } catch (err) {
+      send({ id: request.id, error: String(err && err.message ? err.message : err) })
+    }
+  }
+}
+
+main()
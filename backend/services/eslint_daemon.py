@@ -0,0 +1,187 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Optional
+from services.static_analyzer import _eslint_results_to_issues
+from config.settings import (
+    ESLINT_DAEMON_POOL_SIZE,
+    ESLINT_DAEMON_MAX_RSS_MB,
+    STATIC_ANALYSIS_TIMEOUT_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "eslint_daemon.cjs")
+_STARTUP_TIMEOUT_SECONDS = 30
+# After a failed start, use the CLI for this long before trying the daemon again.
+_RETRY_AFTER_SECONDS = 30
+# ESLint results for a large file can exceed asyncio's default 64 KiB line limit.
+_LINE_LIMIT = 16 * 1024 * 1024
+
+
+class DaemonUnavailable(Exception):
+    """The ESLint daemon could not be started (node or eslint missing, bad config)."""
+
+
+class _Daemon:
+    """One supervised `node eslint_daemon.cjs` process. Handles one request at a time."""
+
+    def __init__(self):
+        self.proc: Optional[asyncio.subprocess.Process] = None
+        self._next_id = 0
+
+    @property
+    def alive(self) -> bool:
+        return self.proc is not None and self.proc.returncode is None
+
+    async def start(self) -> None:
+        try:
+            self.proc = await asyncio.create_subprocess_exec(
+                "node", _SCRIPT,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
+                limit=_LINE_LIMIT,
+            )
+        except FileNotFoundError:
+            raise DaemonUnavailable("node is not installed")
+
+        try:
+            line = await asyncio.wait_for(self.proc.stdout.readline(), _STARTUP_TIMEOUT_SECONDS)
+            message = json.loads(line) if line else {}
+        except (asyncio.TimeoutError, json.JSONDecodeError):
+            message = {}
+        if not message.get("ready"):
+            await self.stop()
+            raise DaemonUnavailable(message.get("error", "daemon did not report ready"))
+
+    async def lint(self, code: str) -> tuple[list, int]:
+        """Lint *code*; returns (ESLint results, daemon RSS in bytes)."""
+        self._next_id += 1
+        request_id = self._next_id
+        self.proc.stdin.write(json.dumps({"id": request_id, "code": code}).encode("utf-8") + b"\n")
+        await self.proc.stdin.drain()
+
+        line = await asyncio.wait_for(self.proc.stdout.readline(), STATIC_ANALYSIS_TIMEOUT_SECONDS)
+        if not line:
+            raise ConnectionError("eslint daemon exited")
+        message = json.loads(line)
+        if message.get("id") != request_id:
+            raise ConnectionError("eslint daemon response out of sync")
+        if "error" in message:
+            raise RuntimeError(message["error"])
+        return message["results"], message.get("rss", 0)
+
+    async def stop(self) -> None:
+        if self.alive:
+            self.proc.kill()
+        if self.proc is not None:
+            await self.proc.wait()
+        self.proc = None
+
+
+_idle: Optional[asyncio.Queue] = None
+_daemons: list[_Daemon] = []
+_unavailable_until = 0.0
+
+_stats = {
+    "requests": 0,
+    "restarts": 0,
+    "crashes": 0,
+    "recycled": 0,
+    "fallbacks": 0,
+}
+
+
+def _get_idle_queue() -> asyncio.Queue:
+    global _idle
+    if _idle is None:
+        _idle = asyncio.Queue()
+        for _ in range(ESLINT_DAEMON_POOL_SIZE):
+            daemon = _Daemon()
+            _daemons.append(daemon)
+            _idle.put_nowait(daemon)
+    return _idle
+
+
+async def start_eslint_daemons() -> None:
+    """Start every daemon up front so the first requests skip Node startup."""
+    global _unavailable_until
+    _get_idle_queue()
+    for daemon in _daemons:
+        if daemon.alive:
+            continue
+        try:
+            await daemon.start()
+        except DaemonUnavailable as e:
+            logger.warning(f"ESLint daemon unavailable, using the CLI: {e}")
+            _unavailable_until = time.monotonic() + _RETRY_AFTER_SECONDS
+            return
+    logger.info(f"ESLint daemon pool started with {ESLINT_DAEMON_POOL_SIZE} processes")
+
+
+async def stop_eslint_daemons() -> None:
+    for daemon in _daemons:
+        await daemon.stop()
+
+
+async def lint_with_daemon(code: str) -> Optional[list]:
+    """Lint JavaScript on a warm daemon.
+
+    Returns static_analyzer issue dicts, or None when the daemon path cannot
+    serve the request and the caller should fall back to the ESLint CLI.
+    Crashed daemons are restarted on next use; daemons whose RSS exceeds
+    ESLINT_DAEMON_MAX_RSS_MB are recycled after the request.
+    """
+    global _unavailable_until
+    if time.monotonic() < _unavailable_until:
+        _stats["fallbacks"] += 1
+        return None
+
+    idle = _get_idle_queue()
+    daemon = await idle.get()
+    try:
+        if not daemon.alive:
+            try:
+                await daemon.start()
+            except DaemonUnavailable as e:
+                logger.warning(f"ESLint daemon unavailable, using the CLI: {e}")
+                _unavailable_until = time.monotonic() + _RETRY_AFTER_SECONDS
+                _stats["fallbacks"] += 1
+                return None
+            _stats["restarts"] += 1
+
+        try:
+            results, rss = await daemon.lint(code)
+        except RuntimeError as e:
+            logger.warning(f"ESLint daemon could not lint snippet: {e}")
+            _stats["fallbacks"] += 1
+            return None
+        except (asyncio.TimeoutError, ConnectionError, json.JSONDecodeError, OSError) as e:
+            logger.error(f"ESLint daemon failed, restarting it: {e}")
+            _stats["crashes"] += 1
+            _stats["fallbacks"] += 1
+            await daemon.stop()
+            return None
+        except BaseException:
+            # Cancelled mid-request: the pending response would desync the pipe
+            await daemon.stop()
+            raise
+
+        _stats["requests"] += 1
+        if rss > ESLINT_DAEMON_MAX_RSS_MB * 1024 * 1024:
+            _stats["recycled"] += 1
+            await daemon.stop()
+        return _eslint_results_to_issues(results)
+    finally:
+        idle.put_nowait(daemon)
+
+
+def daemon_stats() -> dict:
+    return {
+        **_stats,
+        "pool_size": ESLINT_DAEMON_POOL_SIZE,
+        "alive": sum(1 for d in _daemons if d.alive),
+    }
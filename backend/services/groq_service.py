@@ -1,15 +1,26 @@
 import json
 import logging
 import re
+from typing import AsyncIterator
 from groq import Groq
-from config.settings import GROQ_API_KEY
+from services.llm_stream_parser import IncrementalResultParser, parse_result_json
+from services.prompt_builder import BuiltPrompt, build_prompt, estimate_tokens
+from services.llm_backend import LLMError, complete_with_policy, stream_with_policy
+from services.model_router import RouteDecision, escalate, route_for
+from services.code_diff import DiffApplyError, apply_unified_diff
+from config.settings import GROQ_API_KEY, LLM_MODEL, PROMPT_TOKEN_BUDGET
 
 logger = logging.getLogger(__name__)
 
-MODEL = "llama-3.3-70b-versatile"
+MODEL = LLM_MODEL
 
 _client = None
 
+_diff_stats = {
+    "diff_applied": 0,
+    "diff_fallbacks": 0,
+}
+
 
 def _get_client() -> Groq:
     global _client
@@ -21,6 +32,18 @@ def _get_client() -> Groq:
 
 
 def _safe_parse_json(raw_content: str) -> dict:
+    """Extract and parse the JSON object from LLM output.
+
+    Uses the single-pass incremental parser, falling back to the multi-strategy
+    scan for output it cannot make sense of.
+    """
+    try:
+        return parse_result_json(raw_content)
+    except json.JSONDecodeError:
+        return _scan_parse_json(raw_content)
+
+
+def _scan_parse_json(raw_content: str) -> dict:
     """Try multiple strategies to extract and parse JSON from LLM output."""
     # Strategy 1: extract JSON from markdown fences
     fenced = re.search(r'```(?:json)?\s*\n?(.*?)\n?```', raw_content, re.DOTALL)
@@ -71,68 +94,287 @@ def _safe_parse_json(raw_content: str) -> dict:
     raise json.JSONDecodeError("No valid JSON object found in LLM output", raw_content, 0)
 
 
+def _build_prompt(
+    language: str,
+    mode: str,
+    instruction: str,
+    code: str,
+    static_issues: list,
+    variant: str = "full",
+    output: str = "code",
+) -> BuiltPrompt:
+    """Build the analysis prompt sent to the LLM, compacted to PROMPT_TOKEN_BUDGET."""
+    prompt = build_prompt(language, mode, instruction, code, static_issues, variant=variant, output=output)
+    if prompt.compactions:
+        logger.info(f"Prompt compacted to ~{prompt.estimated_tokens} tokens: {', '.join(prompt.compactions)}")
+    if prompt.over_budget:
+        logger.warning(
+            f"Prompt is still ~{prompt.estimated_tokens} tokens after compaction, "
+            f"over the {PROMPT_TOKEN_BUDGET}-token budget"
+        )
+    return prompt
+
+
+def _completion_kwargs(prompt: BuiltPrompt, route: RouteDecision = None) -> dict:
+    return {
+        "model": route.model if route else MODEL,
+        "messages": [{"role": "user", "content": prompt.text}],
+        "temperature": 0.2,
+        "max_tokens": route.max_tokens if route else 8192,
+        "response_format": {"type": "json_object"},
+    }
+
+
+def _token_usage(prompt: BuiltPrompt, usage=None, content: str = "") -> dict:
+    """Token counts for one completion; estimated when the API reported none."""
+    if usage is not None:
+        counts = {"prompt_tokens": usage.prompt_tokens, "completion_tokens": usage.completion_tokens, "measured": True}
+    else:
+        counts = {"prompt_tokens": prompt.estimated_tokens, "completion_tokens": estimate_tokens(content), "measured": False}
+    return {**counts, **prompt.stats()}
+
+
+def _parse_result(content: str, code: str, prompt: BuiltPrompt, usage=None) -> dict:
+    return _result_from_data(_safe_parse_json(content), code, prompt, usage, content)
+
+
+def _optimized_code(data: dict, code: str, prompt: BuiltPrompt) -> str:
+    """The model's optimized code, applying its diff in diff output mode. Raises DiffApplyError."""
+    if prompt.output == "diff" and "optimized_code" not in data:
+        diff = data.get("optimized_diff") or ""
+        optimized = apply_unified_diff(prompt.code, diff) if isinstance(diff, str) else None
+        if optimized is None:
+            raise DiffApplyError("optimized_diff is not a string")
+        _diff_stats["diff_applied"] += 1
+        return prompt.restore_elisions(optimized)
+    return prompt.restore_elisions(data.get("optimized_code", code))
+
+
+def _result_from_data(data: dict, code: str, prompt: BuiltPrompt, usage=None, content: str = "") -> dict:
+    return {
+        "ai_issues": data.get("ai_issues", []),
+        "optimized_code": _optimized_code(data, code, prompt),
+        "explanation": data.get("explanation", ""),
+        "token_usage": _token_usage(prompt, usage, content),
+    }
+
+
+def _failed_result(
+    code: str,
+    explanation: str,
+    prompt: BuiltPrompt,
+    usage=None,
+    content: str = "",
+    error_kind: str = "invalid_response",
+) -> dict:
+    return {
+        "ai_issues": [],
+        "optimized_code": code,
+        "explanation": explanation,
+        "failed": True,
+        "error": error_kind,
+        "token_usage": _token_usage(prompt, usage, content),
+    }
+
+
+def _routed(result: dict, route: RouteDecision) -> dict:
+    result["routing"] = route.as_dict()
+    return result
+
+
+def _truncated_result(code: str, prompt: BuiltPrompt, usage=None, content: str = "") -> dict:
+    logger.warning("LLM completion stopped at max_tokens")
+    return _failed_result(
+        code, "The AI response was cut off at its length limit.", prompt, usage, content, "truncated"
+    )
+
+
+def _with_earlier_usage(result: dict, earlier: dict) -> dict:
+    """Add the token usage of an *earlier* call this one replaces to *result*."""
+    usage = result["token_usage"]
+    earlier_usage = earlier["token_usage"]
+    usage["prompt_tokens"] += earlier_usage["prompt_tokens"]
+    usage["completion_tokens"] += earlier_usage["completion_tokens"]
+    usage["measured"] = usage["measured"] and earlier_usage["measured"]
+    return result
+
+
+def _error_result(code: str, error: LLMError, prompt: BuiltPrompt, content: str = "") -> dict:
+    logger.error(f"LLM call failed ({error.kind}): {error}")
+    return _failed_result(code, f"AI analysis unavailable: {error}", prompt, content=content, error_kind=error.kind)
+
+
 def analyze_with_groq(language: str, mode: str, instruction: str, code: str, static_issues: list) -> dict:
     """Send code and static analysis results to Groq LLM for enhanced analysis."""
-    static_summary = json.dumps(static_issues, indent=2) if static_issues else "None found."
-
-    prompt = f"""You are an expert code reviewer performing a {mode} analysis of {language} code.
-
-User instruction: {instruction or "Perform a thorough analysis."}
-
-Static analysis tools found these issues:
-{static_summary}
-
-Source code to analyze:
-```{language}
-{code}
-```
-
-Please provide a comprehensive analysis. Your response MUST be valid JSON with this exact structure:
-{{
-  "ai_issues": [
-    {{
-      "type": "string (issue category)",
-      "line": <integer line number or 0 if unknown>,
-      "severity": "HIGH | MEDIUM | LOW",
-      "message": "brief description of the issue",
-      "explanation": "detailed explanation of why this is an issue",
-      "suggestion": "specific actionable fix suggestion"
-    }}
-  ],
-  "optimized_code": "the full refactored/optimized version of the code",
-  "explanation": "overall summary of the analysis and key improvements made"
-}}
-
-Instructions:
-1. Explain each static finding listed above (include them in ai_issues with explanation/suggestion).
-2. Detect additional issues not caught by static tools.
-3. Suggest refactoring improvements.
-4. Provide the optimized code in the optimized_code field.
-5. Return ONLY valid JSON, no markdown fences, no extra text."""
+    prompt = _build_prompt(language, mode, instruction, code, static_issues)
 
     content = ""
+    usage = None
     try:
         client = _get_client()
         logger.info(f"Calling Groq API with model {MODEL}...")
-        response = client.chat.completions.create(
-            model=MODEL,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.2,
-            max_tokens=8192,
-            response_format={"type": "json_object"},
-        )
+        response = client.chat.completions.create(**_completion_kwargs(prompt))
         logger.info("Groq API response received successfully.")
+        usage = response.usage
         content = response.choices[0].message.content.strip()
-        data = _safe_parse_json(content)
-        return {
-            "ai_issues": data.get("ai_issues", []),
-            "optimized_code": data.get("optimized_code", code),
-            "explanation": data.get("explanation", ""),
-        }
+        return _parse_result(content, code, prompt, usage)
     except json.JSONDecodeError as e:
         logger.error(f"JSON decode failed: {e}")
         logger.error(f"Raw Groq response: {content}")
-        return {"ai_issues": [], "optimized_code": code, "explanation": "Analysis could not be completed. Please try again."}
+        return _failed_result(code, "Analysis could not be completed. Please try again.", prompt, usage, content)
     except Exception as e:
         logger.error(f"Groq API error: {e}", exc_info=True)
-        return {"ai_issues": [], "optimized_code": code, "explanation": "An error occurred while contacting the AI service."}
+        return _failed_result(code, "An error occurred while contacting the AI service.", prompt, usage, content)
+
+
+async def analyze_with_groq_async(language: str, mode: str, instruction: str, code: str, static_issues: list) -> dict:
+    """Async variant of analyze_with_groq that does not block the event loop.
+
+    Goes through the configured LLM backend (see services.llm_backend) with
+    its deadline, retry and hedging policy, on the model picked by
+    services.model_router; the decision is returned under "routing". Failures
+    return a fallback result whose "error" names the kind of failure.
+
+    When the route asks for diff output, the model returns unified-diff hunks
+    that are applied to *code* here. If they do not apply, the call is
+    repeated in full-text mode. A completion cut off at the route's max_tokens
+    is repeated on the routing table's fallback row (model_router.escalate).
+    The reported token usage covers every call.
+    """
+    route = route_for(language, mode, code)
+    result = await _analyze_routed(language, mode, instruction, code, static_issues, route)
+    diff_fallback = False
+    if result.get("error") == "diff_rejected":
+        _diff_stats["diff_fallbacks"] += 1
+        diff_fallback = True
+        route = route._replace(output="code")
+        result = _with_earlier_usage(
+            await _analyze_routed(language, mode, instruction, code, static_issues, route), result
+        )
+    if result.get("error") == "truncated":
+        escalated = escalate(route)
+        if escalated is not None:
+            result = _with_earlier_usage(
+                await _analyze_routed(language, mode, instruction, code, static_issues, escalated), result
+            )
+            result["routing"]["escalated_from"] = route.rule
+    if diff_fallback:
+        result["routing"]["diff_fallback"] = True
+    return result
+
+
+async def _analyze_routed(
+    language: str, mode: str, instruction: str, code: str, static_issues: list, route: RouteDecision
+) -> dict:
+    prompt = _build_prompt(language, mode, instruction, code, static_issues, route.prompt_variant, route.output)
+
+    content = ""
+    usage = None
+    try:
+        logger.info(f"Calling LLM with model {route.model} (route {route.rule}, {route.output} output)...")
+        completion = await complete_with_policy(_completion_kwargs(prompt, route))
+        logger.info(f"LLM response received in {completion.latency:.2f}s{' (hedged)' if completion.hedged else ''}.")
+        usage = completion.usage
+        content = completion.content.strip()
+        if completion.finish_reason == "length":
+            return _routed(_truncated_result(code, prompt, usage, content), route)
+        return _routed(_parse_result(content, code, prompt, usage), route)
+    except LLMError as e:
+        return _routed(_error_result(code, e, prompt), route)
+    except DiffApplyError as e:
+        logger.warning(f"Model diff did not apply, retrying with full-text output: {e}")
+        return _routed(
+            _failed_result(code, "The model's diff did not apply.", prompt, usage, content, "diff_rejected"), route
+        )
+    except json.JSONDecodeError as e:
+        logger.error(f"JSON decode failed: {e}")
+        logger.error(f"Raw LLM response: {content}")
+        return _routed(
+            _failed_result(code, "Analysis could not be completed. Please try again.", prompt, usage, content), route
+        )
+    except Exception as e:
+        # A malformed response shape or a backend bug must not fail the whole analysis
+        logger.error(f"LLM analysis error: {e}", exc_info=True)
+        return _routed(
+            _failed_result(
+                code, "An error occurred while contacting the AI service.", prompt, usage, content, "unexpected"
+            ),
+            route,
+        )
+
+
+async def stream_analysis_with_groq(
+    language: str, mode: str, instruction: str, code: str, static_issues: list
+) -> AsyncIterator[tuple[str, object]]:
+    """Stream the LLM analysis, yielding parser events as they complete.
+
+    Yields ("ai_issue", issue) as each issue closes and ("field", (key, value))
+    as each top-level field closes, with elisions already restored in
+    optimized_code. The last event is always ("result", dict)
+    with the same shape that analyze_with_groq_async returns. If the stream
+    stops at max_tokens, the analysis is repeated without streaming on the
+    fallback route and only its result is yielded; events already yielded
+    came from the truncated answer. JSON mode is not requested because it
+    cannot be combined with streamed completions; the prompt already demands
+    bare JSON and the parsers tolerate stray prose or fences.
+    """
+    # The optimized code is streamed as it arrives, which a diff cannot be
+    route = route_for(language, mode, code, allow_diff=False)
+    prompt = _build_prompt(language, mode, instruction, code, static_issues, route.prompt_variant)
+    kwargs = _completion_kwargs(prompt, route)
+    kwargs.pop("response_format")
+
+    parser = IncrementalResultParser()
+    parts = []
+    usage = None
+    finish_reason = None
+    try:
+        logger.info(f"Streaming LLM completion with model {route.model} (route {route.rule})...")
+        async for kind, value in stream_with_policy(kwargs):
+            if kind == "usage":
+                usage = value
+                continue
+            if kind == "finish":
+                finish_reason = value
+                continue
+            parts.append(value)
+            for event in parser.feed(value):
+                if event[0] == "field" and event[1][0] == "optimized_code" and isinstance(event[1][1], str):
+                    # The model saw the compacted code; give clients the elided lines back
+                    event = "field", ("optimized_code", prompt.restore_elisions(event[1][1]))
+                yield event
+        logger.info("LLM stream completed successfully.")
+    except LLMError as e:
+        yield "result", _routed(_error_result(code, e, prompt, "".join(parts)), route)
+        return
+
+    content = "".join(parts).strip()
+    if finish_reason == "length":
+        truncated = _routed(_truncated_result(code, prompt, usage, content), route)
+        escalated = escalate(route)
+        if escalated is None:
+            yield "result", truncated
+            return
+        result = await _analyze_routed(language, mode, instruction, code, static_issues, escalated)
+        result["routing"]["escalated_from"] = route.rule
+        yield "result", _with_earlier_usage(result, truncated)
+        return
+
+    try:
+        yield "result", _routed(_result_from_data(parser.result(), code, prompt, usage, content), route)
+        return
+    except json.JSONDecodeError:
+        pass
+
+    try:
+        yield "result", _routed(_parse_result(content, code, prompt, usage), route)
+    except json.JSONDecodeError as e:
+        logger.error(f"JSON decode failed: {e}")
+        logger.error(f"Raw Groq response: {content}")
+        yield "result", _routed(
+            _failed_result(code, "Analysis could not be completed. Please try again.", prompt, usage, content), route
+        )
+
+
+def diff_output_stats() -> dict:
+    return dict(_diff_stats)
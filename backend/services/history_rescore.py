@@ -0,0 +1,68 @@
+import logging
+from collections import defaultdict
+from typing import Optional
+from sqlalchemy import select, update
+from database import AsyncSessionLocal
+from models.analysis_history import AnalysisHistory
+from services.confidence_engine import ConfidenceWeights, compute_confidence_batch
+from services.user_stats import adjust_confidence
+from config.settings import RESCORE_BATCH_SIZE
+
+logger = logging.getLogger(__name__)
+
+
+def rescore_batch_query(last_id: int, batch_size: int):
+    return (
+        select(
+            AnalysisHistory.id, AnalysisHistory.user_id,
+            AnalysisHistory.aggregated_issues, AnalysisHistory.confidence_score,
+        )
+        .where(AnalysisHistory.id > last_id)
+        .order_by(AnalysisHistory.id)
+        .limit(batch_size)
+        # An enrichment finishing meanwhile would otherwise be counted on the old score
+        .with_for_update()
+    )
+
+
+async def rescore_history(
+    weights: Optional[ConfidenceWeights] = None,
+    batch_size: int = RESCORE_BATCH_SIZE,
+) -> dict:
+    """Recompute confidence_score for every analysis_history row with *weights*.
+
+    Walks the table in primary-key order, batch_size rows at a time, loading
+    only (id, user_id, aggregated_issues, confidence_score). Each batch is
+    scored with compute_confidence_batch and the changed rows are written back
+    with one bulk UPDATE, together with their owners' confidence_sum, and
+    committed, so the job can be interrupted and re-run.
+    """
+    scanned = 0
+    updated = 0
+    last_id = 0
+    while True:
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(rescore_batch_query(last_id, batch_size))
+            rows = result.all()
+            if not rows:
+                break
+
+            scores = compute_confidence_batch([row.aggregated_issues or [] for row in rows], weights)
+            changes = []
+            deltas = defaultdict(float)
+            for row, score in zip(rows, scores):
+                if row.confidence_score != score:
+                    changes.append({"id": row.id, "confidence_score": score})
+                    deltas[row.user_id] += score - (row.confidence_score or 0)
+            if changes:
+                # Bulk UPDATE by primary key (executemany)
+                await session.execute(update(AnalysisHistory), changes)
+                await adjust_confidence(session, deltas)
+            await session.commit()
+
+        scanned += len(rows)
+        updated += len(changes)
+        last_id = rows[-1].id
+        logger.info(f"Re-scored {scanned} analyses so far ({updated} changed)")
+
+    return {"scanned": scanned, "updated": updated}
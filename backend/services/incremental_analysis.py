@@ -0,0 +1,176 @@
+import difflib
+import logging
+from typing import Optional
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.sql import func
+from database import AsyncSessionLocal
+from models.file_analysis_snapshot import FileAnalysisSnapshot
+from services.code_chunker import expand_to_definitions, merge_ranges
+from config.settings import (
+    INCREMENTAL_CONTEXT_LINES,
+    INCREMENTAL_MAX_CHANGED_RATIO,
+    CHUNK_MAX_LINES,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class EditPlan:
+    """How a new version of a file relates to the last analyzed one.
+
+    `regions` are the (start, end) line ranges of the new code that must be
+    re-analyzed; `line_map` maps every unchanged old line to its new number.
+    """
+
+    def __init__(self, regions: list, line_map: dict, total_lines: int):
+        self.regions = regions
+        self.line_map = line_map
+        self.total_lines = total_lines
+
+    @property
+    def changed_lines(self) -> int:
+        return sum(end - start + 1 for start, end in self.regions)
+
+    def in_regions(self, line: int) -> bool:
+        return any(start <= line <= end for start, end in self.regions)
+
+
+def plan_edit(language: str, old_code: str, new_code: str) -> Optional[EditPlan]:
+    """Diff *old_code* against *new_code* and decide what to re-analyze.
+
+    Returns None when the edit is too large for incremental analysis to pay
+    off (more than INCREMENTAL_MAX_CHANGED_RATIO of the file).
+    """
+    old_lines = old_code.splitlines()
+    new_lines = new_code.splitlines()
+    total = len(new_lines)
+    if not total:
+        return None
+
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    line_map = {}
+    touched = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            for k in range(i2 - i1):
+                line_map[i1 + k + 1] = j1 + k + 1
+            continue
+        # Pure deletions touch the lines on either side of the gap
+        start, end = (j1 + 1, j2) if j2 > j1 else (j1, j1 + 1)
+        touched.append((
+            max(1, start - INCREMENTAL_CONTEXT_LINES),
+            min(total, end + INCREMENTAL_CONTEXT_LINES),
+        ))
+
+    regions = expand_to_definitions(language, new_code, merge_ranges(touched), CHUNK_MAX_LINES)
+    plan = EditPlan(regions, line_map, total)
+    if plan.changed_lines > INCREMENTAL_MAX_CHANGED_RATIO * total:
+        return None
+    return plan
+
+
+def carry_forward(issues: list, plan: EditPlan) -> list:
+    """Shift issues of the previous analysis that lie outside the re-analyzed regions.
+
+    Issues on changed or deleted lines are dropped; file-level issues (line 0)
+    are kept as they are.
+    """
+    carried = []
+    for issue in issues:
+        line = issue.get("line", 0)
+        if not isinstance(line, int) or line <= 0:
+            carried.append({**issue, "reused": True})
+            continue
+        new_line = plan.line_map.get(line)
+        if new_line is None or plan.in_regions(new_line):
+            continue
+        carried.append({**issue, "line": new_line, "reused": True})
+    return carried
+
+
+def rebase_edits(old_code: str, old_optimized: str, plan: EditPlan) -> list:
+    """Carry the previous optimization's edits over to the new code.
+
+    Diffs *old_code* against the *old_optimized* version of it and maps each
+    edit through the plan's line map. Returns (start, end, text) replacements in
+    new-code coordinates for stitch_code; an insertion is (line, line - 1, text).
+    Edits whose lines changed, were deleted or fall in a re-analyzed region are
+    dropped, since the model rewrites those regions anyway.
+    """
+    old_lines = old_code.splitlines()
+    optimized_lines = old_optimized.splitlines()
+    matcher = difflib.SequenceMatcher(None, old_lines, optimized_lines, autojunk=False)
+    edits = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            continue
+        text = "\n".join(optimized_lines[j1:j2])
+        if i2 > i1:
+            new_lines = [plan.line_map.get(line) for line in range(i1 + 1, i2 + 1)]
+            if None in new_lines or new_lines != list(range(new_lines[0], new_lines[0] + len(new_lines))):
+                continue
+            if any(plan.in_regions(line) for line in new_lines):
+                continue
+            edits.append((new_lines[0], new_lines[-1], text))
+            continue
+        # Pure insertion before old line i1 + 1: both neighbours must survive
+        # unchanged and still be adjacent
+        after = plan.line_map.get(i1) if i1 else 0
+        before = plan.line_map.get(i1 + 1) if i1 < len(old_lines) else plan.total_lines + 1
+        if after is None or before != after + 1:
+            continue
+        if plan.in_regions(after) or plan.in_regions(before):
+            continue
+        edits.append((before, after, text))
+    return edits
+
+
+def stitch_code(code: str, replacements: list) -> str:
+    """Replace (start, end, text) line ranges of *code*, given in ascending order.
+
+    An empty text deletes the range; start == end + 1 inserts before line start.
+    """
+    lines = code.splitlines()
+    parts = []
+    position = 1
+    for start, end, text in replacements:
+        parts.extend(lines[position - 1:start - 1])
+        parts.extend(text.splitlines())
+        position = max(position, end + 1)
+    parts.extend(lines[position - 1:])
+    return "\n".join(parts)
+
+
+async def load_snapshot(file_id: int) -> Optional[FileAnalysisSnapshot]:
+    try:
+        async with AsyncSessionLocal() as session:
+            return await session.get(FileAnalysisSnapshot, file_id)
+    except Exception as e:
+        logger.warning(f"Loading analysis snapshot for file {file_id} failed: {e}")
+        return None
+
+
+async def save_snapshot(file_id: int, language: str, mode: str, instruction: str, code: str, result: dict) -> None:
+    """Record *result* as the latest analysis of the file, replacing any earlier one."""
+    values = {
+        "file_id": file_id,
+        "language": language,
+        "mode": mode,
+        "instruction": instruction or "",
+        "code": code,
+        "result": result,
+    }
+    stmt = insert(FileAnalysisSnapshot).values(**values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[FileAnalysisSnapshot.file_id],
+        set_={
+            **{key: stmt.excluded[key] for key in values if key != "file_id"},
+            "updated_at": func.now(),
+        },
+    )
+    try:
+        async with AsyncSessionLocal() as session:
+            await session.execute(stmt)
+            await session.commit()
+    except Exception as e:
+        logger.warning(f"Saving analysis snapshot for file {file_id} failed: {e}")
@@ -0,0 +1,303 @@
+import asyncio
+import logging
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from sqlalchemy import select, update, or_, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import AsyncSessionLocal
+from models.analysis_job import AnalysisJob
+from models.analysis_history import AnalysisHistory
+from services.analysis_pipeline import run_analysis, history_records, apply_enrichment
+from services.user_stats import adjust_confidence, count_analyses
+from config.settings import (
+    JOB_MAX_ATTEMPTS,
+    JOB_RETRY_BASE_SECONDS,
+    JOB_LOCK_TIMEOUT_SECONDS,
+    JOB_HEARTBEAT_SECONDS,
+    JOB_WORKER_CONCURRENCY,
+    JOB_POLL_INTERVAL_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+async def enqueue_job(
+    db: AsyncSession,
+    language: str,
+    mode: str,
+    instruction: str,
+    code: str,
+    user_id: Optional[int] = None,
+    project_id: Optional[int] = None,
+    file_id: Optional[int] = None,
+    file_name: Optional[str] = None,
+    analysis_id: Optional[int] = None,
+    enrichment: bool = False,
+) -> AnalysisJob:
+    """Persist a queued analysis job and commit it.
+
+    An *enrichment* job updates the existing history row *analysis_id* (a
+    fast, static-only analysis) when it succeeds instead of adding a row.
+    """
+    job = AnalysisJob(
+        id=uuid.uuid4().hex,
+        user_id=user_id,
+        project_id=project_id,
+        file_id=file_id,
+        file_name=file_name,
+        language=language,
+        mode=mode,
+        instruction=instruction,
+        code=code,
+        status=QUEUED,
+        attempts=0,
+        max_attempts=JOB_MAX_ATTEMPTS,
+        analysis_id=analysis_id,
+        enrichment=enrichment,
+    )
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
+    return job
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff with full jitter for the given number of attempts so far."""
+    return random.uniform(0, JOB_RETRY_BASE_SECONDS * (2 ** max(0, attempts - 1)))
+
+
+def claim_query(now: datetime, stale: datetime):
+    """The next due queued job, or a running one whose lock went stale before *stale*."""
+    return (
+        select(AnalysisJob)
+        .where(or_(
+            and_(AnalysisJob.status == QUEUED, AnalysisJob.run_after <= now),
+            and_(AnalysisJob.status == RUNNING, AnalysisJob.locked_at < stale),
+        ))
+        .order_by(AnalysisJob.run_after.asc())
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+
+
+def locked_job_query(job_id: str, locked_by: str):
+    return (
+        select(AnalysisJob)
+        .where(
+            AnalysisJob.id == job_id,
+            AnalysisJob.locked_by == locked_by,
+            AnalysisJob.status == RUNNING,
+        )
+        .with_for_update()
+    )
+
+
+async def claim_job(worker_id: str) -> Optional[AnalysisJob]:
+    """Claim the next runnable job, or None if the queue is empty.
+
+    Runnable means queued and due, or running under a lock that has not been
+    renewed for JOB_LOCK_TIMEOUT_SECONDS (its worker died). A stale job that
+    has used up its attempts is marked failed instead of run again. SKIP
+    LOCKED lets many workers poll concurrently without blocking on each
+    other's claims.
+    """
+    while True:
+        now = datetime.now(timezone.utc)
+        stale = now - timedelta(seconds=JOB_LOCK_TIMEOUT_SECONDS)
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(claim_query(now, stale))
+            job = result.scalar_one_or_none()
+            if job is None:
+                return None
+            if job.status == RUNNING and job.attempts >= job.max_attempts:
+                job.status = FAILED
+                job.last_error = f"Worker {job.locked_by} stopped renewing its lock on the last attempt"
+                job.locked_by = None
+                job.finished_at = now
+                await session.commit()
+                logger.error(f"Job {job.id} failed after {job.attempts} attempts: its worker went away")
+                continue
+            job.status = RUNNING
+            job.attempts += 1
+            job.locked_by = worker_id
+            job.locked_at = now
+            await session.commit()
+            return job
+
+
+async def _renew_lock(job: AnalysisJob) -> bool:
+    """Move the job's locked_at forward; False if its worker no longer holds it."""
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            update(AnalysisJob)
+            .where(
+                AnalysisJob.id == job.id,
+                AnalysisJob.locked_by == job.locked_by,
+                AnalysisJob.status == RUNNING,
+            )
+            .values(locked_at=datetime.now(timezone.utc))
+        )
+        await session.commit()
+        return result.rowcount == 1
+
+
+async def _heartbeat(job: AnalysisJob) -> None:
+    """Renew the job's lock every JOB_HEARTBEAT_SECONDS; returns once the lock is lost."""
+    while True:
+        await asyncio.sleep(JOB_HEARTBEAT_SECONDS)
+        try:
+            if not await _renew_lock(job):
+                return
+        except Exception as e:
+            # The lock only goes stale after JOB_LOCK_TIMEOUT_SECONDS; try again next beat
+            logger.warning(f"Renewing the lock on job {job.id} failed: {e}")
+
+
+async def _locked_job(session: AsyncSession, job: AnalysisJob) -> Optional[AnalysisJob]:
+    """The job's row, locked, if this worker still holds the job."""
+    result = await session.execute(locked_job_query(job.id, job.locked_by))
+    db_job = result.scalar_one_or_none()
+    if db_job is None:
+        logger.warning(f"Job {job.id} was reclaimed from {job.locked_by}; dropping its outcome")
+    return db_job
+
+
+async def _finish_job(job: AnalysisJob, result: dict) -> None:
+    """Save history for the job's owner and mark it succeeded, atomically.
+
+    Does nothing if another worker has reclaimed the job meanwhile.
+    """
+    async with AsyncSessionLocal() as session:
+        db_job = await _locked_job(session, job)
+        if db_job is None:
+            return
+        analysis_id = None
+        if job.enrichment:
+            # The row may have been deleted since; then there is nothing to update.
+            # Locked, so a concurrent rescore cannot change the score under the delta.
+            record = (
+                await session.get(AnalysisHistory, job.analysis_id, with_for_update=True)
+                if job.analysis_id else None
+            )
+            if record is not None:
+                old_score = record.confidence_score or 0
+                apply_enrichment(record, result)
+                await adjust_confidence(
+                    session, {record.user_id: (record.confidence_score or 0) - old_score}
+                )
+                analysis_id = record.id
+        elif job.user_id is not None:
+            records = history_records(
+                user_id=job.user_id,
+                language=job.language,
+                mode=job.mode,
+                instruction=job.instruction,
+                code=job.code,
+                result=result,
+                project_id=job.project_id if job.file_name else None,
+                file_id=job.file_id,
+                file_name=job.file_name,
+            )
+            session.add_all(records)
+            await count_analyses(session, records)
+            await session.flush()
+            analysis_id = records[0].id
+        db_job.status = SUCCEEDED
+        db_job.result = result
+        db_job.analysis_id = analysis_id
+        db_job.last_error = None
+        db_job.locked_by = None
+        db_job.finished_at = datetime.now(timezone.utc)
+        await session.commit()
+
+
+async def _fail_job(job: AnalysisJob, error: str) -> None:
+    """Requeue with backoff, or mark failed once attempts are exhausted.
+
+    Does nothing if another worker has reclaimed the job meanwhile.
+    """
+    async with AsyncSessionLocal() as session:
+        db_job = await _locked_job(session, job)
+        if db_job is None:
+            return
+        db_job.last_error = error[:2000]
+        db_job.locked_by = None
+        if db_job.attempts < db_job.max_attempts:
+            delay = retry_delay(db_job.attempts)
+            db_job.status = QUEUED
+            db_job.run_after = datetime.now(timezone.utc) + timedelta(seconds=delay)
+            logger.warning(f"Job {job.id} attempt {db_job.attempts} failed, retrying in {delay:.1f}s: {error}")
+        else:
+            db_job.status = FAILED
+            db_job.finished_at = datetime.now(timezone.utc)
+            logger.error(f"Job {job.id} failed after {db_job.attempts} attempts: {error}")
+        await session.commit()
+
+
+async def process_job(job: AnalysisJob) -> None:
+    """Run a claimed job, renewing its lock until it finishes.
+
+    If the lock is lost (another worker reclaimed the job), the analysis is
+    abandoned and its outcome discarded.
+    """
+    analysis = asyncio.create_task(run_analysis(
+        job.language,
+        job.mode,
+        job.instruction or "",
+        job.code,
+        raise_on_llm_failure=True,
+        file_id=job.file_id if job.file_name else None,
+    ))
+    heartbeat = asyncio.create_task(_heartbeat(job))
+    try:
+        await asyncio.wait({analysis, heartbeat}, return_when=asyncio.FIRST_COMPLETED)
+    except asyncio.CancelledError:
+        analysis.cancel()
+        heartbeat.cancel()
+        raise
+    heartbeat.cancel()
+    if not analysis.done():
+        analysis.cancel()
+        logger.warning(f"Job {job.id} lost its lock to another worker; abandoned")
+        return
+    try:
+        result, _ = analysis.result()
+    except Exception as e:
+        await _fail_job(job, str(e) or type(e).__name__)
+        return
+    await _finish_job(job, result)
+
+
+async def _worker_loop(worker_id: str, stopping: asyncio.Event) -> None:
+    while not stopping.is_set():
+        try:
+            job = await claim_job(worker_id)
+        except Exception as e:
+            logger.error(f"Claiming a job failed: {e}", exc_info=True)
+            job = None
+        if job is None:
+            try:
+                await asyncio.wait_for(stopping.wait(), timeout=JOB_POLL_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            continue
+        logger.info(f"{worker_id} processing job {job.id} (attempt {job.attempts})")
+        await process_job(job)
+
+
+async def run_worker(stopping: asyncio.Event, concurrency: int = JOB_WORKER_CONCURRENCY) -> None:
+    """Process jobs with *concurrency* claim loops until *stopping* is set.
+
+    In-flight jobs are finished before returning.
+    """
+    base_id = uuid.uuid4().hex[:8]
+    await asyncio.gather(*(
+        _worker_loop(f"worker-{base_id}-{i}", stopping) for i in range(concurrency)
+    ))
@@ -0,0 +1,416 @@
+import abc
+import asyncio
+import collections
+import logging
+import random
+import time
+from typing import AsyncIterator, NamedTuple, Optional
+import httpx
+import groq
+from groq import AsyncGroq, DefaultAsyncHttpxClient
+from config.settings import (
+    GROQ_API_KEY,
+    GROQ_MAX_CONCURRENCY,
+    GROQ_MAX_CONNECTIONS,
+    GROQ_TIMEOUT_SECONDS,
+    LLM_BACKEND,
+    LLM_BASE_URL,
+    LLM_DEADLINE_SECONDS,
+    LLM_MAX_ATTEMPTS,
+    LLM_RETRY_BASE_SECONDS,
+    LLM_HEDGE_ENABLED,
+    LLM_HEDGE_PERCENTILE,
+    LLM_HEDGE_MIN_SAMPLES,
+)
+
+logger = logging.getLogger(__name__)
+
+# Error kinds
+TIMEOUT = "timeout"
+RATE_LIMITED = "rate_limited"
+SERVER_ERROR = "server_error"
+CONNECTION = "connection"
+BAD_REQUEST = "bad_request"
+CONFIGURATION = "configuration"
+
+_RETRYABLE = {TIMEOUT, RATE_LIMITED, SERVER_ERROR, CONNECTION}
+
+
+class LLMError(Exception):
+    """A failed completion, classified so callers can tell transient from permanent failures."""
+
+    def __init__(self, kind: str, message: str, status: Optional[int] = None, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.kind = kind
+        self.status = status
+        self.retry_after = retry_after
+
+    @property
+    def retryable(self) -> bool:
+        return self.kind in _RETRYABLE
+
+
+class Completion(NamedTuple):
+    content: str
+    usage: object
+    latency: float
+    hedged: bool = False
+    # "length" when the completion stopped at max_tokens
+    finish_reason: Optional[str] = None
+
+
+class LLMBackend(abc.ABC):
+    """A chat-completions provider. Subclasses translate their SDK's errors into LLMError."""
+
+    name = "base"
+
+    @abc.abstractmethod
+    async def complete(self, kwargs: dict, timeout: float) -> Completion:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def stream(self, kwargs: dict, timeout: float) -> AsyncIterator[tuple[str, object]]:
+        """Yield ("delta", text) for each content delta, ("usage", usage) when reported
+        and ("finish", reason) when the completion stops.
+
+        *timeout* bounds the wait for the stream to open; stream_with_policy
+        enforces the overall deadline between chunks."""
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+
+def _retry_after(response) -> Optional[float]:
+    try:
+        return float(response.headers.get("retry-after"))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+class GroqBackend(LLMBackend):
+    """Groq's API, or anything speaking it at LLM_BASE_URL (e.g. llm_standin.py)."""
+
+    name = "groq"
+
+    def __init__(self):
+        if GROQ_API_KEY is None and not LLM_BASE_URL:
+            raise LLMError(CONFIGURATION, "GROQ_API_KEY is not set. Check your .env file.")
+        self._client = AsyncGroq(
+            api_key=GROQ_API_KEY or "standin",
+            base_url=LLM_BASE_URL or None,
+            timeout=GROQ_TIMEOUT_SECONDS,
+            # Retries are handled by complete_with_policy, with jitter and a deadline
+            max_retries=0,
+            http_client=DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=GROQ_MAX_CONNECTIONS,
+                    max_keepalive_connections=GROQ_MAX_CONNECTIONS,
+                ),
+            ),
+        )
+
+    @staticmethod
+    def _translate(e: Exception) -> LLMError:
+        if isinstance(e, (asyncio.TimeoutError, groq.APITimeoutError)):
+            return LLMError(TIMEOUT, "The AI service did not respond in time.")
+        if isinstance(e, groq.APIConnectionError):
+            return LLMError(CONNECTION, f"Could not reach the AI service: {e}")
+        if isinstance(e, groq.APIStatusError):
+            status = e.status_code
+            if status == 429:
+                return LLMError(RATE_LIMITED, "The AI service is rate limiting requests.", status, _retry_after(e.response))
+            if status >= 500:
+                return LLMError(SERVER_ERROR, f"The AI service returned an error ({status}).", status, _retry_after(e.response))
+            return LLMError(BAD_REQUEST, f"The AI service rejected the request ({status}): {e.message}", status)
+        return LLMError(BAD_REQUEST, str(e) or type(e).__name__)
+
+    async def complete(self, kwargs: dict, timeout: float) -> Completion:
+        started = time.monotonic()
+        try:
+            response = await asyncio.wait_for(
+                self._client.chat.completions.create(**kwargs, timeout=timeout), timeout
+            )
+        except Exception as e:
+            raise self._translate(e) from e
+        choice = response.choices[0]
+        return Completion(
+            choice.message.content or "", response.usage, time.monotonic() - started,
+            finish_reason=choice.finish_reason,
+        )
+
+    async def stream(self, kwargs: dict, timeout: float) -> AsyncIterator[tuple[str, object]]:
+        stream = None
+        try:
+            stream = await asyncio.wait_for(
+                self._client.chat.completions.create(**kwargs, stream=True, timeout=timeout), timeout
+            )
+            async for chunk in stream:
+                # Groq reports usage on the final chunk
+                if chunk.x_groq is not None and chunk.x_groq.usage is not None:
+                    yield "usage", chunk.x_groq.usage
+                elif chunk.usage is not None:
+                    yield "usage", chunk.usage
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield "delta", chunk.choices[0].delta.content
+                if chunk.choices and chunk.choices[0].finish_reason:
+                    yield "finish", chunk.choices[0].finish_reason
+        except LLMError:
+            raise
+        except Exception as e:
+            raise self._translate(e) from e
+        finally:
+            # Stopped early (deadline, client gone): release the connection now
+            if stream is not None:
+                await stream.close()
+
+    async def close(self) -> None:
+        await self._client.close()
+
+
+BACKENDS = {
+    "groq": GroqBackend,
+}
+
+_backend: Optional[LLMBackend] = None
+_semaphore = None
+
+
+def get_backend() -> LLMBackend:
+    """Return the shared backend selected by LLM_BACKEND; its HTTP pool is reused across requests."""
+    global _backend
+    if _backend is None:
+        try:
+            factory = BACKENDS[LLM_BACKEND]
+        except KeyError:
+            raise LLMError(CONFIGURATION, f"Unknown LLM_BACKEND {LLM_BACKEND!r}; expected one of {sorted(BACKENDS)}")
+        _backend = factory()
+    return _backend
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    """Bound the number of in-flight completions (hedges included) per worker."""
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(GROQ_MAX_CONCURRENCY)
+    return _semaphore
+
+
+async def close_llm_backend() -> None:
+    """Close the shared backend. Called on application shutdown."""
+    global _backend
+    if _backend is not None:
+        await _backend.close()
+        _backend = None
+
+
+class _LatencyTracker:
+    """Recent successful completion latencies, for choosing the hedge delay."""
+
+    def __init__(self, size: int = 256):
+        self._samples = collections.deque(maxlen=size)
+
+    def add(self, latency: float) -> None:
+        self._samples.append(latency)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        if len(self._samples) < LLM_HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+_latencies = _LatencyTracker()
+
+_stats = {
+    "calls": 0,
+    "attempts": 0,
+    "retries": 0,
+    "hedges": 0,
+    "hedge_wins": 0,
+    "failures": 0,
+}
+
+
+def retry_delay(attempt: int, error: LLMError) -> float:
+    """Full-jitter exponential backoff, at least the server's Retry-After."""
+    delay = random.uniform(0, LLM_RETRY_BASE_SECONDS * (2 ** (attempt - 1)))
+    if error.retry_after is not None:
+        delay = max(delay, error.retry_after)
+    return delay
+
+
+_active = 0
+
+
+def current_load() -> float:
+    """Completions in flight or queued, as a fraction of GROQ_MAX_CONCURRENCY (may exceed 1)."""
+    return _active / GROQ_MAX_CONCURRENCY
+
+
+async def _attempt(backend: LLMBackend, kwargs: dict, timeout: float, hedged: bool = False) -> Completion:
+    global _active
+    _active += 1
+    try:
+        async with _get_semaphore():
+            _stats["attempts"] += 1
+            completion = await backend.complete(kwargs, timeout)
+    finally:
+        _active -= 1
+    _latencies.add(completion.latency)
+    return completion._replace(hedged=hedged)
+
+
+async def _hedged_attempt(backend: LLMBackend, kwargs: dict, deadline: float, hedge: bool) -> Completion:
+    """One attempt, plus a duplicate request if the first outlives the hedge delay."""
+    remaining = deadline - time.monotonic()
+    primary = asyncio.create_task(_attempt(backend, kwargs, remaining))
+    hedge_after = _latencies.percentile(LLM_HEDGE_PERCENTILE) if hedge else None
+    if hedge_after is None or hedge_after >= remaining:
+        return await primary
+
+    done, _ = await asyncio.wait({primary}, timeout=hedge_after)
+    if done:
+        return primary.result()
+
+    _stats["hedges"] += 1
+    secondary = asyncio.create_task(_attempt(backend, kwargs, deadline - time.monotonic(), hedged=True))
+    pending = {primary, secondary}
+    error = None
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is secondary:
+                        _stats["hedge_wins"] += 1
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def complete_with_policy(
+    kwargs: dict,
+    deadline_seconds: float = LLM_DEADLINE_SECONDS,
+    hedge: bool = LLM_HEDGE_ENABLED,
+) -> Completion:
+    """Run a completion under an overall deadline with jittered retries and optional hedging.
+
+    Transient failures (timeouts, connection errors, 429 and 5xx) are retried
+    up to LLM_MAX_ATTEMPTS times while the deadline allows. With hedging on,
+    an attempt still running after the LLM_HEDGE_PERCENTILE latency of recent
+    calls gets a duplicate request; the first to succeed wins. Raises LLMError.
+    """
+    backend = get_backend()
+    deadline = time.monotonic() + deadline_seconds
+    _stats["calls"] += 1
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            return await _hedged_attempt(backend, kwargs, deadline, hedge)
+        except LLMError as e:
+            remaining = deadline - time.monotonic()
+            if not e.retryable or attempt >= LLM_MAX_ATTEMPTS or remaining <= 0:
+                _stats["failures"] += 1
+                raise
+            delay = retry_delay(attempt, e)
+            if delay >= remaining:
+                _stats["failures"] += 1
+                raise
+            _stats["retries"] += 1
+            logger.warning(f"LLM attempt {attempt} failed ({e.kind}), retrying in {delay:.2f}s: {e}")
+            await asyncio.sleep(delay)
+
+
+_END = object()
+
+
+async def _pump_stream(backend: LLMBackend, kwargs: dict, deadline: float, events: asyncio.Queue) -> None:
+    """Run one streaming attempt under the concurrency cap, queueing its events.
+
+    The slot is held while the backend streams, not while the consumer handles
+    events, so a slow SSE client does not keep other completions waiting. Ends
+    with _END, or with the exception that stopped the attempt.
+    """
+    global _active
+    _active += 1
+    try:
+        async with _get_semaphore():
+            _stats["attempts"] += 1
+            begun = time.monotonic()
+            chunks = backend.stream(kwargs, deadline - begun)
+            try:
+                while True:
+                    # The deadline covers the whole stream, not just each read
+                    try:
+                        event = await asyncio.wait_for(anext(chunks), deadline - time.monotonic())
+                    except StopAsyncIteration:
+                        break
+                    except asyncio.TimeoutError:
+                        raise LLMError(TIMEOUT, "The AI service did not respond in time.")
+                    events.put_nowait(event)
+            finally:
+                await chunks.aclose()
+        _latencies.add(time.monotonic() - begun)
+        events.put_nowait(_END)
+    except Exception as e:
+        events.put_nowait(e)
+    finally:
+        _active -= 1
+
+
+async def stream_with_policy(
+    kwargs: dict,
+    deadline_seconds: float = LLM_DEADLINE_SECONDS,
+) -> AsyncIterator[tuple[str, object]]:
+    """Stream a completion, retrying transient failures until the first delta arrives.
+
+    The stream is cut off with a TIMEOUT LLMError once deadline_seconds have
+    passed. Once output has been yielded a failure is raised as is; replaying
+    a partially consumed stream would duplicate events downstream.
+    """
+    backend = get_backend()
+    deadline = time.monotonic() + deadline_seconds
+    _stats["calls"] += 1
+    attempt = 0
+    while True:
+        attempt += 1
+        started = False
+        events = asyncio.Queue()
+        pump = asyncio.create_task(_pump_stream(backend, kwargs, deadline, events))
+        try:
+            while (event := await events.get()) is not _END:
+                if isinstance(event, Exception):
+                    raise event
+                started = True
+                yield event
+            return
+        except LLMError as e:
+            remaining = deadline - time.monotonic()
+            delay = retry_delay(attempt, e)
+            if started or not e.retryable or attempt >= LLM_MAX_ATTEMPTS or delay >= remaining:
+                _stats["failures"] += 1
+                raise
+            _stats["retries"] += 1
+            logger.warning(f"LLM stream attempt {attempt} failed ({e.kind}), retrying in {delay:.2f}s: {e}")
+        finally:
+            # Consumer gone or attempt failed: stop reading from the backend
+            pump.cancel()
+        await asyncio.sleep(delay)
+
+
+def llm_stats() -> dict:
+    p50 = _latencies.percentile(50)
+    hedge_after = _latencies.percentile(LLM_HEDGE_PERCENTILE)
+    return {
+        **_stats,
+        "backend": LLM_BACKEND,
+        "hedging": LLM_HEDGE_ENABLED,
+        "load": round(current_load(), 4),
+        "latency_p50": round(p50, 4) if p50 is not None else None,
+        "hedge_after": round(hedge_after, 4) if hedge_after is not None else None,
+    }
@@ -0,0 +1,233 @@
+import json
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+# Characters that can change parser state outside a JSON string.
+_STRUCTURAL = re.compile(r'[{}\[\]":,]')
+# Longest run of string body, including complete escape sequences.
+_STRING_BODY = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*', re.DOTALL)
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_DECODER = json.JSONDecoder()
+
+
+class _Capture:
+    """Text span that may straddle several chunks."""
+
+    __slots__ = ("parts", "start")
+
+    def __init__(self, start: int):
+        self.parts = []
+        self.start = start
+
+    def flush(self, chunk: str) -> None:
+        self.parts.append(chunk[self.start:])
+        self.start = 0
+
+    def finish(self, chunk: str, end: int) -> str:
+        self.parts.append(chunk[self.start:end])
+        return "".join(self.parts)
+
+
+class IncrementalResultParser:
+    """Single-pass, incremental parser for the LLM's analysis JSON.
+
+    Feed text chunks as they arrive. feed() returns the events completed by
+    that chunk:
+
+    - ("ai_issue", dict) for each element of the top-level "ai_issues" array
+    - ("field", (key, value)) for each top-level field, once its value closes
+
+    Text before the first "{" (prose, a markdown fence) and after the top-level
+    object is ignored. A leading brace-delimited span without any of the
+    expected keys is treated as prose and skipped. Values that arrive whole
+    within one chunk are decoded directly by the C decoder; values split across
+    chunks are captured while scanning and decoded once when they close.
+    """
+
+    EXPECTED_KEYS = ("ai_issues", "optimized_code", "explanation")
+
+    def __init__(self):
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._expect_key = False
+        self._key = None
+        self._current_key = None
+        self._value = None
+        self._issue = None
+        self._in_issues = False
+        self._issues = []
+        self._fields = {}
+        self._failed = False
+        self._decoded = None
+        self.done = False
+
+    def _reset(self) -> None:
+        self.__init__()
+
+    def feed(self, chunk: str) -> list:
+        events = []
+        if self.done:
+            return events
+
+        i = 0
+        n = len(chunk)
+        while i < n:
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                    i += 1
+                    continue
+                j = _STRING_BODY.match(chunk, i).end()
+                if j == n:
+                    break
+                if chunk[j] == "\\":
+                    # Escape split across chunks; its target starts the next one
+                    self._escaped = True
+                    break
+                self._in_string = False
+                if self._key is not None:
+                    self._current_key = self._decode_key(self._key.finish(chunk, j))
+                    self._key = None
+                i = j + 1
+                continue
+
+            if self._depth == 0:
+                j = chunk.find("{", i)
+                if j == -1:
+                    break
+                self._depth = 1
+                self._expect_key = True
+                i = j + 1
+                continue
+
+            m = _STRUCTURAL.search(chunk, i)
+            if m is None:
+                break
+            j = m.start()
+            ch = chunk[j]
+            i = j + 1
+
+            if ch == '"':
+                self._in_string = True
+                if self._depth == 1 and self._expect_key:
+                    self._key = _Capture(i)
+            elif self._depth == 1 and ch == ":":
+                self._expect_key = False
+                if self._current_key != "ai_issues":
+                    # Fast path: the whole value is already in this chunk
+                    end = self._raw_decode(chunk, _WHITESPACE.match(chunk, i).end())
+                    if end is None:
+                        self._value = _Capture(i)
+                    else:
+                        self._fields[self._current_key] = self._decoded
+                        events.append(("field", (self._current_key, self._decoded)))
+                        self._current_key = None
+                        i = end
+            elif self._depth == 1 and ch == ",":
+                self._close_field(chunk, j, events)
+                self._expect_key = True
+            elif ch in "{[":
+                if self._depth == 1 and ch == "[" and self._current_key == "ai_issues":
+                    self._in_issues = True
+                elif self._depth == 2 and self._in_issues and ch == "{":
+                    end = self._raw_decode(chunk, j)
+                    if end is not None:
+                        if isinstance(self._decoded, dict):
+                            self._issues.append(self._decoded)
+                            events.append(("ai_issue", self._decoded))
+                        i = end
+                        continue
+                    self._issue = _Capture(j)
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 2 and self._issue is not None:
+                    issue = self._decode(self._issue.finish(chunk, i), "ai_issues element")
+                    self._issue = None
+                    if isinstance(issue, dict):
+                        self._issues.append(issue)
+                        events.append(("ai_issue", issue))
+                elif self._depth == 1 and self._in_issues:
+                    self._in_issues = False
+                elif self._depth == 0:
+                    self._close_field(chunk, j, events)
+                    if any(key in self._fields for key in self.EXPECTED_KEYS):
+                        self.done = True
+                        return events
+                    # A brace in leading prose, not the result object
+                    self._reset()
+
+        for capture in (self._key, self._value, self._issue):
+            if capture is not None:
+                capture.flush(chunk)
+        return events
+
+    def _raw_decode(self, chunk: str, start: int):
+        """Decode one complete value at chunk[start:] in C; returns its end or None.
+
+        Strings, objects and arrays end at their closing character. A number
+        or literal is complete only once a "," "}" or "]" follows it in the
+        chunk: "1" may be the start of "12" or "1e5", and raw_decode would
+        happily stop at the prefix.
+        """
+        try:
+            self._decoded, end = _DECODER.raw_decode(chunk, start)
+        except json.JSONDecodeError:
+            return None
+        if isinstance(self._decoded, (str, dict, list)):
+            return end
+        delimiter = _WHITESPACE.match(chunk, end).end()
+        return end if delimiter < len(chunk) and chunk[delimiter] in ",}]" else None
+
+    def _close_field(self, chunk: str, end: int, events: list) -> None:
+        key = self._current_key
+        if key is None:
+            return
+        if key == "ai_issues":
+            value = self._issues
+        elif self._value is not None:
+            value = self._decode(self._value.finish(chunk, end), f"field {key!r}")
+        else:
+            value = None
+        self._value = None
+        self._current_key = None
+        self._fields[key] = value
+        events.append(("field", (key, value)))
+
+    def result(self) -> dict:
+        """Return the parsed top-level object.
+
+        Raises JSONDecodeError if no object completed or any value was malformed.
+        """
+        if not self.done:
+            raise json.JSONDecodeError("No complete JSON object found in LLM output", "", 0)
+        if self._failed:
+            raise json.JSONDecodeError("Malformed value in LLM output", "", 0)
+        return dict(self._fields)
+
+    @staticmethod
+    def _decode_key(text: str) -> str:
+        if "\\" not in text:
+            return text
+        try:
+            return json.loads(f'"{text}"')
+        except json.JSONDecodeError:
+            return text
+
+    def _decode(self, text: str, what: str):
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError as e:
+            logger.error(f"JSON decode failed ({what}): {e}")
+            self._failed = True
+            return None
+
+
+def parse_result_json(raw_content: str) -> dict:
+    """Parse a complete LLM response in one pass with IncrementalResultParser."""
+    parser = IncrementalResultParser()
+    parser.feed(raw_content)
+    return parser.result()
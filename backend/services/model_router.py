@@ -0,0 +1,241 @@
+import hashlib
+import json
+import logging
+import os
+from typing import NamedTuple, Optional
+from services.llm_backend import current_load
+from config.settings import (
+    LLM_MODEL,
+    LLM_FAST_MODEL,
+    MODEL_ROUTING_ENABLED,
+    MODEL_ROUTES,
+    LLM_OUTPUT_MODE,
+    DIFF_OUTPUT_MIN_LINES,
+)
+
+logger = logging.getLogger(__name__)
+
+PROMPT_VARIANTS = ("full", "concise")
+OUTPUT_MODES = ("auto", "code", "diff")
+
+
+class Route(NamedTuple):
+    """One row of the routing table. Unset conditions match anything; the first matching row wins.
+
+    *modes* and *languages* may be prefixed with "!" to exclude instead of
+    include, e.g. ["!security"]. *min_load* is the LLM client load (see
+    llm_backend.current_load) at or above which the row applies; rows with it
+    set are load-shedding rows and their results are not cached. *output*
+    overrides LLM_OUTPUT_MODE for the row. *tokens_per_line* grows the
+    completion budget with the file, on top of *max_tokens*, for rows whose
+    answer restates the code.
+    """
+    name: str
+    model: str
+    max_tokens: int = 8192
+    prompt_variant: str = "full"
+    modes: Optional[tuple] = None
+    languages: Optional[tuple] = None
+    min_lines: int = 0
+    max_lines: Optional[int] = None
+    min_load: Optional[float] = None
+    output: Optional[str] = None
+    tokens_per_line: int = 0
+
+    def max_tokens_for(self, lines: int) -> int:
+        return self.max_tokens + self.tokens_per_line * lines
+
+    def matches(self, language: str, mode: str, lines: int, load: float) -> bool:
+        if not _matches_set(self.modes, mode) or not _matches_set(self.languages, language):
+            return False
+        if lines < self.min_lines or (self.max_lines is not None and lines > self.max_lines):
+            return False
+        return self.min_load is None or load >= self.min_load
+
+
+class RouteDecision(NamedTuple):
+    rule: str
+    model: str
+    max_tokens: int
+    prompt_variant: str
+    lines: int
+    load: float
+    load_shed: bool
+    output: str = "code"
+
+    def as_dict(self) -> dict:
+        return self._asdict()
+
+
+# Completion tokens per line of code for rows that return the whole file:
+# about 12 for the code itself plus headroom for the issues and summary
+_TOKENS_PER_LINE = 16
+
+DEFAULT_ROUTES = (
+    # Explanations and light clean-ups of small files do not need the large model
+    Route(
+        "quick_mode", LLM_FAST_MODEL, 1024, "concise",
+        modes=("cleanup", "explain", "complexity"), max_lines=200, tokens_per_line=_TOKENS_PER_LINE,
+    ),
+    Route("small_snippet", LLM_FAST_MODEL, 2048, "concise", modes=("!security",), max_lines=40),
+    # Under load, move mid-sized non-security work to the fast model
+    Route(
+        "overload", LLM_FAST_MODEL, 1024, "concise",
+        modes=("!security",), max_lines=400, min_load=0.75, tokens_per_line=_TOKENS_PER_LINE,
+    ),
+    Route("default", LLM_MODEL, 8192, "full"),
+)
+
+
+def _matches_set(values: Optional[tuple], value: str) -> bool:
+    if not values:
+        return True
+    excluded = {v[1:] for v in values if v.startswith("!")}
+    included = {v for v in values if not v.startswith("!")}
+    if value in excluded:
+        return False
+    return not included or value in included
+
+
+def _parse_routes(raw: str) -> tuple:
+    """Parse MODEL_ROUTES: a JSON list of route objects, or the path of a file holding one."""
+    if os.path.isfile(raw):
+        with open(raw, encoding="utf-8") as f:
+            raw = f.read()
+    routes = []
+    for entry in json.loads(raw):
+        entry = dict(entry)
+        for key in ("modes", "languages"):
+            if entry.get(key) is not None:
+                entry[key] = tuple(entry[key])
+        route = Route(**entry)
+        if route.prompt_variant not in PROMPT_VARIANTS:
+            raise ValueError(f"route {route.name!r}: unknown prompt_variant {route.prompt_variant!r}")
+        if route.output is not None and route.output not in OUTPUT_MODES:
+            raise ValueError(f"route {route.name!r}: unknown output {route.output!r}")
+        routes.append(route)
+    if not routes:
+        raise ValueError("the routing table is empty")
+    return tuple(routes)
+
+
+def _load_routes() -> tuple:
+    if not MODEL_ROUTES:
+        return DEFAULT_ROUTES
+    try:
+        return _parse_routes(MODEL_ROUTES)
+    except (OSError, TypeError, ValueError) as e:
+        logger.error(f"Invalid MODEL_ROUTES, using the default routing table: {e}")
+        return DEFAULT_ROUTES
+
+
+_routes = _load_routes()
+
+_stats: dict = {}
+# Truncated completions re-run on the fallback row, by the route they came from
+_escalations: dict = {}
+
+
+def _output_for(setting: str, lines: int) -> str:
+    """Resolve an output setting; "auto" asks for a diff once the full text would dominate the completion."""
+    if setting == "auto":
+        return "diff" if lines >= DIFF_OUTPUT_MIN_LINES else "code"
+    return setting
+
+
+def route_for(
+    language: str,
+    mode: str,
+    code: str,
+    load: Optional[float] = None,
+    allow_diff: bool = True,
+) -> RouteDecision:
+    """Pick the model, max_tokens, prompt variant and output form for one LLM call.
+
+    *allow_diff* False forces full-text output, for callers that stream the
+    optimized code as it arrives.
+    """
+    lines = code.count("\n") + 1
+    load = current_load() if load is None else load
+    if not MODEL_ROUTING_ENABLED:
+        output = _output_for(LLM_OUTPUT_MODE, lines) if allow_diff else "code"
+        return RouteDecision("disabled", LLM_MODEL, 8192, "full", lines, round(load, 4), False, output)
+
+    # Fall back to the last row if nothing matches, so a custom table cannot leave a call unrouted
+    route = next((r for r in _routes if r.matches(language, mode, lines, load)), _routes[-1])
+    _stats[route.name] = _stats.get(route.name, 0) + 1
+    return RouteDecision(
+        route.name,
+        route.model,
+        route.max_tokens_for(lines),
+        route.prompt_variant,
+        lines,
+        round(load, 4),
+        route.min_load is not None,
+        _output_for(route.output or LLM_OUTPUT_MODE, lines) if allow_diff else "code",
+    )
+
+
+def escalate(decision: RouteDecision) -> Optional[RouteDecision]:
+    """The route to retry on when *decision*'s completion ran out of tokens.
+
+    That is the table's last, catch-all row, keeping the output form; None when
+    *decision* already used it (or routing is disabled) or would not gain a
+    larger budget from it.
+    """
+    if not MODEL_ROUTING_ENABLED:
+        return None
+    fallback = _routes[-1]
+    max_tokens = fallback.max_tokens_for(decision.lines)
+    if decision.rule == fallback.name or (max_tokens <= decision.max_tokens and decision.model == fallback.model):
+        return None
+    _escalations[decision.rule] = _escalations.get(decision.rule, 0) + 1
+    return decision._replace(
+        rule=fallback.name,
+        model=fallback.model,
+        max_tokens=max_tokens,
+        prompt_variant=fallback.prompt_variant,
+        load_shed=fallback.min_load is not None,
+    )
+
+
+def routing_fingerprint() -> str:
+    """Identify the routing table, so cached results are invalidated when it changes."""
+    output = f"{LLM_OUTPUT_MODE}:{DIFF_OUTPUT_MIN_LINES}"
+    if not MODEL_ROUTING_ENABLED:
+        return f"{LLM_MODEL}|{output}"
+    table = json.dumps([r._asdict() for r in _routes] + [output], sort_keys=True)
+    return "routes:" + hashlib.sha256(table.encode("utf-8")).hexdigest()[:16]
+
+
+def merge_routing(routings: list) -> Optional[dict]:
+    """Summarize the routing of a multi-call analysis (chunks or edited regions)."""
+    routings = [r for r in routings if r]
+    if not routings:
+        return None
+    rules = {r["rule"] for r in routings}
+    models = sorted({r["model"] for r in routings})
+    outputs = {r.get("output", "code") for r in routings}
+    first = routings[0]
+    return {
+        "rule": first["rule"] if len(rules) == 1 else "mixed",
+        "model": models[0] if len(models) == 1 else ",".join(models),
+        "max_tokens": max(r["max_tokens"] for r in routings),
+        "prompt_variant": first["prompt_variant"],
+        "lines": sum(r["lines"] for r in routings),
+        "load": max(r["load"] for r in routings),
+        "load_shed": any(r["load_shed"] for r in routings),
+        "output": outputs.pop() if len(outputs) == 1 else "mixed",
+        "diff_fallbacks": sum(1 for r in routings if r.get("diff_fallback")),
+        "escalations": sum(1 for r in routings if r.get("escalated_from")),
+        "calls": len(routings),
+    }
+
+
+def routing_stats() -> dict:
+    return {
+        "enabled": MODEL_ROUTING_ENABLED,
+        "routes": [r.name for r in _routes],
+        "decisions": dict(_stats),
+        "escalations": dict(_escalations),
+    }
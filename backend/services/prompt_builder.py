@@ -0,0 +1,330 @@
+import logging
+import re
+from config.settings import PROMPT_TOKEN_BUDGET
+
+# Word pieces, numbers, single punctuation marks and newline runs, roughly how
+# BPE tokenizers split source code. Long identifiers cost about one token per
+# four characters.
+_TOKEN_PIECES = re.compile(r"[A-Za-z]+|\d{1,3}|[^\w\s]|\n+")
+
+# Leading comment block (license/copyright header). "#" starts a comment only
+# in the hash-comment languages; in C-family code it is a preprocessor line.
+_HASH_COMMENT_LANGUAGES = {"python", "ruby", "perl", "shell", "bash", "r"}
+_HEADER_COMMENT = re.compile(r"^\s*(//|/\*|\*|\*/)")
+_HASH_HEADER_COMMENT = re.compile(r"^\s*#")
+_LICENSE_WORDS = re.compile(r"licen[cs]e|copyright|\(c\)|spdx", re.IGNORECASE)
+
+# One token of a literal-data line: whitespace, a bracket or comma, a number,
+# a string or a literal keyword. The alternatives cannot start on the same
+# character and none nests a quantifier, so each match is linear.
+_LITERAL_TOKEN = re.compile(
+    r"""\s+|[\[\]{}(),:]|-?\d[\w.]*|"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*'|true|false|null|None|True|False"""
+)
+
+HEADER_MIN_LINES = 5
+LITERAL_TABLE_MIN_LINES = 12
+LITERAL_TABLE_KEEP = 3
+MAX_STATIC_GROUPS = 60
+
+logger = logging.getLogger(__name__)
+
+_SEVERITY_ORDER = {"HIGH": 0, "MEDIUM": 1, "LOW": 2}
+
+_RESPONSE_FORMAT = """Please provide a comprehensive analysis. Your response MUST be valid JSON with this exact structure:
+{
+  "ai_issues": [
+    {
+      "type": "string (issue category)",
+      "line": <integer line number or 0 if unknown>,
+      "severity": "HIGH | MEDIUM | LOW",
+      "message": "brief description of the issue",
+      "explanation": "detailed explanation of why this is an issue",
+      "suggestion": "specific actionable fix suggestion"
+    }
+  ],
+  "optimized_code": "the full refactored/optimized version of the code",
+  "explanation": "overall summary of the analysis and key improvements made"
+}
+
+Instructions:
+1. Explain each static finding listed above (include them in ai_issues with explanation/suggestion).
+2. Detect additional issues not caught by static tools.
+3. Suggest refactoring improvements.
+4. Provide the optimized code in the optimized_code field.
+5. Return ONLY valid JSON, no markdown fences, no extra text."""
+
+# Shorter instructions for the fast model: fewer, terser issues and a one-paragraph summary
+_RESPONSE_FORMAT_CONCISE = """Respond with valid JSON only, no markdown fences, in this structure:
+{
+  "ai_issues": [
+    {"type": "string", "line": <integer or 0>, "severity": "HIGH | MEDIUM | LOW",
+     "message": "brief description", "explanation": "one sentence", "suggestion": "one sentence"}
+  ],
+  "optimized_code": "the full improved version of the code",
+  "explanation": "a short summary of the key changes"
+}
+
+Include the static findings above in ai_issues, then at most 10 further issues, most severe first."""
+
+# Diff output: the model returns only the changed hunks, so completion size scales with the change
+_CODE_FIELDS = (
+    '"optimized_code": "the full refactored/optimized version of the code"',
+    '"optimized_code": "the full improved version of the code"',
+)
+_DIFF_FIELD = '"optimized_diff": "unified diff from the code above to the improved code"'
+_CODE_STEP = "4. Provide the optimized code in the optimized_code field."
+_DIFF_STEP = (
+    "Provide the changes as a unified diff in the optimized_diff field: @@ -start,count +start,count @@ "
+    "hunks with 3 lines of context, line numbers counted from 1 in the code above. Do not return the "
+    "full code; use an empty string if nothing should change."
+)
+
+
+def _as_diff_format(response_format: str) -> str:
+    for field in _CODE_FIELDS:
+        response_format = response_format.replace(field, _DIFF_FIELD)
+    if _CODE_STEP in response_format:
+        return response_format.replace(_CODE_STEP, f"4. {_DIFF_STEP}")
+    return f"{response_format}\n{_DIFF_STEP}"
+
+
+_RESPONSE_FORMATS = {
+    ("full", "code"): _RESPONSE_FORMAT,
+    ("concise", "code"): _RESPONSE_FORMAT_CONCISE,
+    ("full", "diff"): _as_diff_format(_RESPONSE_FORMAT),
+    ("concise", "diff"): _as_diff_format(_RESPONSE_FORMAT_CONCISE),
+}
+
+_COMPACTION_NOTE = (
+    "Some regions of the code were elided to save space; each is replaced by a "
+    "single marker line followed by blank lines, so line numbers are unchanged. "
+    "Keep marker lines verbatim in the optimized code."
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap, tokenizer-free estimate of the number of LLM tokens in *text*."""
+    count = 0
+    for piece in _TOKEN_PIECES.findall(text):
+        count += (len(piece) + 3) // 4 if piece[0].isalpha() else 1
+    # Runs of spaces (indentation) are mostly merged into neighbouring tokens
+    return count + text.count("  ") // 4
+
+
+class BuiltPrompt:
+    """An LLM prompt plus its per-section token estimates.
+
+    `elisions` maps each marker line placed in the code to the original text it
+    replaced, so restore_elisions can put it back into the model's optimized code.
+    `code` is the code as the model saw it (after compaction), which a diff
+    output (`output` == "diff") applies to; `original` is the code as submitted.
+    `over_budget` is set when the prompt is still over budget after compaction.
+    """
+
+    def __init__(
+        self,
+        text: str,
+        sections: dict,
+        compactions: list,
+        elisions: dict,
+        code: str = "",
+        output: str = "code",
+        original: str = None,
+        over_budget: bool = False,
+    ):
+        self.text = text
+        self.sections = sections
+        self.compactions = compactions
+        self.elisions = elisions
+        self.code = code
+        self.output = output
+        self.original = code if original is None else original
+        self.over_budget = over_budget
+        self.elisions_lost = 0
+
+    @property
+    def estimated_tokens(self) -> int:
+        return sum(self.sections.values())
+
+    def stats(self) -> dict:
+        return {
+            "estimated_prompt_tokens": self.estimated_tokens,
+            "sections": dict(self.sections),
+            "compactions": list(self.compactions),
+            "over_budget": self.over_budget,
+            "elisions_lost": self.elisions_lost,
+        }
+
+    def restore_elisions(self, optimized_code: str) -> str:
+        """Put the elided regions back into *optimized_code*.
+
+        If the model dropped or rewrote a marker, its region has nowhere to go,
+        so the optimized code is rejected and the original code returned instead.
+        """
+        restored = optimized_code
+        lost = []
+        for marker, original in self.elisions.items():
+            # The marker stands for the whole block; drop the padding lines after it
+            padding = original.count("\n")
+            restored, found = re.subn(
+                re.escape(marker) + r"(?:\n[ \t]*){0,%d}(?=\n|$)" % padding,
+                lambda _m: original,
+                restored,
+                count=1,
+            )
+            if not found:
+                lost.append(marker)
+        self.elisions_lost = len(lost)
+        if lost:
+            logger.warning(f"Optimized code lost {len(lost)} elision marker(s), keeping the original code: {lost}")
+            return self.original
+        return restored
+
+
+def format_static_findings(static_issues: list) -> str:
+    """One line per distinct finding, with repeated findings folded into a line list.
+
+    Ordered by severity then first line, and capped at MAX_STATIC_GROUPS.
+    """
+    if not static_issues:
+        return "None found."
+
+    groups: dict = {}
+    for issue in static_issues:
+        key = (issue.get("severity", "MEDIUM"), issue.get("type", "general"), issue.get("message", ""))
+        groups.setdefault(key, []).append(issue.get("line", 0))
+
+    ordered = sorted(groups.items(), key=lambda item: (_SEVERITY_ORDER.get(item[0][0], 3), min(item[1])))
+    lines = []
+    for (severity, issue_type, message), issue_lines in ordered[:MAX_STATIC_GROUPS]:
+        where = ",".join(str(line) for line in sorted(set(issue_lines)))
+        lines.append(f"- L{where} [{severity}] {issue_type}: {message}")
+    if len(ordered) > MAX_STATIC_GROUPS:
+        lines.append(f"- ... {len(ordered) - MAX_STATIC_GROUPS} more distinct findings omitted")
+    return "\n".join(lines)
+
+
+def _is_literal_line(line: str) -> bool:
+    """True if *line* is nothing but literal data: numbers, strings, brackets and commas.
+
+    Scans token by token instead of matching one pattern against the whole
+    line, so the time is linear in the line length.
+    """
+    position = 0
+    while position < len(line):
+        match = _LITERAL_TOKEN.match(line, position)
+        if match is None:
+            return False
+        position = match.end()
+    return bool(line.strip())
+
+
+def _uses_hash_comments(language: str) -> bool:
+    return language.lower() in _HASH_COMMENT_LANGUAGES
+
+
+def _comment_marker(language: str) -> str:
+    return "#" if _uses_hash_comments(language) else "//"
+
+
+def _elide(lines: list, start: int, end: int, marker: str, elisions: dict) -> None:
+    """Replace lines[start:end] with *marker* plus blank padding, in place."""
+    elisions[marker] = "\n".join(lines[start:end])
+    lines[start:end] = [marker] + [""] * (end - start - 1)
+
+
+def _collapse_header(language: str, lines: list, elisions: dict) -> bool:
+    comment = _HASH_HEADER_COMMENT if _uses_hash_comments(language) else _HEADER_COMMENT
+    end = 0
+    while end < len(lines) and (comment.match(lines[end]) or (end and not lines[end].strip())):
+        end += 1
+    while end and not lines[end - 1].strip():
+        end -= 1
+    if end < HEADER_MIN_LINES or not _LICENSE_WORDS.search("\n".join(lines[:end])):
+        return False
+    _elide(lines, 0, end, f"{_comment_marker(language)} [elided: {end}-line license header]", elisions)
+    return True
+
+
+def _collapse_literal_tables(language: str, lines: list, elisions: dict) -> int:
+    collapsed = 0
+    index = 0
+    while index < len(lines):
+        if not _is_literal_line(lines[index]):
+            index += 1
+            continue
+        end = index
+        while end < len(lines) and _is_literal_line(lines[end]):
+            end += 1
+        if end - index >= LITERAL_TABLE_MIN_LINES:
+            start = index + LITERAL_TABLE_KEEP
+            stop = end - 1
+            marker = (
+                f"{_comment_marker(language)} [elided: {stop - start} literal rows, "
+                f"lines {start + 1}-{stop}]"
+            )
+            _elide(lines, start, stop, marker, elisions)
+            collapsed += 1
+        index = end
+    return collapsed
+
+
+def build_prompt(
+    language: str,
+    mode: str,
+    instruction: str,
+    code: str,
+    static_issues: list,
+    budget: int = PROMPT_TOKEN_BUDGET,
+    variant: str = "full",
+    output: str = "code",
+) -> BuiltPrompt:
+    """Assemble the analysis prompt, compacting the code when it exceeds *budget* tokens.
+
+    Compaction never changes line numbers: elided regions become one marker
+    line plus blank padding. *variant* selects the response instructions
+    ("full" or "concise", see services.model_router) and *output* whether the
+    model returns the whole optimized code or a unified diff ("code" or "diff").
+    """
+    response_format = _RESPONSE_FORMATS[variant, output]
+    static_summary = format_static_findings(static_issues)
+    header = f"""You are an expert code reviewer performing a {mode} analysis of {language} code.
+
+User instruction: {instruction or "Perform a thorough analysis."}
+
+Static analysis tools found these issues (line numbers, severity, rule, message):
+{static_summary}
+"""
+    sections = {
+        "header": estimate_tokens(header) - estimate_tokens(static_summary),
+        "static_issues": estimate_tokens(static_summary),
+        "code": estimate_tokens(code),
+        "format": estimate_tokens(response_format),
+    }
+
+    original = code
+    compactions = []
+    elisions: dict = {}
+    if sum(sections.values()) > budget:
+        lines = code.split("\n")
+        if _collapse_header(language, lines, elisions):
+            compactions.append("license_header")
+        tables = _collapse_literal_tables(language, lines, elisions)
+        if tables:
+            compactions.append(f"literal_tables:{tables}")
+        if elisions:
+            code = "\n".join(lines)
+            sections["code"] = estimate_tokens(code)
+
+    note = f"\n{_COMPACTION_NOTE}\n" if elisions else ""
+    if note:
+        sections["header"] += estimate_tokens(note)
+    over_budget = sum(sections.values()) > budget
+    text = f"""{header}
+Source code to analyze:
+```{language}
+{code}
+```
+{note}
+{response_format}"""
+    return BuiltPrompt(text, sections, compactions, elisions, code, output, original, over_budget)
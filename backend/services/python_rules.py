@@ -0,0 +1,288 @@
+import ast
+from typing import Callable, Iterable, NamedTuple, Optional
+
+# Bump when rules are added or changed; part of the Python analyzer version in cache keys
+RULESET_VERSION = 2
+
+
+class Rule(NamedTuple):
+    id: str
+    node_types: tuple
+    check: Callable[[ast.AST, "RuleContext"], Iterable[dict]]
+
+
+_registry: dict[str, Rule] = {}
+_by_node_type: dict[type, list[Rule]] = {}
+
+
+def rule(rule_id: str, *node_types: type):
+    """Register *check* to be called with every node of *node_types* and the visitor's context.
+
+    The check yields issue dicts built with RuleContext.issue.
+    """
+    def register(check):
+        if rule_id in _registry:
+            raise ValueError(f"duplicate rule id {rule_id!r}")
+        entry = Rule(rule_id, node_types, check)
+        _registry[rule_id] = entry
+        for node_type in node_types:
+            _by_node_type.setdefault(node_type, []).append(entry)
+        return check
+    return register
+
+
+def registered_rules() -> list:
+    return sorted(_registry)
+
+
+class RuleContext:
+    """What rules may ask about the position of the node being checked."""
+
+    def __init__(self):
+        self.loop_depth = 0
+        # Names bound to string values, one set per function scope
+        self._string_names = [set()]
+        # Local name -> dotted name it was imported as, e.g. "sp" -> "subprocess"
+        self.imports = {}
+
+    @property
+    def string_names(self) -> set:
+        return self._string_names[-1]
+
+    def call_name(self, node: ast.Call) -> Optional[str]:
+        """Dotted name of the called function with import aliases resolved.
+
+        `import subprocess as sp; sp.run()` and `from subprocess import run; run()`
+        both give "subprocess.run".
+        """
+        name = _call_name(node)
+        if name is None:
+            return None
+        head, dot, rest = name.partition(".")
+        if head in self.imports:
+            return self.imports[head] + dot + rest
+        return name
+
+    def issue(self, node: ast.AST, issue_type: str, severity: str, message: str) -> dict:
+        """An issue in the static_analyzer schema."""
+        return {
+            "type": issue_type,
+            "line": getattr(node, "lineno", 0),
+            "severity": severity,
+            "message": message,
+            "source": "static",
+        }
+
+
+class _RuleVisitor(ast.NodeVisitor):
+    """Walks the tree once, running every rule registered for each node's type."""
+
+    def __init__(self):
+        self.context = RuleContext()
+        self.issues = []
+
+    def visit(self, node: ast.AST):
+        for entry in _by_node_type.get(type(node), ()):
+            self.issues.extend(entry.check(node, self.context))
+        return super().visit(node)
+
+    def _visit_scope(self, node):
+        # A function body starts outside any loop, with its own local names
+        context = self.context
+        saved_depth, context.loop_depth = context.loop_depth, 0
+        context._string_names.append(set())
+        try:
+            self.generic_visit(node)
+        finally:
+            context._string_names.pop()
+            context.loop_depth = saved_depth
+
+    visit_FunctionDef = visit_AsyncFunctionDef = visit_Lambda = _visit_scope
+
+    def _visit_loop(self, node):
+        # The iterable and the else clause run once; the body and a while condition repeat
+        if isinstance(node, ast.While):
+            self.visit(node.test)
+        else:
+            self.visit(node.target)
+            self.visit(node.iter)
+        self.context.loop_depth += 1
+        try:
+            for child in node.body:
+                self.visit(child)
+        finally:
+            self.context.loop_depth -= 1
+        for child in node.orelse:
+            self.visit(child)
+
+    visit_For = visit_AsyncFor = visit_While = _visit_loop
+
+
+def run_python_rules(code: str) -> list:
+    """Run every registered rule over *code* in a single AST pass.
+
+    Returns issues in the same schema as static_analyzer, sorted by line;
+    code that does not parse, or nests too deeply to parse or walk, yields no
+    issues.
+    """
+    visitor = _RuleVisitor()
+    try:
+        visitor.visit(ast.parse(code))
+    except (SyntaxError, ValueError, RecursionError, MemoryError):
+        return []
+    return sorted(visitor.issues, key=lambda issue: issue["line"])
+
+
+def _call_name(node: ast.Call) -> Optional[str]:
+    """Dotted name of the called function, e.g. "subprocess.run", or None."""
+    parts = []
+    func = node.func
+    while isinstance(func, ast.Attribute):
+        parts.append(func.attr)
+        func = func.value
+    if not isinstance(func, ast.Name):
+        return None
+    parts.append(func.id)
+    return ".".join(reversed(parts))
+
+
+def _is_true(node: ast.AST) -> bool:
+    return isinstance(node, ast.Constant) and node.value is True
+
+
+def _is_string(node: ast.AST, context: RuleContext) -> bool:
+    if isinstance(node, ast.Constant):
+        return isinstance(node.value, str)
+    if isinstance(node, ast.JoinedStr):
+        return True
+    if isinstance(node, ast.Name):
+        return node.id in context.string_names
+    if isinstance(node, ast.BinOp) and isinstance(node.op, (ast.Add, ast.Mod)):
+        return _is_string(node.left, context) or _is_string(node.right, context)
+    if isinstance(node, ast.Call):
+        return _call_name(node) in ("str", "repr", "format") or (
+            isinstance(node.func, ast.Attribute) and node.func.attr in ("format", "join", "strip", "lower", "upper")
+        )
+    return False
+
+
+@rule("track-imports", ast.Import, ast.ImportFrom)
+def _track_imports(node, context: RuleContext):
+    # Not a check: records import aliases so rules see the real dotted names
+    for alias in node.names:
+        if isinstance(node, ast.Import):
+            if alias.asname:
+                context.imports[alias.asname] = alias.name
+        elif node.module and not node.level and alias.name != "*":
+            context.imports[alias.asname or alias.name] = f"{node.module}.{alias.name}"
+    return ()
+
+
+# Security
+
+
+@rule("eval-exec", ast.Call)
+def _eval_exec(node: ast.Call, context: RuleContext):
+    name = context.call_name(node)
+    if name in ("builtins.eval", "builtins.exec"):
+        name = name[len("builtins."):]
+    if name in ("eval", "exec"):
+        yield context.issue(
+            node, "security", "HIGH",
+            f"Use of {name}() can execute arbitrary code; parse the input instead (e.g. ast.literal_eval).",
+        )
+
+
+_SUBPROCESS_CALLS = {
+    "subprocess.call",
+    "subprocess.run",
+    "subprocess.Popen",
+    "subprocess.check_call",
+    "subprocess.check_output",
+    "subprocess.getoutput",
+    "subprocess.getstatusoutput",
+}
+
+
+@rule("subprocess-shell", ast.Call)
+def _subprocess_shell(node: ast.Call, context: RuleContext):
+    name = context.call_name(node)
+    if name in _SUBPROCESS_CALLS and any(kw.arg == "shell" and _is_true(kw.value) for kw in node.keywords):
+        yield context.issue(
+            node, "security", "HIGH",
+            f"{name}() with shell=True is open to shell injection; pass an argument list without a shell.",
+        )
+    elif name in ("os.system", "os.popen"):
+        yield context.issue(
+            node, "security", "MEDIUM",
+            f"{name}() runs its argument through the shell; use subprocess with an argument list.",
+        )
+
+
+# Performance
+
+
+@rule("track-string-names", ast.Assign, ast.AnnAssign)
+def _track_string_names(node, context: RuleContext):
+    # Not a check: remembers which names hold strings for string-concat-in-loop
+    targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+    is_string = node.value is not None and _is_string(node.value, context)
+    for target in targets:
+        if isinstance(target, ast.Name):
+            if is_string:
+                context.string_names.add(target.id)
+            else:
+                context.string_names.discard(target.id)
+    return ()
+
+
+def _is_self_concat(target: ast.Name, value: Optional[ast.AST]) -> bool:
+    """Whether *value* is `target + <something>`."""
+    return (
+        isinstance(value, ast.BinOp)
+        and isinstance(value.op, ast.Add)
+        and isinstance(value.left, ast.Name)
+        and value.left.id == target.id
+    )
+
+
+@rule("string-concat-in-loop", ast.AugAssign, ast.Assign)
+def _string_concat_in_loop(node, context: RuleContext):
+    if context.loop_depth == 0:
+        return
+    if isinstance(node, ast.AugAssign):
+        target, value = node.target, node.value
+        concatenates = isinstance(node.op, ast.Add) and isinstance(target, ast.Name)
+    else:
+        target = node.targets[0] if len(node.targets) == 1 else None
+        value = node.value.right if isinstance(node.value, ast.BinOp) else None
+        concatenates = isinstance(target, ast.Name) and _is_self_concat(target, node.value)
+    if concatenates and (target.id in context.string_names or _is_string(value, context)):
+        context.string_names.add(target.id)
+        yield context.issue(
+            node, "performance", "LOW",
+            f"String '{target.id}' is built by concatenation inside a loop, which copies it on every "
+            f"iteration; append the parts to a list and ''.join() them.",
+        )
+
+
+@rule("len-in-while-condition", ast.While)
+def _len_in_while_condition(node: ast.While, context: RuleContext):
+    for child in ast.walk(node.test):
+        if isinstance(child, ast.Call) and _call_name(child) == "len":
+            yield context.issue(
+                node, "performance", "LOW",
+                "len() is re-evaluated on every iteration of the while condition; compute it once before "
+                "the loop, or iterate over the sequence directly.",
+            )
+            return
+
+
+def merge_with_bandit(rule_issues: list, bandit_issues: list) -> list:
+    """Combine rule and Bandit findings, dropping rule security findings Bandit also made on the same line."""
+    bandit_lines = {issue["line"] for issue in bandit_issues if issue["type"] == "security"}
+    merged = bandit_issues + [
+        issue for issue in rule_issues
+        if not (issue["type"] == "security" and issue["line"] in bandit_lines)
+    ]
+    return sorted(merged, key=lambda issue: issue["line"])
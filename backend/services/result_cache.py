@@ -0,0 +1,212 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from sqlalchemy import select, delete
+from sqlalchemy.dialects.postgresql import insert
+from database import AsyncSessionLocal
+from models.analysis_cache import AnalysisCacheEntry
+from services.model_router import routing_fingerprint
+from services.static_analyzer import analyzer_version
+from config.settings import (
+    ANALYSIS_CACHE_ENABLED,
+    ANALYSIS_CACHE_MAX_ENTRIES,
+    ANALYSIS_CACHE_TTL_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+# Bump when the cached payload shape or analysis pipeline changes incompatibly.
+CACHE_SCHEMA_VERSION = 2
+
+# Keys of the /api/analyze response that are stored in the cache.
+CACHED_FIELDS = (
+    "static_issues",
+    "ai_suggestions",
+    "aggregated_issues",
+    "optimized_code",
+    "explanation",
+    "confidence_score",
+    "token_usage",
+    "routing",
+)
+
+
+class _LRUCache:
+    """In-process LRU with per-entry TTL. Not shared between workers."""
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+
+    def get(self, key: str) -> Optional[dict]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, payload = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return payload
+
+    def put(self, key: str, payload: dict) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, payload)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_memory = _LRUCache(ANALYSIS_CACHE_MAX_ENTRIES, ANALYSIS_CACHE_TTL_SECONDS)
+
+_stats = {
+    "memory_hits": 0,
+    "db_hits": 0,
+    "misses": 0,
+    "writes": 0,
+    "errors": 0,
+}
+
+
+def compute_key(
+    code: str,
+    language: str,
+    mode: str,
+    instruction: str,
+    model: str,
+    tool_version: str,
+    variant: str = "",
+) -> str:
+    """Return the content-addressed cache key for an analysis request.
+
+    *variant* distinguishes pipelines that give different results for the
+    same input (e.g. chunked large-file analysis).
+    """
+    material = json.dumps(
+        [CACHE_SCHEMA_VERSION, code, language.lower(), mode, instruction or "", model, tool_version, variant],
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+async def cache_key_for(code: str, language: str, mode: str, instruction: str, variant: str = "") -> str:
+    """Build the cache key, resolving the analyzer version off the event loop."""
+    tool_version = await asyncio.to_thread(analyzer_version, language)
+    return compute_key(code, language, mode, instruction, routing_fingerprint(), tool_version, variant)
+
+
+def cache_lookup_query(key: str, now: datetime):
+    return select(AnalysisCacheEntry.payload).where(
+        AnalysisCacheEntry.key == key,
+        AnalysisCacheEntry.expires_at > now,
+    )
+
+
+# token_usage counts that a hit did not spend
+_SPENT = ("prompt_tokens", "completion_tokens", "calls")
+
+
+def _as_hit(payload: dict) -> dict:
+    """A stored payload in the shape of a fresh result: no tokens spent, routed to the cache.
+
+    The route that produced the result is kept; "cached" marks it as replayed.
+    """
+    usage = payload.get("token_usage")
+    if usage:
+        usage = {key: 0 if key in _SPENT else value for key, value in usage.items()}
+    return {
+        **payload,
+        "token_usage": usage,
+        "routing": {**(payload.get("routing") or {}), "cached": True},
+    }
+
+
+async def get_cached(key: str, memory_only: bool = False) -> Optional[dict]:
+    """Look up *key* in the memory tier, then the shared Postgres tier."""
+    if not ANALYSIS_CACHE_ENABLED:
+        return None
+
+    payload = _memory.get(key)
+    if payload is not None:
+        _stats["memory_hits"] += 1
+        return _as_hit(payload)
+    if memory_only:
+        _stats["misses"] += 1
+        return None
+
+    try:
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(cache_lookup_query(key, datetime.now(timezone.utc)))
+            payload = result.scalar_one_or_none()
+    except Exception as e:
+        _stats["errors"] += 1
+        logger.warning(f"Analysis cache lookup failed: {e}")
+        payload = None
+
+    if payload is None:
+        _stats["misses"] += 1
+        return None
+
+    _stats["db_hits"] += 1
+    _memory.put(key, payload)
+    return _as_hit(payload)
+
+
+async def put_cached(key: str, result: dict, memory_only: bool = False) -> None:
+    """Store the cacheable fields of *result* in both tiers, or only in memory."""
+    if not ANALYSIS_CACHE_ENABLED:
+        return
+
+    payload = {field: result.get(field) for field in CACHED_FIELDS}
+    _memory.put(key, payload)
+    if memory_only:
+        return
+
+    expires_at = datetime.now(timezone.utc) + timedelta(seconds=ANALYSIS_CACHE_TTL_SECONDS)
+    stmt = insert(AnalysisCacheEntry).values(key=key, payload=payload, expires_at=expires_at)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[AnalysisCacheEntry.key],
+        set_={"payload": stmt.excluded.payload, "expires_at": stmt.excluded.expires_at},
+    )
+    try:
+        async with AsyncSessionLocal() as session:
+            await session.execute(stmt)
+            await session.commit()
+        _stats["writes"] += 1
+    except Exception as e:
+        _stats["errors"] += 1
+        logger.warning(f"Analysis cache write failed: {e}")
+
+
+async def purge_expired() -> int:
+    """Delete expired rows from the shared tier. Returns the number removed."""
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            delete(AnalysisCacheEntry).where(
+                AnalysisCacheEntry.expires_at <= datetime.now(timezone.utc)
+            )
+        )
+        await session.commit()
+    return result.rowcount or 0
+
+
+def cache_stats() -> dict:
+    """Return hit/miss counters for this worker."""
+    lookups = _stats["memory_hits"] + _stats["db_hits"] + _stats["misses"]
+    hits = _stats["memory_hits"] + _stats["db_hits"]
+    return {
+        **_stats,
+        "hits": hits,
+        "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+        "memory_entries": len(_memory),
+        "enabled": ANALYSIS_CACHE_ENABLED,
+    }
@@ -0,0 +1,176 @@
+import asyncio
+import hashlib
+import logging
+import time
+from typing import Awaitable, Callable, Optional
+from sqlalchemy import exc, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from config.settings import (
+    DATABASE_URL,
+    SINGLE_FLIGHT_ENABLED,
+    SINGLE_FLIGHT_DISTRIBUTED,
+    SINGLE_FLIGHT_WAIT_SECONDS,
+    SINGLE_FLIGHT_POLL_SECONDS,
+    SINGLE_FLIGHT_LOCK_POOL_SIZE,
+)
+
+logger = logging.getLogger(__name__)
+
+# Advisory locks belong to a session, so the leader holds its connection for
+# the whole computation, LLM call included. Those connections come from this
+# engine rather than the request pool, sized for one per concurrent LLM call;
+# when it is exhausted, callers wait at most one poll interval and then compute
+# without the lock (counted in single_flight_stats).
+_lock_engine = create_async_engine(
+    DATABASE_URL,
+    pool_pre_ping=True,
+    pool_size=SINGLE_FLIGHT_LOCK_POOL_SIZE,
+    max_overflow=0,
+    pool_timeout=SINGLE_FLIGHT_POLL_SECONDS,
+)
+
+_inflight: dict[str, asyncio.Task] = {}
+
+_stats = {
+    "leaders": 0,
+    "coalesced": 0,
+    "remote_waits": 0,
+    "remote_hits": 0,
+    "lock_errors": 0,
+    "lock_pool_exhausted": 0,
+    "wait_timeouts": 0,
+    # Computations run without the lock: pool exhausted, lock errors, wait timeouts
+    "unlocked": 0,
+}
+
+
+def _lock_id(key: str) -> int:
+    """Map a content key to a signed 64-bit Postgres advisory lock id."""
+    return int.from_bytes(hashlib.sha256(key.encode("utf-8")).digest()[:8], "big", signed=True)
+
+
+async def _try_lock(lock_id: int):
+    """Return a connection holding the advisory lock, or None if another session holds it."""
+    conn = await _lock_engine.connect()
+    try:
+        acquired = (await conn.execute(text("SELECT pg_try_advisory_lock(:id)"), {"id": lock_id})).scalar()
+    except BaseException:
+        await conn.close()
+        raise
+    if not acquired:
+        await conn.close()
+        return None
+    return conn
+
+
+async def _unlock(conn, lock_id: int) -> None:
+    try:
+        await conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": lock_id})
+    except Exception as e:
+        # Closing the broken connection releases its session locks anyway
+        logger.warning(f"Releasing advisory lock {lock_id} failed: {e}")
+        await conn.invalidate()
+    finally:
+        await conn.close()
+
+
+async def _lead(key: str, compute: Callable[[], Awaitable], recheck: Callable[[], Awaitable]):
+    """Run *compute* once across workers, serialized by a Postgres advisory lock on *key*.
+
+    While another worker holds the lock, poll *recheck* (e.g. the shared result
+    cache) until it returns a value or the lock frees up. Falls back to
+    computing locally if the database is unavailable or the wait exceeds
+    SINGLE_FLIGHT_WAIT_SECONDS.
+    """
+    if not SINGLE_FLIGHT_DISTRIBUTED:
+        return await compute()
+
+    lock_id = _lock_id(key)
+    deadline = time.monotonic() + SINGLE_FLIGHT_WAIT_SECONDS
+    waited = False
+    while True:
+        try:
+            conn = await _try_lock(lock_id)
+        except exc.TimeoutError:
+            _stats["lock_pool_exhausted"] += 1
+            _stats["unlocked"] += 1
+            logger.warning(f"No advisory lock connection free, computing {key[:12]} without the lock")
+            return await compute()
+        except Exception as e:
+            _stats["lock_errors"] += 1
+            _stats["unlocked"] += 1
+            logger.warning(f"Advisory lock unavailable, computing without it: {e}")
+            return await compute()
+
+        if conn is not None:
+            try:
+                # The previous holder may have just produced the value
+                value = await recheck() if waited else None
+                if value is not None:
+                    _stats["remote_hits"] += 1
+                    return value
+                return await compute()
+            finally:
+                await _unlock(conn, lock_id)
+
+        if not waited:
+            waited = True
+            _stats["remote_waits"] += 1
+        value = await recheck()
+        if value is not None:
+            _stats["remote_hits"] += 1
+            return value
+        if time.monotonic() >= deadline:
+            _stats["wait_timeouts"] += 1
+            _stats["unlocked"] += 1
+            logger.warning(f"Gave up waiting for analysis {key[:12]} on another worker")
+            return await compute()
+        await asyncio.sleep(SINGLE_FLIGHT_POLL_SECONDS)
+
+
+def _forget(key: str, task: asyncio.Task) -> None:
+    if _inflight.get(key) is task:
+        del _inflight[key]
+    # Mark the exception retrieved even if every waiter went away
+    if not task.cancelled():
+        task.exception()
+
+
+async def single_flight(key: str, compute: Callable[[], Awaitable], recheck: Callable[[], Awaitable]):
+    """Return the value of *compute*, sharing one computation among concurrent callers.
+
+    Callers in this process with the same *key* await the same task; callers
+    in other workers are serialized by _lead. The computation runs in its own
+    task, so a caller that disconnects does not cancel it for the others.
+    """
+    if not SINGLE_FLIGHT_ENABLED:
+        return await compute()
+
+    task = _inflight.get(key)
+    if task is not None:
+        _stats["coalesced"] += 1
+    else:
+        _stats["leaders"] += 1
+        task = asyncio.create_task(_lead(key, compute, recheck))
+        _inflight[key] = task
+        task.add_done_callback(lambda done: _forget(key, done))
+    return await asyncio.shield(task)
+
+
+def inflight(key: str) -> Optional[asyncio.Task]:
+    """The in-process computation for *key*, if one is running."""
+    return _inflight.get(key)
+
+
+def single_flight_stats() -> dict:
+    return {
+        **_stats,
+        "inflight": len(_inflight),
+        "enabled": SINGLE_FLIGHT_ENABLED,
+        "lock_connections": _lock_engine.pool.checkedout(),
+        "lock_pool_size": SINGLE_FLIGHT_LOCK_POOL_SIZE,
+    }
+
+
+async def close_single_flight() -> None:
+    await _lock_engine.dispose()
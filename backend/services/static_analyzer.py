@@ -3,6 +3,9 @@ import subprocess
 import tempfile
 import os
 import warnings
+from functools import lru_cache
+from services.python_rules import RULESET_VERSION, run_python_rules, merge_with_bandit
+from config.settings import PYTHON_STATIC_ENGINE
 
 
 def run_static_analysis(language: str, code: str) -> list:
@@ -10,6 +13,10 @@ def run_static_analysis(language: str, code: str) -> list:
     language = language.lower()
 
     if language == "python":
+        if PYTHON_STATIC_ENGINE == "ast":
+            return run_python_rules(code)
+        if PYTHON_STATIC_ENGINE == "both":
+            return merge_with_bandit(run_python_rules(code), _run_bandit(code))
         return _run_bandit(code)
     elif language == "javascript":
         return _run_eslint(code)
@@ -19,6 +26,55 @@ def run_static_analysis(language: str, code: str) -> list:
         return []
 
 
+@lru_cache(maxsize=None)
+def analyzer_version(language: str) -> str:
+    """Return the version string of the tool used for *language*, or "" if unavailable.
+
+    Resolved once per process; used to key cached analysis results.
+    """
+    language = language.lower()
+    if language == "python" and PYTHON_STATIC_ENGINE != "bandit":
+        rules = f"python-rules {RULESET_VERSION}"
+        return rules if PYTHON_STATIC_ENGINE == "ast" else f"{_tool_version(['bandit', '--version'])} + {rules}"
+    commands = {
+        "python": ["bandit", "--version"],
+        "javascript": ["eslint", "--version"],
+        "c": ["cppcheck", "--version"],
+        "cpp": ["cppcheck", "--version"],
+    }
+    cmd = commands.get(language)
+    if cmd is None:
+        return ""
+    return _tool_version(cmd)
+
+
+def _tool_version(cmd: list) -> str:
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
+    except (FileNotFoundError, subprocess.TimeoutExpired):
+        return ""
+    output = (result.stdout or result.stderr or "").strip()
+    return output.splitlines()[0] if output else ""
+
+
+def _bandit_command(path: str) -> list:
+    return ["bandit", "-f", "json", "-q", path]
+
+
+def _eslint_command(path: str) -> list:
+    return ["eslint", "--format", "json", path]
+
+
+def _cppcheck_command(path: str) -> list:
+    return [
+        "cppcheck",
+        "--enable=all",
+        "--output-format=xml",
+        "--xml-version=2",
+        path,
+    ]
+
+
 def _run_bandit(code: str) -> list:
     """Run Bandit static analysis on Python code."""
     suffix = ".py"
@@ -28,27 +84,12 @@ def _run_bandit(code: str) -> list:
 
     try:
         result = subprocess.run(
-            ["bandit", "-f", "json", "-q", tmp_path],
+            _bandit_command(tmp_path),
             capture_output=True,
             text=True,
             timeout=30,
         )
-        output = result.stdout or result.stderr
-        try:
-            data = json.loads(output)
-        except json.JSONDecodeError:
-            return []
-
-        issues = []
-        for item in data.get("results", []):
-            issues.append({
-                "type": "security",
-                "line": item.get("line_number", 0),
-                "severity": item.get("issue_severity", "MEDIUM").upper(),
-                "message": item.get("issue_text", ""),
-                "source": "static",
-            })
-        return issues
+        return _parse_bandit_output(result.stdout or result.stderr)
     except FileNotFoundError:
         warnings.warn("bandit is not installed; skipping Python static analysis.")
         return []
@@ -68,29 +109,12 @@ def _run_eslint(code: str) -> list:
 
     try:
         result = subprocess.run(
-            ["eslint", "--format", "json", tmp_path],
+            _eslint_command(tmp_path),
             capture_output=True,
             text=True,
             timeout=30,
         )
-        output = result.stdout or ""
-        try:
-            data = json.loads(output)
-        except json.JSONDecodeError:
-            return []
-
-        issues = []
-        for file_result in data:
-            for msg in file_result.get("messages", []):
-                severity_map = {1: "LOW", 2: "HIGH"}
-                issues.append({
-                    "type": "lint",
-                    "line": msg.get("line", 0),
-                    "severity": severity_map.get(msg.get("severity", 1), "MEDIUM"),
-                    "message": msg.get("message", ""),
-                    "source": "static",
-                })
-        return issues
+        return _parse_eslint_output(result.stdout or "")
     except FileNotFoundError:
         warnings.warn("eslint is not installed; skipping JavaScript static analysis.")
         return []
@@ -110,13 +134,7 @@ def _run_cppcheck(code: str, language: str) -> list:
 
     try:
         result = subprocess.run(
-            [
-                "cppcheck",
-                "--enable=all",
-                "--output-format=xml",
-                "--xml-version=2",
-                tmp_path,
-            ],
+            _cppcheck_command(tmp_path),
             capture_output=True,
             text=True,
             timeout=30,
@@ -135,6 +153,50 @@ def _run_cppcheck(code: str, language: str) -> list:
         os.unlink(tmp_path)
 
 
+def _parse_bandit_output(output: str) -> list:
+    """Parse Bandit JSON output into structured issues."""
+    try:
+        data = json.loads(output)
+    except json.JSONDecodeError:
+        return []
+
+    issues = []
+    for item in data.get("results", []):
+        issues.append({
+            "type": "security",
+            "line": item.get("line_number", 0),
+            "severity": item.get("issue_severity", "MEDIUM").upper(),
+            "message": item.get("issue_text", ""),
+            "source": "static",
+        })
+    return issues
+
+
+def _parse_eslint_output(output: str) -> list:
+    """Parse ESLint JSON output into structured issues."""
+    try:
+        data = json.loads(output)
+    except json.JSONDecodeError:
+        return []
+    return _eslint_results_to_issues(data)
+
+
+def _eslint_results_to_issues(data: list) -> list:
+    """Convert ESLint's per-file result objects into structured issues."""
+    issues = []
+    for file_result in data:
+        for msg in file_result.get("messages", []):
+            severity_map = {1: "LOW", 2: "HIGH"}
+            issues.append({
+                "type": "lint",
+                "line": msg.get("line", 0),
+                "severity": severity_map.get(msg.get("severity", 1), "MEDIUM"),
+                "message": msg.get("message", ""),
+                "source": "static",
+            })
+    return issues
+
+
 def _parse_cppcheck_xml(xml_output: str) -> list:
     """Parse cppcheck XML output into structured issues."""
     import xml.etree.ElementTree as ET
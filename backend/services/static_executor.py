@@ -0,0 +1,213 @@
+import asyncio
+import os
+import signal
+import tempfile
+import time
+import warnings
+from contextlib import asynccontextmanager
+from typing import Callable, NamedTuple
+from services.static_analyzer import (
+    _bandit_command,
+    _eslint_command,
+    _cppcheck_command,
+    _parse_bandit_output,
+    _parse_eslint_output,
+    _parse_cppcheck_xml,
+)
+from services.bandit_pool import run_bandit_pooled, bandit_pool_stats
+from services.python_rules import run_python_rules, merge_with_bandit
+from services.eslint_daemon import lint_with_daemon, daemon_stats
+from config.settings import (
+    BANDIT_BACKEND,
+    ESLINT_BACKEND,
+    PYTHON_STATIC_ENGINE,
+    STATIC_ANALYSIS_MAX_CONCURRENCY,
+    STATIC_ANALYSIS_MAX_QUEUE,
+    STATIC_ANALYSIS_TIMEOUT_SECONDS,
+)
+
+
+class StaticAnalysisBusy(Exception):
+    """Raised when a tool's wait queue is full and the request should be shed."""
+
+
+class _ToolSpec(NamedTuple):
+    tool: str
+    suffix: str
+    command: Callable[[str], list]
+    parse: Callable[[str, str], list]
+
+
+_TOOLS = {
+    "python": _ToolSpec("bandit", ".py", _bandit_command, lambda out, err: _parse_bandit_output(out or err)),
+    "javascript": _ToolSpec("eslint", ".js", _eslint_command, lambda out, err: _parse_eslint_output(out)),
+    # cppcheck writes XML to stderr
+    "c": _ToolSpec("cppcheck", ".c", _cppcheck_command, lambda out, err: _parse_cppcheck_xml(err)),
+    "cpp": _ToolSpec("cppcheck", ".cpp", _cppcheck_command, lambda out, err: _parse_cppcheck_xml(err)),
+}
+
+
+class _ToolPool:
+    """Concurrency cap plus a bounded wait queue for one static analysis tool."""
+
+    def __init__(self, tool: str, max_concurrency: int, max_queue: int):
+        self.tool = tool
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.waiting = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    @asynccontextmanager
+    async def slot(self):
+        if self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise StaticAnalysisBusy(f"{self.tool} queue is full ({self.waiting} waiting)")
+
+        self.waiting += 1
+        started = time.monotonic()
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        waited = time.monotonic() - started
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+        self.running += 1
+        try:
+            yield
+        finally:
+            self.running -= 1
+            self.completed += 1
+            self._semaphore.release()
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "queue_depth": self.waiting,
+            "running": self.running,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+            "avg_wait_seconds": round(self.total_wait / self.completed, 4) if self.completed else 0.0,
+            "max_wait_seconds": round(self.max_wait, 4),
+        }
+
+
+_pools: dict[str, _ToolPool] = {}
+
+
+def _get_pool(tool: str) -> _ToolPool:
+    pool = _pools.get(tool)
+    if pool is None:
+        pool = _ToolPool(tool, STATIC_ANALYSIS_MAX_CONCURRENCY, STATIC_ANALYSIS_MAX_QUEUE)
+        _pools[tool] = pool
+    return pool
+
+
+def _kill_process_tree(proc: asyncio.subprocess.Process) -> None:
+    """Kill the tool and any children it spawned (it runs in its own session)."""
+    if proc.returncode is not None:
+        return
+    try:
+        if hasattr(os, "killpg"):
+            os.killpg(proc.pid, signal.SIGKILL)
+        else:
+            proc.kill()
+    except ProcessLookupError:
+        pass
+
+
+async def run_static_analysis_async(language: str, code: str) -> list:
+    """Async counterpart of run_static_analysis.
+
+    Runs the tool as a child process without blocking the event loop, limited
+    per tool to STATIC_ANALYSIS_MAX_CONCURRENCY concurrent runs. Raises
+    StaticAnalysisBusy when more than STATIC_ANALYSIS_MAX_QUEUE callers are
+    already waiting for that tool.
+
+    Python code is checked by the in-process rule engine first when
+    PYTHON_STATIC_ENGINE is "ast" or "both"; with "ast" Bandit is skipped.
+    """
+    spec = _TOOLS.get(language.lower())
+    if spec is None:
+        return []
+
+    if spec.tool == "bandit" and PYTHON_STATIC_ENGINE in ("ast", "both"):
+        rule_issues = run_python_rules(code)
+        if PYTHON_STATIC_ENGINE == "ast":
+            return rule_issues
+        return merge_with_bandit(rule_issues, await _run_in_pool(spec, code))
+    return await _run_in_pool(spec, code)
+
+
+async def _run_in_pool(spec: _ToolSpec, code: str) -> list:
+    pool = _get_pool(spec.tool)
+    async with pool.slot():
+        if spec.tool == "bandit" and BANDIT_BACKEND == "pool":
+            issues = await run_bandit_pooled(code)
+            if issues is not None:
+                return issues
+        if spec.tool == "eslint" and ESLINT_BACKEND == "daemon":
+            issues = await lint_with_daemon(code)
+            if issues is not None:
+                return issues
+        return await _run_tool(spec, pool, code)
+
+
+async def _run_tool(spec: _ToolSpec, pool: _ToolPool, code: str) -> list:
+    with tempfile.NamedTemporaryFile(mode="w", suffix=spec.suffix, delete=False) as tmp:
+        tmp.write(code)
+        tmp_path = tmp.name
+
+    try:
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *spec.command(tmp_path),
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                start_new_session=True,
+            )
+        except FileNotFoundError:
+            warnings.warn(f"{spec.tool} is not installed; skipping static analysis.")
+            return []
+
+        try:
+            stdout, stderr = await asyncio.wait_for(
+                proc.communicate(), timeout=STATIC_ANALYSIS_TIMEOUT_SECONDS
+            )
+        except asyncio.TimeoutError:
+            pool.timeouts += 1
+            _kill_process_tree(proc)
+            await proc.wait()
+            warnings.warn(f"{spec.tool} timed out; skipping static analysis.")
+            return []
+        except BaseException:
+            # Request cancelled (e.g. client disconnect): don't leak the child
+            _kill_process_tree(proc)
+            await proc.wait()
+            raise
+
+        return spec.parse(
+            stdout.decode("utf-8", errors="replace"),
+            stderr.decode("utf-8", errors="replace"),
+        )
+    finally:
+        os.unlink(tmp_path)
+
+
+def executor_stats() -> dict:
+    """Return queue depth, wait-time and timeout metrics for each tool."""
+    stats = {tool: pool.stats() for tool, pool in _pools.items()}
+    if BANDIT_BACKEND == "pool":
+        stats["bandit_pool"] = bandit_pool_stats()
+    if ESLINT_BACKEND == "daemon":
+        stats["eslint_daemon"] = daemon_stats()
+    return stats
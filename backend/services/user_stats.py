@@ -0,0 +1,212 @@
+import logging
+import math
+from collections import defaultdict
+from datetime import datetime, timezone
+from sqlalchemy import select, update, func, Integer
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import AsyncSessionLocal
+from models.analysis_history import AnalysisHistory
+from models.project import Project
+from models.user import User
+from models.user_stats import UserStats
+from config.settings import USER_STATS_RECONCILE_BATCH_SIZE
+
+logger = logging.getLogger(__name__)
+
+# Increments are plain UPDATEs in the writer's transaction: a user without a
+# user_stats row (created before the table existed) is left alone until the
+# profile backfills it or reconcile_user_stats runs, instead of starting from 0.
+
+
+def _bump(column, key: str, delta: int):
+    """column || {key: column[key] + delta}, counting a missing key as 0."""
+    return column.op("||")(func.jsonb_build_object(
+        key, func.coalesce(column[key].astext.cast(Integer), 0) + delta
+    ))
+
+
+async def count_analyses(db: AsyncSession, records: list) -> None:
+    """Add the AnalysisHistory rows among *records* to their owners' stats.
+
+    Call in the transaction that inserts them, before commit. One UPDATE per
+    (user, language, mode) in the batch.
+    """
+    # (user_id, language, mode) -> [count, confidence sum]
+    groups = defaultdict(lambda: [0, 0.0])
+    for r in records:
+        if isinstance(r, AnalysisHistory):
+            group = groups[(r.user_id, r.language, r.mode)]
+            group[0] += 1
+            group[1] += r.confidence_score or 0
+    for (user_id, language, mode), (n, confidence) in groups.items():
+        await db.execute(
+            update(UserStats)
+            .where(UserStats.user_id == user_id)
+            .values(
+                analyses_count=UserStats.analyses_count + n,
+                confidence_sum=UserStats.confidence_sum + confidence,
+                languages=_bump(UserStats.languages, language, n),
+                modes=_bump(UserStats.modes, mode, n),
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+
+async def adjust_confidence(db: AsyncSession, deltas: dict) -> None:
+    """Add {user_id: delta} to confidence_sum after scores of existing analyses changed.
+
+    Call in the transaction that rewrites the scores, with new - old per row
+    (unscored counting as 0), summed per user.
+    """
+    for user_id, delta in deltas.items():
+        if not delta:
+            continue
+        await db.execute(
+            update(UserStats)
+            .where(UserStats.user_id == user_id)
+            .values(confidence_sum=UserStats.confidence_sum + delta)
+            .execution_options(synchronize_session=False)
+        )
+
+
+async def count_project(db: AsyncSession, user_id: int, delta: int) -> None:
+    """Add *delta* active projects to the user's stats, in the caller's transaction."""
+    await db.execute(
+        update(UserStats)
+        .where(UserStats.user_id == user_id)
+        .values(projects_count=UserStats.projects_count + delta)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def project_counts_query(user_ids: list):
+    return (
+        select(Project.user_id, func.count())
+        .where(Project.user_id.in_(user_ids), Project.is_active == True)
+        .group_by(Project.user_id)
+    )
+
+
+def analysis_counts_query(user_ids: list):
+    """Analyses and their confidence sum per (user, language, mode)."""
+    return (
+        select(
+            AnalysisHistory.user_id, AnalysisHistory.language, AnalysisHistory.mode,
+            func.count(), func.coalesce(func.sum(AnalysisHistory.confidence_score), 0),
+        )
+        .where(AnalysisHistory.user_id.in_(user_ids))
+        .group_by(AnalysisHistory.user_id, AnalysisHistory.language, AnalysisHistory.mode)
+    )
+
+
+async def compute_user_stats(db: AsyncSession, user_ids: list) -> dict:
+    """Count the stats of *user_ids* from projects and analysis_history. Returns {user_id: values}."""
+    stats = {
+        user_id: {"projects_count": 0, "analyses_count": 0, "confidence_sum": 0.0, "languages": {}, "modes": {}}
+        for user_id in user_ids
+    }
+    projects = await db.execute(project_counts_query(user_ids))
+    for user_id, count in projects.all():
+        stats[user_id]["projects_count"] = count
+
+    analyses = await db.execute(analysis_counts_query(user_ids))
+    for user_id, language, mode, count, confidence in analyses.all():
+        entry = stats[user_id]
+        entry["analyses_count"] += count
+        entry["confidence_sum"] += confidence
+        entry["languages"][language] = entry["languages"].get(language, 0) + count
+        entry["modes"][mode] = entry["modes"].get(mode, 0) + count
+    return stats
+
+
+async def get_user_stats(db: AsyncSession, user_id: int) -> dict:
+    """The user's stats by primary key, counting and storing them first if the row is missing."""
+    row = await db.get(UserStats, user_id)
+    if row is not None:
+        return {
+            "projects_count": row.projects_count,
+            "analyses_count": row.analyses_count,
+            "confidence_sum": row.confidence_sum,
+            "languages": row.languages or {},
+            "modes": row.modes or {},
+        }
+
+    values = (await compute_user_stats(db, [user_id]))[user_id]
+    # A concurrent backfill may have won; either row is equally fresh
+    await db.execute(
+        insert(UserStats)
+        .values(user_id=user_id, reconciled_at=func.now(), **values)
+        .on_conflict_do_nothing(index_elements=[UserStats.user_id])
+    )
+    return values
+
+
+def _drifted(row: UserStats, values: dict) -> bool:
+    """Whether the stored stats differ from a recount; the float sum only beyond rounding."""
+    for key, value in values.items():
+        if key == "confidence_sum":
+            if not math.isclose(row.confidence_sum, value, rel_tol=1e-9, abs_tol=1e-6):
+                return True
+        elif getattr(row, key) != value:
+            return True
+    return False
+
+
+async def reconcile_user_stats(batch_size: int = USER_STATS_RECONCILE_BATCH_SIZE) -> dict:
+    """Recount every user's stats and overwrite rows that drifted (or are missing).
+
+    Walks users in primary-key order, batch_size at a time, one transaction
+    per batch. Existing stats rows of the batch are locked first, so a
+    concurrent writer's increment either lands before the recount (and is
+    counted) or waits and applies on top of it. Safe to interrupt and re-run.
+    """
+    scanned = 0
+    drifted = 0
+    last_id = 0
+    while True:
+        async with AsyncSessionLocal() as session:
+            user_ids = (await session.execute(
+                select(User.id).where(User.id > last_id).order_by(User.id).limit(batch_size)
+            )).scalars().all()
+            if not user_ids:
+                break
+
+            current = {
+                row.user_id: row
+                for row in (await session.execute(
+                    select(UserStats)
+                    .where(UserStats.user_id.in_(user_ids))
+                    .order_by(UserStats.user_id)
+                    .with_for_update()
+                )).scalars()
+            }
+            counted = await compute_user_stats(session, user_ids)
+
+            now = datetime.now(timezone.utc)
+            changes = []
+            for user_id, values in counted.items():
+                row = current.get(user_id)
+                if row is None or _drifted(row, values):
+                    changes.append({"user_id": user_id, **values, "reconciled_at": now})
+            if changes:
+                stmt = insert(UserStats).values(changes)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[UserStats.user_id],
+                    set_={
+                        key: stmt.excluded[key]
+                        for key in (
+                            "projects_count", "analyses_count", "confidence_sum",
+                            "languages", "modes", "reconciled_at",
+                        )
+                    },
+                )
+                await session.execute(stmt)
+            await session.commit()
+
+        scanned += len(user_ids)
+        drifted += len(changes)
+        last_id = user_ids[-1]
+        logger.info(f"Reconciled stats of {scanned} users so far ({drifted} drifted)")
+
+    return {"scanned": scanned, "drifted": drifted}
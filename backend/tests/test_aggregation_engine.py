@@ -0,0 +1,63 @@
+from services.aggregation_engine import aggregate_issues
+
+
+def _static(line, message, issue_type="style"):
+    return {"type": issue_type, "line": line, "severity": "LOW", "message": message}
+
+
+def _ai(line, message, issue_type="bug", explanation="why"):
+    return {
+        "type": issue_type, "line": line, "severity": "HIGH", "message": message,
+        "explanation": explanation, "suggestion": "fix",
+    }
+
+
+def test_same_line_matches_regardless_of_message():
+    # Baseline behaviour: an AI issue on a static finding's line confirms it
+    merged = aggregate_issues([_static(4, "Unused variable: tmp")], [_ai(4, "Completely different wording")])
+    assert len(merged) == 1
+    assert merged[0]["source"] == "verified"
+    assert merged[0]["explanation"] == "why"
+
+
+def test_same_line_ties_broken_by_type_then_message():
+    static = [
+        _static(7, "Unused variable: tmp", "style"),
+        _static(7, "Null pointer dereference: ptr", "error"),
+    ]
+    merged = aggregate_issues(static, [_ai(7, "ptr may be null when dereferenced", "error")])
+    assert [issue["explanation"] for issue in merged] == ["", "why"]
+
+    merged = aggregate_issues(static, [_ai(7, "Null pointer dereference of ptr", "bug")])
+    assert [issue["explanation"] for issue in merged] == ["", "why"]
+
+
+def test_same_line_prefers_unenriched_finding():
+    static = [_static(3, "first finding"), _static(3, "second finding")]
+    merged = aggregate_issues(static, [_ai(3, "one", explanation="a"), _ai(3, "two", explanation="b")])
+    assert [issue["explanation"] for issue in merged] == ["a", "b"]
+
+
+def test_neighbouring_line_needs_similar_message():
+    static = [_static(10, "Memory leak: block", "error")]
+    merged = aggregate_issues(static, [_ai(11, "Memory leak of block detected", "error")])
+    assert len(merged) == 1 and merged[0]["explanation"] == "why"
+
+    merged = aggregate_issues(static, [_ai(11, "Loop bound recomputed every iteration", "performance")])
+    assert [issue["source"] for issue in merged] == ["verified", "inferred"]
+
+
+def test_inferred_duplicates_merge():
+    merged = aggregate_issues([], [
+        _ai(20, "Loop recomputes an invariant bound", "performance", explanation=""),
+        _ai(20, "Loop recomputes the invariant bound each time", "performance", explanation="hoist"),
+    ])
+    assert len(merged) == 1
+    assert merged[0]["source"] == "inferred"
+    assert merged[0]["explanation"] == "hoist"
+
+
+def test_line_zero_and_missing_lines():
+    merged = aggregate_issues([_static(0, "file-level finding")], [_ai(0, "about the file"), _ai("?", "other")])
+    assert merged[0]["explanation"] == "why"
+    assert len(merged) == 1
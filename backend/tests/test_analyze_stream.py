@@ -0,0 +1,136 @@
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from database import get_db
+from routes import analyze
+from services.static_executor import StaticAnalysisBusy
+from utils.auth import get_current_user_optional
+
+STATIC = [{"type": "security", "line": 1, "severity": "HIGH", "message": "eval", "source": "static"}]
+AI_ISSUE = {"type": "bug", "line": 2, "severity": "MEDIUM", "message": "off by one", "source": "ai"}
+REQUEST = {"language": "python", "mode": "bug", "code": "x = eval(s)\n"}
+
+
+def _groq_result(**extra):
+    return {
+        "ai_issues": [AI_ISSUE], "optimized_code": "x = int(s)\n", "explanation": "safer",
+        "token_usage": {"prompt_tokens": 10, "completion_tokens": 5, "measured": True},
+        "routing": {"rule": "default", "load_shed": False}, **extra,
+    }
+
+
+@pytest.fixture
+def stored():
+    """Results handed to put_cached."""
+    return []
+
+
+@pytest.fixture
+def client(monkeypatch, stored):
+    async def cache_key_for(*args, **kwargs):
+        return "k"
+
+    async def get_cached(key):
+        return None
+
+    async def static(language, code):
+        return STATIC
+
+    async def put_cached(key, result):
+        stored.append(result)
+
+    async def stream(**kwargs):
+        yield "ai_issue", AI_ISSUE
+        yield "field", ("optimized_code", "x = int(s)\n")
+        yield "result", _groq_result()
+
+    monkeypatch.setattr(analyze, "cache_key_for", cache_key_for)
+    monkeypatch.setattr(analyze, "get_cached", get_cached)
+    monkeypatch.setattr(analyze, "run_static_analysis_async", static)
+    monkeypatch.setattr(analyze, "put_cached", put_cached)
+    monkeypatch.setattr(analyze, "stream_analysis_with_groq", stream)
+
+    app = FastAPI()
+    app.include_router(analyze.router)
+    app.dependency_overrides[get_db] = lambda: None
+    app.dependency_overrides[get_current_user_optional] = lambda: None
+    return TestClient(app)
+
+
+def _events(response) -> list:
+    events = []
+    for block in response.text.strip().split("\n\n"):
+        event, data = block.split("\n")
+        events.append((event.removeprefix("event: "), json.loads(data.removeprefix("data: "))))
+    return events
+
+
+def test_events_arrive_in_order(client, stored):
+    response = client.post("/api/analyze/stream", json=REQUEST)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = _events(response)
+    assert [event for event, _ in events] == ["static_issues", "ai_issue", "optimized_code", "result"]
+    assert events[0][1] == STATIC
+    assert events[1][1] == AI_ISSUE
+    assert events[2][1] == "x = int(s)\n"
+
+    result = events[-1][1]
+    # The same payload as /api/analyze
+    assert result["optimized_code"] == "x = int(s)\n"
+    assert result["aggregated_issues"] and result["confidence_score"] > 0
+    assert result["saved"] is False and result["cached"] is False and result["analysis_id"] is None
+    assert len(stored) == 1
+
+
+def test_cached_result_is_replayed(client, stored, monkeypatch):
+    cached = {
+        "static_issues": STATIC, "ai_suggestions": [AI_ISSUE], "aggregated_issues": [],
+        "optimized_code": "cached()\n", "explanation": "", "confidence_score": 50.0,
+        "token_usage": None, "routing": {"cached": True},
+    }
+
+    async def get_cached(key):
+        return cached
+
+    monkeypatch.setattr(analyze, "get_cached", get_cached)
+    events = _events(client.post("/api/analyze/stream", json=REQUEST))
+    assert [event for event, _ in events] == ["static_issues", "ai_issue", "optimized_code", "result"]
+    assert events[2][1] == "cached()\n"
+    assert events[-1][1]["cached"] is True
+    assert stored == []
+
+
+def test_failed_llm_result_is_not_cached(client, stored, monkeypatch):
+    async def stream(**kwargs):
+        yield "result", _groq_result(ai_issues=[], failed=True, error="timeout")
+
+    monkeypatch.setattr(analyze, "stream_analysis_with_groq", stream)
+    events = _events(client.post("/api/analyze/stream", json=REQUEST))
+    # The optimized code was never streamed, so it is sent with the result
+    assert [event for event, _ in events] == ["static_issues", "optimized_code", "result"]
+    assert stored == []
+
+
+def test_static_capacity_is_a_real_503(client, monkeypatch):
+    async def busy(language, code):
+        raise StaticAnalysisBusy("bandit queue is full")
+
+    monkeypatch.setattr(analyze, "run_static_analysis_async", busy)
+    response = client.post("/api/analyze/stream", json=REQUEST)
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "5"
+
+
+def test_failure_after_start_is_an_error_event(client, monkeypatch):
+    async def stream(**kwargs):
+        yield "ai_issue", AI_ISSUE
+        raise RuntimeError("connection reset")
+
+    monkeypatch.setattr(analyze, "stream_analysis_with_groq", stream)
+    events = _events(client.post("/api/analyze/stream", json=REQUEST))
+    assert [event for event, _ in events] == ["static_issues", "ai_issue", "error"]
+    assert "connection reset" in events[-1][1]["detail"]
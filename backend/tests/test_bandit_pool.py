@@ -0,0 +1,81 @@
+import asyncio
+import concurrent.futures
+from concurrent.futures.process import _RemoteTraceback
+
+import pytest
+
+from services import bandit_pool
+
+VULNERABLE = "import subprocess\nsubprocess.call('ls', shell=True)\n"
+
+
+@pytest.fixture(autouse=True)
+def fresh_pool(monkeypatch):
+    monkeypatch.setattr(bandit_pool, "_api_incompatible", False)
+    monkeypatch.setattr(bandit_pool, "_stats", dict.fromkeys(bandit_pool._stats, 0))
+    yield
+    bandit_pool.stop_bandit_pool(terminate=True)
+
+
+def test_pooled_scan_finds_issues():
+    issues = asyncio.run(bandit_pool.run_bandit_pooled(VULNERABLE))
+    assert any(issue["line"] == 2 and issue["type"] == "security" for issue in issues)
+    assert bandit_pool.bandit_pool_stats()["scans"] == 1
+
+
+def test_timeout_recycles_the_pool(monkeypatch):
+    bandit_pool.start_bandit_pool()
+    processes = list(bandit_pool._executor._processes.values())
+    monkeypatch.setattr(bandit_pool, "STATIC_ANALYSIS_TIMEOUT_SECONDS", 0)
+
+    assert asyncio.run(bandit_pool.run_bandit_pooled(VULNERABLE)) == []
+    stats = bandit_pool.bandit_pool_stats()
+    assert stats["timeouts"] == 1 and stats["recycled"] == 1
+    assert not stats["running"]
+    for process in processes:
+        process.join(5)
+        assert not process.is_alive()
+
+
+class _IncompatibleExecutor(concurrent.futures.Executor):
+    """Stands in for a pool whose Bandit lacks BanditManager._parse_file."""
+
+    _processes = {}
+
+    def __init__(self, remote=True):
+        self.remote = remote
+
+    def submit(self, fn, *args, **kwargs):
+        error = AttributeError("'BanditManager' object has no attribute '_parse_file'")
+        if self.remote:
+            # How ProcessPoolExecutor returns an exception raised in a worker
+            error.__cause__ = _RemoteTraceback("Traceback (most recent call last): ...")
+        future = concurrent.futures.Future()
+        future.set_exception(error)
+        return future
+
+
+def test_incompatible_bandit_falls_back_to_cli(monkeypatch):
+    monkeypatch.setattr(bandit_pool, "_executor", _IncompatibleExecutor())
+    assert asyncio.run(bandit_pool.run_bandit_pooled(VULNERABLE)) is None
+    # Later scans skip the pool entirely
+    assert asyncio.run(bandit_pool.run_bandit_pooled(VULNERABLE)) is None
+    stats = bandit_pool.bandit_pool_stats()
+    assert stats["api_incompatible"] and stats["fallbacks"] == 2
+
+
+def test_error_outside_the_workers_keeps_the_pool(monkeypatch):
+    executor = _IncompatibleExecutor(remote=False)
+    monkeypatch.setattr(bandit_pool, "_executor", executor)
+    assert asyncio.run(bandit_pool.run_bandit_pooled(VULNERABLE)) is None
+    stats = bandit_pool.bandit_pool_stats()
+    assert not stats["api_incompatible"] and stats["fallbacks"] == 1
+    assert bandit_pool._executor is executor
+
+
+def test_pool_stopped_during_start_falls_back_to_cli(monkeypatch):
+    # e.g. another scan timed out and recycled the pool while this one waited
+    monkeypatch.setattr(bandit_pool, "start_bandit_pool", lambda: None)
+    assert asyncio.run(bandit_pool.run_bandit_pooled(VULNERABLE)) is None
+    stats = bandit_pool.bandit_pool_stats()
+    assert not stats["api_incompatible"] and stats["fallbacks"] == 1
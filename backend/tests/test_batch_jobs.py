@@ -0,0 +1,204 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from models.analysis_batch import AnalysisBatch
+from models.analysis_history import AnalysisHistory
+from models.project_activity import ProjectActivity
+from services import batch_jobs
+
+
+class _Returning:
+    def __init__(self, cancel_requested):
+        self.cancel_requested = cancel_requested
+
+    def first(self):
+        return self
+
+
+class _Store:
+    """What the fake sessions committed: one entry per transaction."""
+
+    def __init__(self, cancel_requested=False):
+        self.transactions = []
+        self.cancel_requested = cancel_requested
+        self.next_id = 1
+
+    def session(self):
+        return _Session(self)
+
+
+class _Session:
+    def __init__(self, store):
+        self.store = store
+        self.records = []
+        self.snapshots = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def add_all(self, records):
+        self.records.extend(records)
+
+    async def flush(self):
+        for record in self.records:
+            if isinstance(record, AnalysisHistory) and record.id is None:
+                record.id = self.store.next_id
+                self.store.next_id += 1
+
+    async def execute(self, statement):
+        self.snapshots.append(statement.compile().params)
+        return _Returning(self.store.cancel_requested)
+
+    async def commit(self):
+        self.store.transactions.append({"records": self.records, "snapshots": self.snapshots})
+
+
+def _files(n, empty=()):
+    return [
+        {"id": i, "name": f"f{i}.py", "language": "python", "content": "" if i in empty else f"x = {i}"}
+        for i in range(1, n + 1)
+    ]
+
+
+def _patch(monkeypatch, store, analyze, flush_size=2):
+    async def no_count(session, records):
+        pass
+
+    monkeypatch.setattr(batch_jobs, "AsyncSessionLocal", store.session)
+    monkeypatch.setattr(batch_jobs, "count_analyses", no_count)
+    monkeypatch.setattr(batch_jobs, "run_analysis", analyze)
+    monkeypatch.setattr(batch_jobs, "BATCH_FLUSH_SIZE", flush_size)
+    monkeypatch.setattr(batch_jobs, "BATCH_SYNC_SECONDS", 0.01)
+
+
+def _result(code):
+    return {
+        "static_issues": [], "ai_suggestions": [], "aggregated_issues": [],
+        "optimized_code": code, "explanation": "", "confidence_score": 80.0,
+    }
+
+
+async def _run(job):
+    batch_jobs._running[job.id] = job
+    job.task = asyncio.create_task(job.run())
+    await job.task
+
+
+def test_progress_partial_results_and_bulk_flush(monkeypatch):
+    store = _Store()
+
+    async def analyze(language, mode, instruction, code, file_id=None):
+        if file_id == 3:
+            raise RuntimeError("model unavailable")
+        return _result(code), file_id == 2
+
+    _patch(monkeypatch, store, analyze)
+    job = batch_jobs.BatchJob(1, 7, "bug", "", _files(6, empty={6}), concurrency=2)
+    asyncio.run(_run(job))
+
+    assert job.status == batch_jobs.DONE
+    row = job.row()
+    progress = batch_jobs.batch_to_dict(row, include_results=False)["progress"]
+    assert progress == {
+        "total": 6, "pending": 0, "running": 0, "done": 4, "failed": 1,
+        "skipped": 1, "cancelled": 0, "interrupted": 0,
+    }
+    assert job.files[3]["error"] == "model unavailable"
+    assert job.files[2]["cached"] is True
+
+    # Four analyzed files, two per flush: each flush writes their history and
+    # activity rows together with the batch state
+    writes = [t for t in store.transactions if t["records"]]
+    assert len(writes) == 2
+    for transaction in writes:
+        assert [type(r) for r in transaction["records"]] == [AnalysisHistory, ProjectActivity] * 2
+        assert transaction["snapshots"]
+    assert {entry["analysis_id"] for entry in job.files.values() if entry["status"] == "done"} == {1, 2, 3, 4}
+    assert store.transactions[-1]["snapshots"][-1]["status"] == batch_jobs.DONE
+
+    # Partial results come from the flushed history rows
+    shown = batch_jobs.batch_to_dict(row, include_results=True, results={1: {"optimized_code": "x = 1"}})
+    by_file = {entry["file_id"]: entry for entry in shown["files"]}
+    assert by_file[1]["result"] == {"optimized_code": "x = 1"}
+    assert by_file[3]["result"] is None
+
+
+def _slow(store):
+    async def analyze(language, mode, instruction, code, file_id=None):
+        if file_id > 2:
+            await asyncio.sleep(10)
+        return _result(code), False
+    return analyze
+
+
+def test_cancel_keeps_finished_results(monkeypatch):
+    store = _Store()
+    _patch(monkeypatch, store, _slow(store), flush_size=10)
+    job = batch_jobs.BatchJob(1, 7, "bug", "", _files(4), concurrency=4)
+
+    async def scenario():
+        batch_jobs._running[job.id] = job
+        job.task = asyncio.create_task(job.run())
+        await asyncio.sleep(0.05)
+        row = job.row()
+        await batch_jobs.cancel_batch_job(None, row)
+        await asyncio.gather(job.task, return_exceptions=True)
+
+    asyncio.run(scenario())
+    assert job.status == batch_jobs.CANCELLED
+    assert [job.files[i]["status"] for i in range(1, 5)] == ["done", "done", "cancelled", "cancelled"]
+    # The two finished files were saved on the way out
+    assert sum(isinstance(r, AnalysisHistory) for t in store.transactions for r in t["records"]) == 2
+    assert job.id not in batch_jobs._running
+
+
+def test_cancel_requested_by_another_worker_stops_the_batch(monkeypatch):
+    store = _Store(cancel_requested=True)
+    _patch(monkeypatch, store, _slow(store), flush_size=10)
+    job = batch_jobs.BatchJob(1, 7, "bug", "", _files(4), concurrency=4)
+
+    async def scenario():
+        await asyncio.wait_for(asyncio.gather(_run(job), return_exceptions=True), 2)
+
+    asyncio.run(scenario())
+    assert job.status == batch_jobs.CANCELLED
+
+
+def test_shutdown_marks_batches_interrupted(monkeypatch):
+    store = _Store()
+    _patch(monkeypatch, store, _slow(store), flush_size=10)
+    job = batch_jobs.BatchJob(1, 7, "bug", "", _files(4), concurrency=4)
+
+    async def scenario():
+        batch_jobs._running[job.id] = job
+        job.task = asyncio.create_task(job.run())
+        await asyncio.sleep(0.05)
+        await batch_jobs.cancel_all_batch_jobs()
+
+    asyncio.run(scenario())
+    assert job.status == batch_jobs.INTERRUPTED
+    assert job.files[3]["status"] == batch_jobs.INTERRUPTED
+    assert store.transactions[-1]["snapshots"][-1]["status"] == batch_jobs.INTERRUPTED
+
+
+def test_batch_whose_worker_stopped_saving_is_interrupted():
+    now = datetime.now(timezone.utc)
+    row = AnalysisBatch(
+        id="b", user_id=1, project_id=7, mode="bug", concurrency=2, status=batch_jobs.RUNNING,
+        files=[
+            {"file_id": 1, "status": "done"},
+            {"file_id": 2, "status": "running"},
+            {"file_id": 3, "status": "pending"},
+        ],
+        heartbeat_at=now - timedelta(seconds=batch_jobs.BATCH_STALE_SECONDS - 1),
+    )
+    assert not batch_jobs._stale(row, now)
+    row.heartbeat_at = now - timedelta(seconds=batch_jobs.BATCH_STALE_SECONDS + 1)
+    assert batch_jobs._stale(row, now)
+
+    batch_jobs._mark_interrupted(row)
+    assert row.status == batch_jobs.INTERRUPTED
+    assert [entry["status"] for entry in row.files] == ["done", "interrupted", "interrupted"]
@@ -0,0 +1,19 @@
+from sqlalchemy.dialects import postgresql
+
+import check_query_plans
+from routes.history import history_page_query
+
+
+def test_every_statement_compiles_for_explain():
+    for name, statement in check_query_plans.queries(1):
+        compiled = str(statement.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+        assert compiled.startswith("SELECT"), name
+
+
+def test_history_pages_are_the_routes_own_query():
+    statements = dict(check_query_plans.queries(1))
+    page = statements["history first page"]
+    assert [c.name for c in page.selected_columns] == [
+        c.name for c in history_page_query(1, 1).selected_columns
+    ]
+    assert "prompt_tokens" in [c.name for c in page.selected_columns]
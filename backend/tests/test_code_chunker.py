@@ -0,0 +1,72 @@
+import asyncio
+import random
+
+import pytest
+
+from services import analysis_pipeline
+from services.code_chunker import _group, split_code
+
+
+def _covered_once(ranges: list, total: int) -> bool:
+    lines = [line for start, end in ranges for line in range(start, end + 1)]
+    return lines == list(range(1, total + 1))
+
+
+def test_group_covers_every_line_exactly_once():
+    rng = random.Random(0)
+    for _ in range(500):
+        total = rng.randint(1, 400)
+        max_lines = rng.randint(1, 60)
+        # Duplicates, out-of-range and unsorted boundaries included
+        boundaries = [rng.randint(-5, total + 5) for _ in range(rng.randint(0, 40))]
+        ranges = _group(boundaries, total, max_lines)
+        assert _covered_once(ranges, total), (boundaries, total, max_lines)
+        assert all(end - start + 1 <= 2 * max_lines for start, end in ranges)
+
+
+def test_group_cuts_only_far_oversized_segments():
+    # One 25-line definition with a budget of 10 is cut; one of 15 is kept whole
+    assert _group([26], 30, 10) == [(1, 10), (11, 20), (21, 25), (26, 30)]
+    assert _group([16], 20, 10) == [(1, 15), (16, 20)]
+
+
+PYTHON = "\n".join(
+    f"def f{i}():\n    a = {i}\n    return a\n" for i in range(40)
+)
+JAVASCRIPT = "\n".join(
+    f"function f{i}() {{\n  const s = '{{';\n  return {i};\n}}" for i in range(40)
+)
+PROSE = "\n".join(f"line {i}" + ("\n" if i % 7 == 0 else "") for i in range(200))
+
+
+@pytest.mark.parametrize("language,code", [
+    ("python", PYTHON),
+    ("javascript", JAVASCRIPT),
+    ("python", "def broken(:\n" + PROSE),
+    ("text", PROSE),
+])
+def test_split_code_reassembles_the_input(language, code):
+    chunks = split_code(language, code, 30)
+    assert len(chunks) > 1
+    assert _covered_once([(c["start_line"], c["end_line"]) for c in chunks], len(code.splitlines()))
+    assert "\n".join(c["code"] for c in chunks) == "\n".join(code.splitlines())
+
+
+def test_python_chunks_start_at_definitions():
+    for chunk in split_code("python", PYTHON, 30):
+        assert chunk["code"].startswith("def ")
+
+
+def test_chunk_issue_lines_are_remapped_into_the_chunk(monkeypatch):
+    chunk = {"start_line": 101, "end_line": 150, "code": "\n".join(["x = 1"] * 50)}
+    lines = [1, 50, 51, 999, 0, -3, "7", None]
+
+    async def analyze(**kwargs):
+        return {"ai_issues": [{"line": line, "message": str(line)} for line in lines], "optimized_code": ""}
+
+    monkeypatch.setattr(analysis_pipeline, "analyze_with_groq_async", analyze)
+    result = asyncio.run(analysis_pipeline._analyze_chunk("python", "bug", "", chunk, []))
+    remapped = [issue["line"] for issue in result["ai_issues"]]
+    # Positive lines land in the chunk (out-of-range ones on its last line);
+    # anything else is left for aggregation to coerce
+    assert remapped == [101, 150, 150, 150, 0, -3, "7", None]
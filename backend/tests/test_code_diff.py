@@ -0,0 +1,95 @@
+import random
+
+import pytest
+
+from services.code_diff import DiffApplyError, apply_unified_diff, make_unified_diff, parse_unified_diff
+
+CODE = "a\nb\nc\nd\ne"
+
+
+def test_round_trip_random_edits():
+    rng = random.Random(7)
+    for _ in range(300):
+        old = [f"line {i}" for i in range(rng.randint(1, 60))]
+        new = list(old)
+        for _ in range(rng.randint(1, 5)):
+            at = rng.randrange(len(new) + 1)
+            action = rng.choice(("insert", "delete", "replace"))
+            if action == "insert" or not new:
+                new.insert(at, f"added {rng.random():.6f}")
+            elif action == "delete":
+                del new[min(at, len(new) - 1)]
+            else:
+                new[min(at, len(new) - 1)] = f"changed {rng.random():.6f}"
+        old_code, new_code = "\n".join(old), "\n".join(new)
+        assert apply_unified_diff(old_code, make_unified_diff(old_code, new_code)) == new_code
+
+
+def test_header_undercounts_added_lines():
+    diff = "@@ -2,2 +2,2 @@\n b\n-c\n+C1\n+C2\n+C3\n d\n"
+    assert apply_unified_diff(CODE, diff) == "a\nb\nC1\nC2\nC3\nd\ne"
+
+
+def test_header_overcounts_lines():
+    diff = "@@ -2,9 +2,9 @@\n b\n-c\n+C\n d\n"
+    assert apply_unified_diff(CODE, diff) == "a\nb\nC\nd\ne"
+
+
+def test_miscounted_hunks_followed_by_another_hunk():
+    code = "\n".join(str(i) for i in range(1, 21))
+    diff = "@@ -2,1 +2,1 @@\n 2\n-3\n+three\n+3.5\n 4\n@@ -15,3 +16,3 @@\n 15\n-16\n+sixteen\n 17\n"
+    result = apply_unified_diff(code, diff).split("\n")
+    assert result[1:5] == ["2", "three", "3.5", "4"]
+    assert result[15:18] == ["15", "sixteen", "17"]
+
+
+def test_pure_insertion():
+    assert apply_unified_diff(CODE, "@@ -2,0 +3,2 @@\n+x\n+y\n") == "a\nb\nx\ny\nc\nd\ne"
+    assert apply_unified_diff(CODE, "@@ -0,0 +1 @@\n+top\n") == "top\n" + CODE
+
+
+def test_context_found_at_fuzzed_offset():
+    code = "\n".join(f"line {i}" for i in range(100))
+    for shift in (-15, -3, 0, 4, 20):
+        start = 50 + shift
+        diff = f"@@ -{start},3 +{start},3 @@\n line 49\n-line 50\n+LINE 50\n line 51\n"
+        assert apply_unified_diff(code, diff).split("\n")[50] == "LINE 50"
+    with pytest.raises(DiffApplyError):
+        apply_unified_diff(code, "@@ -80,3 +80,3 @@\n line 49\n-line 50\n+LINE 50\n line 51\n")
+
+
+def test_file_headers_and_trailing_blank_lines_are_ignored():
+    diff = "--- original\n+++ optimized\n@@ -2,3 +2,3 @@\n b\n-c\n+C\n d\n\n\n"
+    assert apply_unified_diff(CODE, diff) == "a\nb\nC\nd\ne"
+
+
+def test_blank_context_line_without_leading_space():
+    code = "a\n\nb"
+    assert apply_unified_diff(code, "@@ -1,3 +1,3 @@\n a\n\n-b\n+B") == "a\n\nB"
+
+
+def test_removed_line_that_looks_like_a_file_header():
+    code = "select 1;\n-- old comment\nselect 2;"
+    diff = "@@ -1,3 +1,2 @@\n select 1;\n--- old comment\n select 2;\n"
+    assert apply_unified_diff(code, diff) == "select 1;\nselect 2;"
+
+
+def test_changed_lines_outside_a_hunk_raise():
+    with pytest.raises(DiffApplyError):
+        parse_unified_diff("+x\n@@ -1 +1 @@\n-a\n+A\n")
+
+
+def test_garbage_in_hunk_raises():
+    with pytest.raises(DiffApplyError):
+        apply_unified_diff(CODE, "@@ -2,2 +2,2 @@\n b\n-c\n+C\nThis replaces c.\n")
+
+
+def test_mismatched_context_raises():
+    with pytest.raises(DiffApplyError):
+        apply_unified_diff(CODE, "@@ -2,2 +2,2 @@\n x\n-y\n+z\n")
+
+
+def test_empty_diff_returns_code():
+    assert apply_unified_diff(CODE, "") == CODE
+    with pytest.raises(DiffApplyError):
+        apply_unified_diff(CODE, "no hunks here")
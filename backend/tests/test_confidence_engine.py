@@ -0,0 +1,87 @@
+import random
+
+import pytest
+
+from services.confidence_engine import compute_confidence, compute_confidence_batch
+
+ISSUES = {
+    "C": {"source": "verified", "explanation": "confirmed by the model"},
+    "S": {"source": "verified"},
+    "I": {"source": "inferred"},
+}
+
+
+def _issues(pattern: str) -> list:
+    return [ISSUES[kind] for kind in pattern]
+
+
+def baseline_compute_confidence(aggregated_issues: list) -> float:
+    """compute_confidence before weights were configurable; stored scores came from this."""
+    if not aggregated_issues:
+        return 0.75
+
+    total_weight = 0.0
+    total_score = 0.0
+
+    for issue in aggregated_issues:
+        source = issue.get("source", "inferred")
+        has_explanation = bool(issue.get("explanation"))
+
+        if source == "verified" and has_explanation:
+            score = 0.90
+            weight = 2.0
+        elif source == "verified":
+            score = 0.85
+            weight = 1.5
+        else:
+            score = 0.75
+            weight = 1.0
+
+        total_score += score * weight
+        total_weight += weight
+
+    if total_weight == 0:
+        return 0.75
+
+    raw = total_score / total_weight
+    return round(max(0.60, min(0.95, raw)), 4)
+
+
+# Lists whose score depends on summing issue by issue: summing per category
+# first gives 0.0001 more on each of them
+PINNED = [
+    ("", 0.75),
+    ("I", 0.75),
+    ("C", 0.9),
+    ("S", 0.85),
+    ("CSI", 0.85),
+    ("ICSCISSSSSICCSISIISICS", 0.8437),
+    ("SIISSSCSIIIISCSCISCSCICSIIIIISCISICSICCCICSC", 0.8437),
+    ("ISSSSCCICCIIIISCSCCSICCSICICSCCSSCCCICSCSSCISIISSCS", 0.8587),
+    ("ICISICICCSSCSISSICSCCIICSCCCICI", 0.8562),
+    ("ISISSSCSISSSIIISISCSSICCISISCCCSS", 0.8437),
+]
+
+
+@pytest.mark.parametrize("pattern, expected", PINNED)
+def test_pinned_baseline_scores(pattern, expected):
+    assert baseline_compute_confidence(_issues(pattern)) == expected
+    assert compute_confidence(_issues(pattern)) == expected
+
+
+def test_batch_matches_pinned_scores():
+    patterns = [pattern for pattern, _ in PINNED]
+    assert compute_confidence_batch([_issues(pattern) for pattern in patterns]) == [score for _, score in PINNED]
+
+
+def test_random_lists_match_baseline():
+    rng = random.Random(3)
+    lists = [_issues("".join(rng.choice("CSI") for _ in range(rng.randint(0, 80)))) for _ in range(5000)]
+    expected = [baseline_compute_confidence(issues) for issues in lists]
+    assert [compute_confidence(issues) for issues in lists] == expected
+    assert compute_confidence_batch(lists) == expected
+
+
+def test_batch_handles_none_and_empty():
+    assert compute_confidence_batch([]) == []
+    assert compute_confidence_batch([None, [], _issues("C")]) == [0.75, 0.75, 0.9]
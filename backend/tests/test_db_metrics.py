@@ -0,0 +1,124 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, exc, text
+from sqlalchemy.pool import QueuePool
+
+from database import metrics
+from routes import analyze
+from routes import metrics as metrics_routes
+from utils import auth
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    """A SQLite engine instrumented like the app's, with fresh counters."""
+    monkeypatch.setattr(metrics, "_stats", dict.fromkeys(metrics._stats, 0))
+    monkeypatch.setattr(metrics, "_endpoints", {})
+    monkeypatch.setattr(metrics, "_pool", None)
+    sync_engine = create_engine("sqlite://", poolclass=QueuePool, connect_args={"check_same_thread": False})
+    metrics.instrument_engine(SimpleNamespace(sync_engine=sync_engine))
+    yield sync_engine
+    sync_engine.dispose()
+
+
+def test_queries_and_errors_are_counted(engine):
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        with pytest.raises(exc.OperationalError):
+            conn.execute(text("SELECT * FROM missing"))
+        # The failed query's start time was popped, so the next one is timed from its own start
+        assert conn.info["query_started"] == []
+        conn.execute(text("SELECT 2"))
+        assert conn.info["query_started"] == []
+
+    stats = metrics.db_stats()
+    assert stats["queries"] == 2 and stats["errors"] == 1
+    assert stats["connections_opened"] == 1
+    assert stats["pool"]["in_use"] == 0
+
+
+def test_error_pops_only_its_own_start():
+    conn = SimpleNamespace(info={})
+    metrics._before_cursor_execute(conn, None, "outer", None, None, False)
+    metrics._before_cursor_execute(conn, None, "inner", None, None, False)
+    outer_started = conn.info["query_started"][0]
+    metrics._handle_error(SimpleNamespace(connection=conn))
+    assert conn.info["query_started"] == [outer_started]
+
+    # No connection, or nothing being timed: nothing to pop
+    metrics._handle_error(SimpleNamespace(connection=None))
+    metrics._handle_error(SimpleNamespace(connection=SimpleNamespace(info={})))
+
+
+def test_slow_queries_are_counted_for_the_request(engine, monkeypatch):
+    monkeypatch.setattr(metrics, "DB_SLOW_QUERY_MS", 0)
+    stats = metrics.RequestDBStats("/slow")
+    token = metrics._current.set(stats)
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    finally:
+        metrics._current.reset(token)
+    assert stats.queries == 1 and stats.slow_queries == 1
+    assert metrics.db_stats()["slow_queries"] == 1
+
+
+@pytest.fixture
+def client(engine, monkeypatch):
+    monkeypatch.setattr(metrics, "DB_DEBUG_HEADERS", True)
+    app = FastAPI()
+    app.middleware("http")(metrics.db_metrics_middleware)
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: int):
+        with engine.connect() as conn:
+            for _ in range(item_id):
+                conn.execute(text("SELECT 1"))
+        return {}
+
+    return TestClient(app)
+
+
+def test_middleware_counts_each_request_separately(client):
+    assert client.get("/items/3").headers["X-DB-Queries"] == "3"
+    assert client.get("/items/1").headers["X-DB-Queries"] == "1"
+
+    endpoint = metrics.db_stats()["endpoints"]["GET /items/{item_id}"]
+    assert endpoint["requests"] == 2 and endpoint["queries"] == 4
+    assert endpoint["max_queries"] == 3 and endpoint["avg_queries"] == 2.0
+
+
+def test_debug_headers_are_off_by_default(client, monkeypatch):
+    monkeypatch.setattr(metrics, "DB_DEBUG_HEADERS", False)
+    response = client.get("/items/1")
+    assert "X-DB-Queries" not in response.headers
+    # Still recorded per endpoint
+    assert metrics.db_stats()["endpoints"]["GET /items/{item_id}"]["queries"] == 1
+
+
+@pytest.fixture
+def stats_client():
+    app = FastAPI()
+    app.include_router(metrics_routes.router)
+    app.include_router(analyze.router)
+    return TestClient(app)
+
+
+STATS_PATHS = ["/api/metrics/db", "/api/analyze/cache-stats", "/api/analyze/static-stats", "/api/analyze/llm-stats"]
+
+
+@pytest.mark.parametrize("path", STATS_PATHS)
+def test_stats_are_disabled_without_a_metrics_token(stats_client, monkeypatch, path):
+    monkeypatch.setattr(auth, "METRICS_TOKEN", "")
+    assert stats_client.get(path, headers={"X-Metrics-Token": ""}).status_code == 404
+
+
+@pytest.mark.parametrize("path", STATS_PATHS)
+def test_stats_require_the_metrics_token(stats_client, monkeypatch, path):
+    monkeypatch.setattr(auth, "METRICS_TOKEN", "s3cret")
+    assert stats_client.get(path).status_code == 403
+    assert stats_client.get(path, headers={"X-Metrics-Token": "guess"}).status_code == 403
+    assert stats_client.get(path, headers={"X-Metrics-Token": "s3cret"}).status_code == 200
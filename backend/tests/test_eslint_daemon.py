@@ -0,0 +1,114 @@
+import asyncio
+import shutil
+
+import pytest
+
+from services import eslint_daemon
+
+pytestmark = pytest.mark.skipif(shutil.which("node") is None, reason="node is not installed")
+
+# Speaks eslint_daemon.cjs's protocol without ESLint. The code decides the reply:
+# "crash" exits, "desync" answers with the wrong id, "hang" never answers,
+# "bloat" reports a large RSS; anything else yields one warning on line 1.
+FAKE_DAEMON = r"""
+const readline = require('readline')
+const send = (message) => process.stdout.write(JSON.stringify(message) + '\n')
+if (process.env.FAKE_ESLINT_BROKEN) {
+  send({ ready: false, error: 'eslint not found' })
+  process.exit(1)
+}
+send({ ready: true })
+const rl = readline.createInterface({ input: process.stdin })
+rl.on('line', (line) => {
+  const { id, code } = JSON.parse(line)
+  if (code === 'crash') process.exit(1)
+  if (code === 'hang') return
+  if (code === 'desync') return send({ id: id + 100, results: [] })
+  const rss = code === 'bloat' ? 1024 * 1024 * 1024 : 1024
+  send({ id, results: [{ messages: [{ line: 1, severity: 1, message: 'pid ' + process.pid }] }], rss })
+})
+"""
+
+
+@pytest.fixture(autouse=True)
+def fake_daemon(tmp_path, monkeypatch):
+    script = tmp_path / "fake_daemon.cjs"
+    script.write_text(FAKE_DAEMON)
+    monkeypatch.setattr(eslint_daemon, "_SCRIPT", str(script))
+    monkeypatch.setattr(eslint_daemon, "ESLINT_DAEMON_POOL_SIZE", 1)
+    monkeypatch.setattr(eslint_daemon, "ESLINT_DAEMON_MAX_RSS_MB", 512)
+    monkeypatch.setattr(eslint_daemon, "_idle", None)
+    monkeypatch.setattr(eslint_daemon, "_daemons", [])
+    monkeypatch.setattr(eslint_daemon, "_unavailable_until", 0.0)
+    monkeypatch.setattr(eslint_daemon, "_stats", dict.fromkeys(eslint_daemon._stats, 0))
+
+
+def _run(*codes):
+    """Lint *codes* in order on one event loop; returns each result."""
+    async def scenario():
+        await eslint_daemon.start_eslint_daemons()
+        results = [await eslint_daemon.lint_with_daemon(code) for code in codes]
+        await eslint_daemon.stop_eslint_daemons()
+        return results
+    return asyncio.run(scenario())
+
+
+def _pid(issues) -> int:
+    return int(issues[0]["message"].split()[1])
+
+
+def test_warm_daemon_serves_requests():
+    first, second = _run("a", "b")
+    assert first[0]["line"] == 1 and first[0]["severity"] == "LOW"
+    # Same process both times
+    assert _pid(first) == _pid(second)
+    assert eslint_daemon.daemon_stats()["requests"] == 2
+
+
+def test_crashed_daemon_falls_back_and_restarts():
+    before, crashed, after = _run("a", "crash", "b")
+    assert crashed is None
+    assert _pid(after) != _pid(before)
+    stats = eslint_daemon.daemon_stats()
+    assert stats["crashes"] == 1 and stats["restarts"] == 1 and stats["fallbacks"] == 1
+
+
+def test_out_of_sync_daemon_is_replaced():
+    before, desynced, after = _run("a", "desync", "b")
+    assert desynced is None
+    # A stale response must never be read as the next request's answer
+    assert after is not None and _pid(after) != _pid(before)
+    assert eslint_daemon.daemon_stats()["crashes"] == 1
+
+
+def test_cancelled_request_replaces_the_daemon():
+    async def scenario():
+        await eslint_daemon.start_eslint_daemons()
+        before = await eslint_daemon.lint_with_daemon("a")
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(eslint_daemon.lint_with_daemon("hang"), 0.2)
+        assert not eslint_daemon._daemons[0].alive
+        after = await eslint_daemon.lint_with_daemon("b")
+        await eslint_daemon.stop_eslint_daemons()
+        return before, after
+
+    before, after = asyncio.run(scenario())
+    assert _pid(after) != _pid(before)
+
+
+def test_daemon_over_the_rss_limit_is_recycled():
+    before, bloated, after = _run("a", "bloat", "b")
+    # The request that crossed the limit is still answered
+    assert bloated is not None and _pid(bloated) == _pid(before)
+    assert _pid(after) != _pid(before)
+    stats = eslint_daemon.daemon_stats()
+    assert stats["recycled"] == 1 and stats["restarts"] == 1
+
+
+def test_daemon_that_cannot_start_uses_the_cli(monkeypatch):
+    monkeypatch.setenv("FAKE_ESLINT_BROKEN", "1")
+    first, second = _run("a", "b")
+    assert first is None and second is None
+    # Backs off instead of spawning node for every request
+    assert eslint_daemon.daemon_stats()["fallbacks"] == 2
+    assert eslint_daemon.daemon_stats()["restarts"] == 0
@@ -0,0 +1,80 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from database import get_db
+from routes import analyze
+from services import analysis_pipeline, result_cache
+from services.confidence_engine import compute_confidence, compute_confidence_batch
+from utils.auth import get_current_user_optional
+
+STATIC = [
+    {"type": "security", "line": 1, "severity": "HIGH", "message": "eval", "source": "static"},
+    {"type": "security", "line": 3, "severity": "LOW", "message": "assert", "source": "static"},
+]
+CODE = "x = eval(s)\ny = 2\nassert x\n"
+
+
+@pytest.fixture
+def static_calls(monkeypatch):
+    calls = []
+
+    async def static(language, code):
+        calls.append(code)
+        return [dict(issue) for issue in STATIC]
+
+    async def no_llm(**kwargs):
+        raise AssertionError("fast mode must not call the LLM")
+
+    async def cache_key_for(code, language, mode, instruction, variant=""):
+        return f"{variant}:{code}"
+
+    monkeypatch.setattr(analysis_pipeline, "run_static_analysis_async", static)
+    monkeypatch.setattr(analysis_pipeline, "analyze_with_groq_async", no_llm)
+    monkeypatch.setattr(analysis_pipeline, "cache_key_for", cache_key_for)
+    monkeypatch.setattr(result_cache, "_memory", result_cache._LRUCache(8, 3600))
+    return calls
+
+
+def test_static_only_result_skips_the_llm_and_is_cached(static_calls):
+    result, cached = asyncio.run(analysis_pipeline.run_static_only("python", CODE))
+    assert not cached
+    assert result["ai_suggestions"] == [] and result["optimized_code"] == CODE
+    assert [issue["line"] for issue in result["aggregated_issues"]] == [1, 3]
+    # Scored the way the batch re-score job would score the stored row
+    assert result["confidence_score"] == compute_confidence(result["aggregated_issues"])
+    assert compute_confidence_batch([result["aggregated_issues"]]) == [result["confidence_score"]]
+
+    again, cached = asyncio.run(analysis_pipeline.run_static_only("python", CODE))
+    assert cached and again["aggregated_issues"] == result["aggregated_issues"]
+    assert static_calls == [CODE]
+
+
+def test_fast_request_queues_an_enrichment_job(static_calls, monkeypatch):
+    queued = []
+
+    async def enqueue_job(db, **kwargs):
+        queued.append(kwargs)
+        return SimpleNamespace(id="job1")
+
+    monkeypatch.setattr(analyze, "enqueue_job", enqueue_job)
+    app = FastAPI()
+    app.include_router(analyze.router)
+    app.dependency_overrides[get_db] = lambda: None
+    app.dependency_overrides[get_current_user_optional] = lambda: None
+
+    response = TestClient(app).post("/api/analyze", json={
+        "language": "python", "mode": "bug", "code": CODE, "fast": True, "enrich": True,
+    })
+    body = response.json()
+    assert response.status_code == 200
+    assert body["fast"] is True and body["saved"] is False
+    assert body["enrichment"] == {"job_id": "job1", "status_url": "/api/analyze/jobs/job1"}
+    assert queued == [{
+        "language": "python", "mode": "bug", "instruction": "", "code": CODE,
+        "user_id": None, "project_id": None, "file_id": None, "file_name": None,
+        "analysis_id": None, "enrichment": True,
+    }]
@@ -0,0 +1,33 @@
+import asyncio
+import json
+
+from services import groq_service
+from services.prompt_builder import build_prompt
+
+CODE = "\n".join(["DATA = ["] + [f"    [{i}, {i + 1}, {i + 2}]," for i in range(20)] + ["]", "print(DATA)"])
+
+
+def _compacted_build_prompt(*args, **kwargs):
+    return build_prompt(*args, **{**kwargs, "budget": 1})
+
+
+def test_streamed_optimized_code_has_elisions_restored(monkeypatch):
+    compacted = _compacted_build_prompt("python", "bug", "", CODE, []).code
+    assert "[elided:" in compacted
+    content = json.dumps({"ai_issues": [], "optimized_code": compacted, "explanation": "ok"})
+
+    async def fake_stream(kwargs):
+        for position in range(0, len(content), 7):
+            yield "delta", content[position:position + 7]
+
+    monkeypatch.setattr(groq_service, "build_prompt", _compacted_build_prompt)
+    monkeypatch.setattr(groq_service, "stream_with_policy", fake_stream)
+
+    async def collect():
+        return [event async for event in groq_service.stream_analysis_with_groq("python", "bug", "", CODE, [])]
+
+    events = asyncio.run(collect())
+    fields = [value for kind, value in events if kind == "field" and value[0] == "optimized_code"]
+    assert fields == [("optimized_code", CODE)]
+    assert events[-1][0] == "result"
+    assert events[-1][1]["optimized_code"] == CODE
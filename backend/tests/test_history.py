@@ -0,0 +1,33 @@
+from datetime import datetime, timezone
+
+from sqlalchemy.dialects import postgresql
+
+from routes.history import _decode_cursor, _encode_cursor, history_page_query
+
+
+def _sql(query) -> str:
+    return str(query.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+def test_unfiltered_page_is_the_users_keyset_page():
+    sql = _sql(history_page_query(7, 50))
+    assert "analysis_history.user_id = 7" in sql
+    assert "ORDER BY analysis_history.created_at DESC, analysis_history.id DESC" in sql
+    assert "LIMIT 51" in sql
+    assert "lower(" not in sql and "ILIKE" not in sql
+
+
+def test_filters_narrow_the_page():
+    sql = _sql(history_page_query(7, 50, language="Python", mode="bug", search="50%_off"))
+    assert "lower(analysis_history.language) = 'python'" in sql
+    assert "analysis_history.mode ILIKE '%%' || 'bug' || '%%' ESCAPE '/'" in sql
+    # LIKE wildcards typed into the search box match literally
+    assert "analysis_history.code_snippet ILIKE '%%' || '50/%%/_off' || '%%' ESCAPE '/'" in sql
+
+
+def test_cursor_round_trips_into_the_keyset_condition():
+    created_at = datetime(2026, 10, 18, 3, 42, tzinfo=timezone.utc)
+    cursor = _decode_cursor(_encode_cursor(created_at, 12))
+    assert cursor == (created_at, 12)
+    sql = _sql(history_page_query(7, 50, cursor=cursor, mode="security"))
+    assert "(analysis_history.created_at, analysis_history.id) < ('2026-10-18 03:42:00+00:00', 12)" in sql
@@ -0,0 +1,124 @@
+import asyncio
+
+from services import analysis_pipeline
+from services.incremental_analysis import plan_edit, rebase_edits, stitch_code
+
+OLD = "\n".join(f"x{i} = {i}" for i in range(1, 41))
+
+
+def _edit(code: str, line: int, text: str) -> str:
+    lines = code.splitlines()
+    lines[line - 1] = text
+    return "\n".join(lines)
+
+
+def test_stitch_code_insert_delete_replace():
+    code = "a\nb\nc\nd"
+    assert stitch_code(code, [(2, 2, "B")]) == "a\nB\nc\nd"
+    assert stitch_code(code, [(2, 3, "")]) == "a\nd"
+    assert stitch_code(code, [(3, 2, "ins")]) == "a\nb\nins\nc\nd"
+    assert stitch_code(code, [(5, 4, "tail")]) == "a\nb\nc\nd\ntail"
+
+
+def test_rebase_keeps_previous_optimization_outside_regions():
+    old_optimized = _edit(OLD, 3, "x3 = 3  # optimized")
+    new = _edit(OLD, 35, "x35 = 350")
+    plan = plan_edit("python", OLD, new)
+    assert plan is not None and not plan.in_regions(3)
+
+    edits = rebase_edits(OLD, old_optimized, plan)
+    assert edits == [(3, 3, "x3 = 3  # optimized")]
+    assert stitch_code(new, edits).splitlines()[2] == "x3 = 3  # optimized"
+    assert stitch_code(new, edits).splitlines()[34] == "x35 = 350"
+
+
+def test_rebase_shifts_edits_past_inserted_lines():
+    old_optimized = _edit(OLD, 30, "x30 = 30  # optimized")
+    lines = OLD.splitlines()
+    new = "\n".join(lines[:2] + ["inserted = 1"] + lines[2:])
+    plan = plan_edit("python", OLD, new)
+
+    edits = rebase_edits(OLD, old_optimized, plan)
+    assert edits == [(31, 31, "x30 = 30  # optimized")]
+
+
+def test_rebase_drops_edits_inside_regions():
+    old_optimized = _edit(OLD, 20, "x20 = 20  # optimized")
+    new = _edit(OLD, 20, "x20 = 200")
+    plan = plan_edit("python", OLD, new)
+    assert rebase_edits(OLD, old_optimized, plan) == []
+
+
+def test_analyze_incremental_static_on_whole_file_and_stitches_previous(monkeypatch):
+    new = _edit(OLD, 35, "x35 = 350")
+    static_calls = []
+
+    async def fake_static(language, code):
+        static_calls.append(code)
+        return [
+            {"line": 2, "message": "unused", "severity": "low", "type": "style"},
+            {"line": 35, "message": "magic number", "severity": "low", "type": "style"},
+        ]
+
+    async def fake_chunk(language, mode, instruction, chunk, static_issues):
+        return {
+            "ai_issues": [],
+            "optimized_code": chunk["code"].replace("x35 = 350", "x35 = 350  # tuned"),
+            "explanation": "",
+            "token_usage": {"prompt_tokens": 1, "completion_tokens": 1, "measured": True},
+            "routing": None,
+        }
+
+    monkeypatch.setattr(analysis_pipeline, "run_static_analysis_async", fake_static)
+    monkeypatch.setattr(analysis_pipeline, "_analyze_chunk", fake_chunk)
+    previous_result = {
+        "static_issues": [{"line": 2, "message": "unused", "severity": "low", "type": "style"}],
+        "ai_suggestions": [],
+        "optimized_code": _edit(OLD, 3, "x3 = 3  # optimized"),
+    }
+
+    result = asyncio.run(analysis_pipeline.analyze_incremental("python", "optimize", "", new, OLD, previous_result))
+
+    assert static_calls == [new]
+    by_line = {issue["line"]: issue for issue in result["static_issues"]}
+    assert by_line[2]["reused"] is True
+    assert by_line[35]["reused"] is False
+    optimized = result["optimized_code"].splitlines()
+    assert optimized[2] == "x3 = 3  # optimized"
+    assert optimized[34] == "x35 = 350  # tuned"
+    assert len(optimized) == 40
+
+
+def test_analyze_incremental_tolerates_malformed_issue_fields(monkeypatch):
+    new = _edit(OLD, 35, "x35 = 350")
+
+    async def fake_static(language, code):
+        return [{"line": 2, "message": "unused", "severity": "low", "type": "style"}]
+
+    async def fake_chunk(language, mode, instruction, chunk, static_issues):
+        return {
+            # Models sometimes send a range or an object where a line or message belongs
+            "ai_issues": [
+                {"line": [35, 36], "message": "loop", "type": "bug"},
+                {"line": 35, "message": {"text": "magic"}, "type": "style"},
+            ],
+            "optimized_code": chunk["code"],
+            "explanation": "",
+            "token_usage": None,
+            "routing": None,
+        }
+
+    monkeypatch.setattr(analysis_pipeline, "run_static_analysis_async", fake_static)
+    monkeypatch.setattr(analysis_pipeline, "_analyze_chunk", fake_chunk)
+    previous_result = {
+        "static_issues": [{"line": 2, "message": "unused", "severity": "low", "type": "style"}],
+        "ai_suggestions": [{"line": {"start": 3}, "message": ["a", "b"], "type": "style"}],
+        "optimized_code": OLD,
+    }
+
+    result = asyncio.run(analysis_pipeline.analyze_incremental("python", "bug", "", new, OLD, previous_result))
+    reused = {str(issue["message"]): issue["reused"] for issue in result["aggregated_issues"]}
+    assert reused["unused"] is True
+    assert reused["['a', 'b']"] is True
+    assert reused["loop"] is False
+    assert result["incremental"]["reused_issues"] == 2
@@ -0,0 +1,96 @@
+import asyncio
+
+from services import job_queue
+from models.analysis_job import AnalysisJob
+
+
+def _job() -> AnalysisJob:
+    return AnalysisJob(
+        id="job1", language="python", mode="bug", code="x = 1", instruction="",
+        attempts=1, max_attempts=3, locked_by="worker-a-0", status=job_queue.RUNNING,
+    )
+
+
+def _patch(monkeypatch, analysis_seconds: float, renew: bool):
+    outcome = {"renewals": 0}
+
+    async def fake_run_analysis(*args, **kwargs):
+        await asyncio.sleep(analysis_seconds)
+        return {"optimized_code": "x = 1"}, False
+
+    async def fake_renew(job):
+        outcome["renewals"] += 1
+        return renew
+
+    async def fake_finish(job, result):
+        outcome["finished"] = result
+
+    async def fake_fail(job, error):
+        outcome["failed"] = error
+
+    monkeypatch.setattr(job_queue, "JOB_HEARTBEAT_SECONDS", 0.01)
+    monkeypatch.setattr(job_queue, "run_analysis", fake_run_analysis)
+    monkeypatch.setattr(job_queue, "_renew_lock", fake_renew)
+    monkeypatch.setattr(job_queue, "_finish_job", fake_finish)
+    monkeypatch.setattr(job_queue, "_fail_job", fake_fail)
+    return outcome
+
+
+def test_heartbeat_renews_lock_while_job_runs(monkeypatch):
+    outcome = _patch(monkeypatch, analysis_seconds=0.1, renew=True)
+    asyncio.run(job_queue.process_job(_job()))
+    assert outcome["renewals"] >= 3
+    assert outcome["finished"] == {"optimized_code": "x = 1"}
+
+
+def test_lost_lock_abandons_job(monkeypatch):
+    outcome = _patch(monkeypatch, analysis_seconds=5, renew=False)
+    asyncio.run(asyncio.wait_for(job_queue.process_job(_job()), 1))
+    assert outcome["renewals"] == 1
+    assert "finished" not in outcome and "failed" not in outcome
+
+
+class _Result:
+    def scalar_one_or_none(self):
+        return None
+
+
+class _Session:
+    """Records statements; the guarded row is gone, as after a reclaim."""
+
+    def __init__(self):
+        self.statements = []
+        self.committed = False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        return _Result()
+
+    def add_all(self, records):
+        raise AssertionError("history written for a reclaimed job")
+
+    async def commit(self):
+        self.committed = True
+
+
+def test_reclaimed_job_outcome_is_dropped(monkeypatch):
+    from sqlalchemy.dialects import postgresql
+
+    for call in (
+        lambda job: job_queue._finish_job(job, {"optimized_code": ""}),
+        lambda job: job_queue._fail_job(job, "boom"),
+    ):
+        session = _Session()
+        monkeypatch.setattr(job_queue, "AsyncSessionLocal", lambda: session)
+        job = _job()
+        job.user_id = 1
+        asyncio.run(call(job))
+        assert not session.committed
+        sql = str(session.statements[0].compile(dialect=postgresql.dialect()))
+        assert "analysis_jobs.locked_by = " in sql and "FOR UPDATE" in sql
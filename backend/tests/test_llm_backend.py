@@ -0,0 +1,224 @@
+import asyncio
+import time
+
+import pytest
+
+from services import groq_service, llm_backend
+from services.llm_backend import (
+    BAD_REQUEST, CONNECTION, RATE_LIMITED, SERVER_ERROR, TIMEOUT, Completion, LLMBackend, LLMError,
+)
+from services.model_router import route_for
+
+
+def test_backend_must_implement_complete_and_stream():
+    with pytest.raises(TypeError):
+        LLMBackend()
+
+    class CompleteOnly(LLMBackend):
+        async def complete(self, kwargs, timeout):
+            return Completion("", None, 0.0)
+
+    with pytest.raises(TypeError):
+        CompleteOnly()
+
+
+def test_unexpected_error_returns_failed_result(monkeypatch):
+    async def broken(kwargs):
+        # e.g. a backend returning None content
+        return Completion(None, None, 0.1)
+
+    monkeypatch.setattr(groq_service, "complete_with_policy", broken)
+    route = route_for("python", "bug", "x = 1", load=0)
+    result = asyncio.run(groq_service._analyze_routed("python", "bug", "", "x = 1", [], route))
+    assert result["failed"] and result["error"] == "unexpected"
+    assert result["optimized_code"] == "x = 1"
+    assert result["routing"]["rule"] == route.rule
+
+
+class FakeBackend(LLMBackend):
+    """Plays one scripted behaviour per attempt: an LLMError to raise, or a coroutine factory."""
+
+    name = "fake"
+
+    def __init__(self, *script):
+        self.script = list(script)
+        self.calls = 0
+        self.cancelled = 0
+
+    def _next(self):
+        step = self.script[min(self.calls, len(self.script) - 1)]
+        self.calls += 1
+        if isinstance(step, Exception):
+            raise step
+        return step
+
+    async def complete(self, kwargs, timeout):
+        step = self._next()
+        try:
+            return await step()
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+
+    async def stream(self, kwargs, timeout):
+        step = self._next()
+        try:
+            async for event in step():
+                yield event
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+
+
+def _use(monkeypatch, backend, samples=()):
+    monkeypatch.setattr(llm_backend, "_backend", backend)
+    monkeypatch.setattr(llm_backend, "_semaphore", None)
+    monkeypatch.setattr(llm_backend, "_stats", dict.fromkeys(llm_backend._stats, 0))
+    monkeypatch.setattr(llm_backend, "retry_delay", lambda attempt, error: 0)
+    latencies = llm_backend._LatencyTracker()
+    for sample in samples:
+        latencies.add(sample)
+    monkeypatch.setattr(llm_backend, "_latencies", latencies)
+
+
+def _reply(text, after=0.0):
+    async def reply():
+        await asyncio.sleep(after)
+        return Completion(text, None, after)
+    return reply
+
+
+def _events(*deltas, gap=0.0):
+    async def events():
+        for delta in deltas:
+            await asyncio.sleep(gap)
+            yield "delta", delta
+        yield "finish", "stop"
+    return events
+
+
+def _collect(**kwargs):
+    async def collect():
+        return [event async for event in llm_backend.stream_with_policy({}, **kwargs)]
+    return collect
+
+
+def test_retryable_errors_are_retried(monkeypatch):
+    backend = FakeBackend(LLMError(RATE_LIMITED, "slow down"), LLMError(SERVER_ERROR, "oops"), _reply("ok"))
+    _use(monkeypatch, backend)
+    completion = asyncio.run(llm_backend.complete_with_policy({}, hedge=False))
+    assert completion.content == "ok"
+    assert backend.calls == 3
+    assert llm_backend._stats["retries"] == 2
+
+
+def test_bad_request_is_not_retried(monkeypatch):
+    backend = FakeBackend(LLMError(BAD_REQUEST, "no"), _reply("never"))
+    _use(monkeypatch, backend)
+    with pytest.raises(LLMError) as raised:
+        asyncio.run(llm_backend.complete_with_policy({}, hedge=False))
+    assert raised.value.kind == BAD_REQUEST
+    assert backend.calls == 1
+    assert llm_backend._stats["failures"] == 1
+
+
+def test_hedge_fires_and_cancels_the_losing_attempt(monkeypatch):
+    backend = FakeBackend(_reply("slow", after=10), _reply("fast"))
+    _use(monkeypatch, backend, samples=[0.01] * llm_backend.LLM_HEDGE_MIN_SAMPLES)
+
+    async def scenario():
+        completion = await llm_backend.complete_with_policy({}, deadline_seconds=5, hedge=True)
+        # Let the cancelled primary unwind
+        await asyncio.sleep(0)
+        return completion
+
+    completion = asyncio.run(scenario())
+    assert completion.content == "fast" and completion.hedged
+    assert backend.cancelled == 1
+    assert llm_backend._stats["hedges"] == 1 and llm_backend._stats["hedge_wins"] == 1
+
+
+def test_stream_retries_until_the_first_delta(monkeypatch):
+    backend = FakeBackend(LLMError(CONNECTION, "reset"), _events("a", "b"))
+    _use(monkeypatch, backend)
+    events = asyncio.run(_collect()())
+    assert events == [("delta", "a"), ("delta", "b"), ("finish", "stop")]
+    assert backend.calls == 2
+
+
+def test_stream_bad_request_is_not_retried(monkeypatch):
+    backend = FakeBackend(LLMError(BAD_REQUEST, "no"), _events("a"))
+    _use(monkeypatch, backend)
+    with pytest.raises(LLMError):
+        asyncio.run(_collect()())
+    assert backend.calls == 1
+
+
+def test_trickling_stream_stops_at_the_deadline(monkeypatch):
+    # Every chunk arrives well within a read timeout, the whole stream does not
+    backend = FakeBackend(_events(*"abcdefghij", gap=0.05))
+    _use(monkeypatch, backend)
+    started = time.monotonic()
+    with pytest.raises(LLMError) as raised:
+        asyncio.run(_collect(deadline_seconds=0.2)())
+    assert raised.value.kind == TIMEOUT
+    assert time.monotonic() - started < 0.4
+    assert backend.cancelled == 1
+
+
+def test_slow_stream_consumer_does_not_hold_a_concurrency_slot(monkeypatch):
+    _use(monkeypatch, FakeBackend(_events("a", "b")))
+    monkeypatch.setattr(llm_backend, "GROQ_MAX_CONCURRENCY", 1)
+
+    async def scenario():
+        async for _ in llm_backend.stream_with_policy({}):
+            # The backend has finished by the time the consumer comes back
+            await asyncio.sleep(0.05)
+            assert llm_backend._active == 0
+            assert not llm_backend._get_semaphore().locked()
+
+    asyncio.run(scenario())
+
+
+def test_groq_client_is_pooled_and_shared(monkeypatch):
+    monkeypatch.setattr(llm_backend, "LLM_BASE_URL", "http://127.0.0.1:9")
+    monkeypatch.setattr(llm_backend, "_backend", None)
+    backend = llm_backend.get_backend()
+    assert llm_backend.get_backend() is backend
+    client = backend._client
+    # Retries belong to complete_with_policy, not the SDK
+    assert client.max_retries == 0
+    pool = client._client._transport._pool
+    assert pool._max_connections == llm_backend.GROQ_MAX_CONNECTIONS
+    assert pool._max_keepalive_connections == llm_backend.GROQ_MAX_CONNECTIONS
+
+    asyncio.run(llm_backend.close_llm_backend())
+    assert llm_backend._backend is None
+
+
+def test_in_flight_completions_are_capped(monkeypatch):
+    running = 0
+    peak = 0
+    loads = []
+
+    async def call():
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        loads.append(llm_backend.current_load())
+        await asyncio.sleep(0.02)
+        running -= 1
+        return Completion("ok", None, 0.02)
+
+    _use(monkeypatch, FakeBackend(call))
+    monkeypatch.setattr(llm_backend, "GROQ_MAX_CONCURRENCY", 2)
+
+    async def scenario():
+        return await asyncio.gather(*(llm_backend.complete_with_policy({}, hedge=False) for _ in range(6)))
+
+    completions = asyncio.run(scenario())
+    assert [c.content for c in completions] == ["ok"] * 6
+    assert peak == 2
+    # Queued calls count towards the load the router sees
+    assert max(loads) > 1
+    assert llm_backend._active == 0
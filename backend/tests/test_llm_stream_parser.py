@@ -0,0 +1,55 @@
+import json
+
+import pytest
+
+from services.llm_stream_parser import IncrementalResultParser, parse_result_json
+
+DOCUMENT = json.dumps({
+    "ai_issues": [
+        {"type": "bug", "line": 12, "severity": "HIGH", "message": "off by one", "confidence": 0.75},
+        {"type": "style", "line": 0, "severity": "LOW", "message": "quote \" and \\ escapes"},
+    ],
+    "optimized_code": "def f(x):\n    return x + 1\n",
+    "explanation": "fixed {braces} and [brackets]",
+    "score": -1.5e3,
+    "count": 1234567,
+    "ok": True,
+    "missing": None,
+    "flag": False,
+}, indent=1)
+
+
+def _events(chunks: list) -> tuple[list, dict]:
+    parser = IncrementalResultParser()
+    events = []
+    for chunk in chunks:
+        events.extend(parser.feed(chunk))
+    return events, parser.result()
+
+
+def test_whole_document():
+    assert parse_result_json("```json\n" + DOCUMENT + "\n```") == json.loads(DOCUMENT)
+
+
+def test_split_at_every_offset():
+    expected = json.loads(DOCUMENT)
+    for offset in range(1, len(DOCUMENT)):
+        events, result = _events([DOCUMENT[:offset], DOCUMENT[offset:]])
+        assert result == expected, offset
+        fields = {value[0]: value[1] for kind, value in events if kind == "field"}
+        assert fields == expected, offset
+        assert [value for kind, value in events if kind == "ai_issue"] == expected["ai_issues"], offset
+
+
+@pytest.mark.parametrize("value", ["12", "-3.25", "1e5", "1.5E-7", "true", "false", "null"])
+def test_scalar_split_inside_value(value):
+    document = '{"explanation": "x", "score": ' + value + '}'
+    start = document.index(value)
+    for offset in range(start + 1, start + len(value)):
+        _, result = _events([document[:offset], document[offset:]])
+        assert result["score"] == json.loads(value), (value, offset)
+
+
+def test_one_character_chunks():
+    _, result = _events(list(DOCUMENT))
+    assert result == json.loads(DOCUMENT)
@@ -0,0 +1,112 @@
+import os
+
+from alembic import command
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+
+from database import BACKEND_DIR, BASELINE_REVISION
+
+
+def _config() -> Config:
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "migrations"))
+    return config
+
+
+def test_revisions_form_one_chain_from_the_baseline():
+    script = ScriptDirectory.from_config(_config())
+    assert len(script.get_heads()) == 1
+    chain = [revision.revision for revision in script.walk_revisions()]
+    assert chain[-1] == BASELINE_REVISION
+    assert chain.index("0a62c04e7a0b") == len(chain) - 2
+
+
+def test_files_count_revision_adds_and_backfills(capsys):
+    command.upgrade(_config(), f"{BASELINE_REVISION}:0a62c04e7a0b", sql=True)
+    sql = capsys.readouterr().out
+    assert "ALTER TABLE projects ADD COLUMN IF NOT EXISTS files_count INTEGER DEFAULT '0' NOT NULL" in sql
+    assert "UPDATE projects SET files_count" in sql
+
+
+def test_confidence_sum_revision_follows_the_indexes_and_backfills(capsys):
+    script = ScriptDirectory.from_config(_config())
+    assert script.get_revision("9c3e1f4b7d20").down_revision == "22f5a16a4667"
+    command.upgrade(_config(), "22f5a16a4667:9c3e1f4b7d20", sql=True)
+    sql = capsys.readouterr().out
+    assert "ALTER TABLE user_stats ADD COLUMN IF NOT EXISTS confidence_sum FLOAT DEFAULT '0' NOT NULL" in sql
+    assert "UPDATE user_stats SET confidence_sum" in sql
+
+
+def test_query_indexes_are_built_concurrently_outside_a_transaction(capsys):
+    command.upgrade(_config(), "2356885bd7f1:22f5a16a4667", sql=True)
+    sql = capsys.readouterr().out
+    body = sql[sql.index("COMMIT;"):sql.index("BEGIN;", sql.index("COMMIT;"))]
+    assert body.count("CREATE INDEX CONCURRENTLY IF NOT EXISTS") == 12
+    assert "DROP INDEX CONCURRENTLY IF EXISTS ix_analysis_history_user_created_id;" in body
+    assert "RENAME TO ix_analysis_history_user_created_id" in body
+    assert "CREATE INDEX ix_" not in sql
+
+
+class _Connection:
+    def __init__(self):
+        self.calls = []
+
+    def execute(self, statement, params=None):
+        self.calls.append(str(statement))
+
+    def commit(self):
+        self.calls.append("COMMIT")
+
+    def rollback(self):
+        self.calls.append("ROLLBACK")
+
+
+class _Inspector:
+    def __init__(self, tables):
+        self.tables = tables
+
+    def get_table_names(self):
+        return self.tables
+
+
+def _patch_alembic(monkeypatch, connection, tables, fail=False):
+    import database
+
+    def fake_stamp(config, revision):
+        connection.calls.append(f"stamp {revision}")
+
+    def fake_upgrade(config, revision):
+        assert config.attributes["connection"] is connection
+        connection.calls.append(f"upgrade {revision}")
+        if fail:
+            raise RuntimeError("migration failed")
+
+    monkeypatch.setattr(database, "inspect", lambda conn: _Inspector(tables))
+    monkeypatch.setattr(database.command, "stamp", fake_stamp)
+    monkeypatch.setattr(database.command, "upgrade", fake_upgrade)
+    return database
+
+
+def test_run_migrations_hands_alembic_a_connection_without_a_transaction(monkeypatch):
+    connection = _Connection()
+    database = _patch_alembic(monkeypatch, connection, ["users", "projects"])
+    database.run_migrations(connection)
+    calls = connection.calls
+    assert calls[0] == "SELECT pg_advisory_lock(:id)"
+    # The lock query and the table listing are committed before Alembic starts
+    assert calls[1:4] == ["COMMIT", "COMMIT", f"stamp {BASELINE_REVISION}"]
+    assert calls[4] == "upgrade head"
+    assert calls[-2:] == ["SELECT pg_advisory_unlock(:id)", "COMMIT"]
+
+
+def test_run_migrations_releases_the_lock_when_a_migration_fails(monkeypatch):
+    connection = _Connection()
+    database = _patch_alembic(monkeypatch, connection, ["users", "alembic_version"], fail=True)
+    try:
+        database.run_migrations(connection)
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("the migration error was swallowed")
+    assert "stamp" not in " ".join(connection.calls)
+    assert connection.calls[-3:] == ["ROLLBACK", "SELECT pg_advisory_unlock(:id)", "COMMIT"]
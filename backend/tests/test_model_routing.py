@@ -0,0 +1,89 @@
+import asyncio
+import json
+
+from services import groq_service
+from services.llm_backend import Completion
+from services.model_router import escalate, route_for
+
+RESPONSE = json.dumps({"ai_issues": [], "optimized_code": "x = 1", "explanation": "ok"})
+
+
+def _code(lines: int) -> str:
+    return "\n".join(f"x{i} = {i}" for i in range(lines))
+
+
+def test_quick_mode_budget_grows_with_lines():
+    small = route_for("python", "explain", _code(10), load=0)
+    large = route_for("python", "explain", _code(200), load=0)
+    assert small.rule == large.rule == "quick_mode"
+    # Room for the whole file at ~12 tokens a line plus the issues
+    assert large.max_tokens >= 200 * 12 + 1024
+    assert small.max_tokens < large.max_tokens
+
+
+def test_escalate_moves_to_fallback_row():
+    route = route_for("python", "explain", _code(150), load=0)
+    escalated = escalate(route)
+    assert escalated.rule == "default"
+    assert escalated.max_tokens > route.max_tokens
+    assert escalated.output == route.output
+    assert escalate(escalated) is None
+
+
+def _usage(prompt_tokens: int, completion_tokens: int):
+    class Usage:
+        pass
+    usage = Usage()
+    usage.prompt_tokens, usage.completion_tokens = prompt_tokens, completion_tokens
+    return usage
+
+
+def test_truncated_completion_is_retried_on_fallback_route(monkeypatch):
+    calls = []
+
+    async def fake_complete(kwargs):
+        calls.append(kwargs)
+        if len(calls) == 1:
+            return Completion(RESPONSE[:20], _usage(100, kwargs["max_tokens"]), 0.1, finish_reason="length")
+        return Completion(RESPONSE, _usage(100, 50), 0.1, finish_reason="stop")
+
+    monkeypatch.setattr(groq_service, "complete_with_policy", fake_complete)
+    result = asyncio.run(groq_service.analyze_with_groq_async("python", "explain", "", _code(150), []))
+
+    assert len(calls) == 2
+    assert calls[1]["max_tokens"] > calls[0]["max_tokens"]
+    assert not result.get("failed")
+    assert result["optimized_code"] == "x = 1"
+    assert result["routing"]["rule"] == "default"
+    assert result["routing"]["escalated_from"] == "quick_mode"
+    assert result["token_usage"]["prompt_tokens"] == 200
+
+
+def test_truncated_on_fallback_route_fails(monkeypatch):
+    async def fake_complete(kwargs):
+        return Completion(RESPONSE[:20], _usage(100, kwargs["max_tokens"]), 0.1, finish_reason="length")
+
+    monkeypatch.setattr(groq_service, "complete_with_policy", fake_complete)
+    result = asyncio.run(groq_service.analyze_with_groq_async("python", "security", "", _code(150), []))
+    assert result["failed"] and result["error"] == "truncated"
+    assert "escalated_from" not in result["routing"]
+
+
+def test_truncated_stream_is_retried_on_fallback_route(monkeypatch):
+    async def fake_stream(kwargs):
+        yield "delta", RESPONSE[:30]
+        yield "finish", "length"
+
+    async def fake_complete(kwargs):
+        return Completion(RESPONSE, _usage(100, 50), 0.1, finish_reason="stop")
+
+    monkeypatch.setattr(groq_service, "stream_with_policy", fake_stream)
+    monkeypatch.setattr(groq_service, "complete_with_policy", fake_complete)
+
+    async def collect():
+        return [event async for event in groq_service.stream_analysis_with_groq("python", "explain", "", _code(150), [])]
+
+    kind, result = asyncio.run(collect())[-1]
+    assert kind == "result"
+    assert not result.get("failed")
+    assert result["routing"]["escalated_from"] == "quick_mode"
@@ -0,0 +1,79 @@
+import time
+
+from services.prompt_builder import _is_literal_line, build_prompt
+
+
+def test_literal_lines():
+    assert _is_literal_line('    [1, 2.5, -3, "a\\"b", \'c\', None, True],')
+    assert _is_literal_line("{0x1F: null, 2: false}")
+    assert not _is_literal_line("x = [1, 2, 3]")
+    assert not _is_literal_line("   ")
+    assert not _is_literal_line('"unterminated, 1, 2')
+
+
+def test_adversarial_literal_line_is_linear():
+    # Took seconds with the previous single-regex match (backtracking on overlapping alternatives)
+    line = "1" * 5000 + " +"
+    started = time.perf_counter()
+    assert not _is_literal_line(line)
+    assert time.perf_counter() - started < 0.1
+
+
+def test_adversarial_line_in_compacted_prompt():
+    code = "\n".join(["data = ["] + ["    1, 2, 3,"] * 20 + ["]", "1" * 5000 + " +"])
+    started = time.perf_counter()
+    prompt = build_prompt("python", "bug", "", code, [], budget=1)
+    assert time.perf_counter() - started < 1
+    assert any(c.startswith("literal_tables") for c in prompt.compactions)
+    assert prompt.restore_elisions(prompt.code) == code
+
+
+LICENSE = ["/*", " * Copyright (c) 2024 Example", " * Licensed under the MIT License.", " *", " */"]
+
+
+def test_c_header_keeps_preprocessor_lines():
+    includes = ["#include <stdio.h>", "#include <stdlib.h>", "#define LICENSE_MAX 10"]
+    code = "\n".join(LICENSE + includes + ["int main(void) { return 0; }"])
+    prompt = build_prompt("c", "bug", "", code, [], budget=1)
+    assert "license_header" in " ".join(prompt.compactions)
+    for line in includes:
+        assert line in prompt.code
+    assert prompt.restore_elisions(prompt.code) == code
+
+
+def test_c_preprocessor_block_is_not_a_header():
+    code = "\n".join(["#include <stdio.h>"] * 4 + ["#define COPYRIGHT 1", "int x;"])
+    prompt = build_prompt("cpp", "bug", "", code, [], budget=1)
+    assert "#define COPYRIGHT 1" in prompt.code
+
+
+def test_python_hash_header_is_elided():
+    header = ["# Copyright (c) 2024 Example", "# Licensed under the MIT License.", "#", "# See LICENSE.", "#"]
+    code = "\n".join(header + ["import os"])
+    prompt = build_prompt("python", "bug", "", code, [], budget=1)
+    assert "Copyright" not in prompt.code
+    assert prompt.restore_elisions(prompt.code) == code
+
+
+def _table_prompt():
+    code = "\n".join(["def f():", "    pass", "data = ["] + ["    1, 2, 3,"] * 20 + ["]"])
+    return code, build_prompt("python", "bug", "", code, [], budget=1)
+
+
+def test_lost_marker_keeps_the_original_code():
+    code, prompt = _table_prompt()
+    (marker,) = prompt.elisions
+    optimized = prompt.code.replace("    pass", "    return None")
+    assert "return None" in prompt.restore_elisions(optimized)
+    assert prompt.elisions_lost == 0
+
+    # Dropped, or rewritten by the model: the elided rows would be lost
+    assert prompt.restore_elisions(optimized.replace(marker, "")) == code
+    assert prompt.restore_elisions(optimized.replace(marker, marker.replace("elided", "omitted"))) == code
+    assert prompt.stats()["elisions_lost"] == 1
+
+
+def test_prompt_over_budget_after_compaction_is_flagged():
+    code, prompt = _table_prompt()
+    assert prompt.over_budget and prompt.stats()["over_budget"]
+    assert not build_prompt("python", "bug", "", code, [], budget=10_000).over_budget
@@ -0,0 +1,104 @@
+import pytest
+
+from services.python_rules import merge_with_bandit, registered_rules, run_python_rules
+
+
+def _rules(code: str) -> list:
+    return [(issue["line"], issue["type"], issue["severity"]) for issue in run_python_rules(code)]
+
+
+def test_registered_rules():
+    assert registered_rules() == [
+        "eval-exec",
+        "len-in-while-condition",
+        "string-concat-in-loop",
+        "subprocess-shell",
+        "track-imports",
+        "track-string-names",
+    ]
+
+
+@pytest.mark.parametrize("code", [
+    "eval(data)",
+    "exec(data)",
+    "import builtins\nbuiltins.eval(data)",
+    "from builtins import exec as run_code\nrun_code(data)",
+])
+def test_eval_exec(code):
+    assert _rules(code) == [(code.count("\n") + 1, "security", "HIGH")]
+
+
+def test_eval_exec_ignores_other_calls():
+    assert _rules("import ast\nast.literal_eval(data)\nobj.eval()") == []
+
+
+@pytest.mark.parametrize("code", [
+    "import subprocess\nsubprocess.run(cmd, shell=True)",
+    "import subprocess as sp\nsp.run(cmd, shell=True)",
+    "from subprocess import run\nrun(cmd, shell=True)",
+    "from subprocess import Popen as P\nP(cmd, shell=True)",
+    "import subprocess\nsubprocess.check_output(cmd, shell=True)",
+])
+def test_subprocess_shell(code):
+    assert _rules(code) == [(2, "security", "HIGH")]
+
+
+@pytest.mark.parametrize("code", [
+    "import subprocess\nsubprocess.run(cmd)",
+    "import subprocess\nsubprocess.run(cmd, shell=False)",
+    "from mylib import run\nrun(cmd, shell=True)",
+])
+def test_subprocess_without_shell(code):
+    assert _rules(code) == []
+
+
+@pytest.mark.parametrize("code", [
+    "import os\nos.system(cmd)",
+    "from os import popen\npopen(cmd)",
+    "import os as o\no.system(cmd)",
+])
+def test_os_shell_calls(code):
+    assert _rules(code) == [(2, "security", "MEDIUM")]
+
+
+def test_string_concat_in_loop():
+    code = "out = ''\nfor item in items:\n    out += item\n"
+    assert _rules(code) == [(3, "performance", "LOW")]
+    code = "out = ''\nwhile more():\n    out = out + next_part()\n"
+    assert _rules(code) == [(3, "performance", "LOW")]
+
+
+def test_string_concat_outside_loop_or_numeric():
+    assert _rules("out = ''\nout += 'a'\n") == []
+    assert _rules("total = 0\nfor n in nums:\n    total += n\n") == []
+    # A function body starts outside the enclosing loop
+    assert _rules("for i in x:\n    def f():\n        s = ''\n        s += 'a'\n") == []
+
+
+def test_len_in_while_condition():
+    assert _rules("while i < len(items):\n    i += 1\n") == [(1, "performance", "LOW")]
+    assert _rules("for i in range(len(items)):\n    pass\n") == []
+
+
+def test_unparsable_code_yields_nothing():
+    assert run_python_rules("def (:") == []
+    assert run_python_rules("x = 1\0") == []
+
+
+@pytest.mark.parametrize("code", [
+    "x = " + "(" * 100000 + ")" * 100000,
+    "x = " + "-" * 200000 + "1",
+    "x = " + "[" * 5000 + "]" * 5000,
+    # Parses, but the visitor recurses past the interpreter limit
+    "x = " + "-" * 900 + "1",
+])
+def test_deeply_nested_code_yields_nothing(code):
+    assert run_python_rules(code) == []
+
+
+def test_merge_with_bandit_prefers_bandit_on_same_line():
+    rule_issues = run_python_rules("eval(a)\nimport os\nos.system(b)")
+    bandit = [{"type": "security", "line": 1, "severity": "MEDIUM", "message": "B307", "source": "static"}]
+    merged = merge_with_bandit(rule_issues, bandit)
+    assert [(issue["line"], issue["message"]) for issue in merged][0] == (1, "B307")
+    assert [issue["line"] for issue in merged] == [1, 3]
@@ -0,0 +1,115 @@
+import asyncio
+
+import pytest
+
+from services import analysis_pipeline, result_cache
+from services.result_cache import _LRUCache, compute_key
+
+BASE = dict(code="x = 1", language="python", mode="bug", instruction="", model="m", tool_version="bandit 1.8")
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    monkeypatch.setattr(result_cache, "_memory", _LRUCache(8, 3600))
+    monkeypatch.setattr(result_cache, "_stats", dict.fromkeys(result_cache._stats, 0))
+
+
+def _result(**extra):
+    return {
+        "static_issues": [], "ai_suggestions": [], "aggregated_issues": [],
+        "optimized_code": "x = 1", "explanation": "", "confidence_score": 90.0,
+        "token_usage": {"prompt_tokens": 120, "completion_tokens": 40, "measured": True},
+        "routing": {"rule": "default", "model": "m", "load_shed": False},
+        **extra,
+    }
+
+
+@pytest.mark.parametrize("change", [
+    {"mode": "performance"},
+    {"instruction": "keep the API"},
+    {"tool_version": "bandit 1.9"},
+    {"model": "other"},
+    {"code": "x = 2"},
+])
+def test_key_changes_with_every_input(change):
+    assert compute_key(**BASE) != compute_key(**{**BASE, **change})
+
+
+def test_key_ignores_language_case_and_missing_instruction():
+    assert compute_key(**BASE) == compute_key(**{**BASE, "language": "Python", "instruction": None})
+    assert compute_key(**BASE) != compute_key(**BASE, variant="chunked")
+
+
+def test_lru_evicts_the_least_recently_used():
+    cache = _LRUCache(2, 3600)
+    cache.put("a", {"v": 1})
+    cache.put("b", {"v": 2})
+    assert cache.get("a") == {"v": 1}
+    cache.put("c", {"v": 3})
+    assert cache.get("b") is None
+    assert cache.get("a") == {"v": 1} and cache.get("c") == {"v": 3}
+    assert len(cache) == 2
+
+
+def test_expired_entries_are_dropped():
+    cache = _LRUCache(2, -1)
+    cache.put("a", {"v": 1})
+    assert cache.get("a") is None and len(cache) == 0
+
+
+def test_hit_has_the_shape_of_a_miss():
+    result = _result()
+    asyncio.run(result_cache.put_cached("k", result, memory_only=True))
+    hit = asyncio.run(result_cache.get_cached("k", memory_only=True))
+    assert hit.keys() == result.keys()
+    # Nothing was spent on the hit, and it says where it came from
+    assert hit["token_usage"] == {"prompt_tokens": 0, "completion_tokens": 0, "measured": True}
+    assert hit["routing"] == {**result["routing"], "cached": True}
+    # Callers get their own copy
+    hit["routing"]["rule"] = "changed"
+    assert asyncio.run(result_cache.get_cached("k", memory_only=True))["routing"]["rule"] == "default"
+
+
+def test_static_only_hit_is_marked_cached():
+    asyncio.run(result_cache.put_cached("k", _result(token_usage=None, routing=None), memory_only=True))
+    hit = asyncio.run(result_cache.get_cached("k", memory_only=True))
+    assert hit["token_usage"] is None
+    assert hit["routing"] == {"cached": True}
+
+
+def _compute_with(monkeypatch, groq_result):
+    stored = []
+
+    async def static(language, code):
+        return []
+
+    async def analyze(**kwargs):
+        return groq_result
+
+    async def put(key, result, memory_only=False):
+        stored.append(key)
+
+    monkeypatch.setattr(analysis_pipeline, "run_static_analysis_async", static)
+    monkeypatch.setattr(analysis_pipeline, "analyze_with_groq_async", analyze)
+    monkeypatch.setattr(analysis_pipeline, "put_cached", put)
+    asyncio.run(analysis_pipeline._compute("python", "bug", "", "x = 1", False, "k"))
+    return stored
+
+
+def _groq(**extra):
+    return {
+        "ai_issues": [], "optimized_code": "x = 1", "explanation": "",
+        "token_usage": None, "routing": {"load_shed": False}, **extra,
+    }
+
+
+def test_successful_result_is_cached(monkeypatch):
+    assert _compute_with(monkeypatch, _groq()) == ["k"]
+
+
+def test_failed_result_is_not_cached(monkeypatch):
+    assert _compute_with(monkeypatch, _groq(failed=True)) == []
+
+
+def test_load_shed_result_is_not_cached(monkeypatch):
+    assert _compute_with(monkeypatch, _groq(routing={"load_shed": True})) == []
@@ -0,0 +1,76 @@
+import asyncio
+import importlib
+
+from sqlalchemy import exc
+
+import database
+import worker
+from config import settings
+from services import single_flight
+from config.settings import GROQ_MAX_CONCURRENCY, SINGLE_FLIGHT_LOCK_POOL_SIZE
+
+
+def test_locks_use_their_own_pool():
+    assert single_flight._lock_engine is not database.engine
+    assert single_flight._lock_engine.pool.size() == SINGLE_FLIGHT_LOCK_POOL_SIZE
+
+
+def test_lock_pool_fits_every_concurrent_llm_call(monkeypatch):
+    # Unless overridden, each in-flight completion's leader can hold a lock
+    monkeypatch.delenv("SINGLE_FLIGHT_LOCK_POOL_SIZE", raising=False)
+    try:
+        assert importlib.reload(settings).SINGLE_FLIGHT_LOCK_POOL_SIZE == GROQ_MAX_CONCURRENCY
+    finally:
+        importlib.reload(settings)
+
+
+def test_exhausted_lock_pool_computes_without_lock(monkeypatch):
+    async def exhausted(lock_id):
+        raise exc.TimeoutError("QueuePool limit reached")
+
+    async def compute():
+        return "value"
+
+    async def recheck():
+        return None
+
+    monkeypatch.setattr(single_flight, "_try_lock", exhausted)
+    monkeypatch.setattr(single_flight, "_stats", dict.fromkeys(single_flight._stats, 0))
+    assert asyncio.run(single_flight._lead("key", compute, recheck)) == "value"
+    stats = single_flight.single_flight_stats()
+    assert stats["lock_pool_exhausted"] == 1 and stats["unlocked"] == 1
+
+
+def test_wait_timeout_computes_without_lock(monkeypatch):
+    async def held(lock_id):
+        return None
+
+    async def compute():
+        return "value"
+
+    async def recheck():
+        return None
+
+    monkeypatch.setattr(single_flight, "_try_lock", held)
+    monkeypatch.setattr(single_flight, "SINGLE_FLIGHT_WAIT_SECONDS", 0)
+    monkeypatch.setattr(single_flight, "_stats", dict.fromkeys(single_flight._stats, 0))
+    assert asyncio.run(single_flight._lead("key", compute, recheck)) == "value"
+    stats = single_flight.single_flight_stats()
+    assert stats["wait_timeouts"] == 1 and stats["unlocked"] == 1
+
+
+def test_worker_closes_the_lock_engine(monkeypatch):
+    closed = []
+
+    async def nothing(*args):
+        pass
+
+    async def close_single_flight():
+        closed.append("single_flight")
+
+    monkeypatch.setattr(worker, "init_db", nothing)
+    monkeypatch.setattr(worker, "run_worker", nothing)
+    monkeypatch.setattr(worker, "close_llm_backend", nothing)
+    monkeypatch.setattr(worker, "close_single_flight", close_single_flight)
+    asyncio.run(worker.main())
+    assert closed == ["single_flight"]
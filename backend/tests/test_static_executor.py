@@ -0,0 +1,98 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+from services import static_executor
+from services.static_executor import StaticAnalysisBusy, _ToolPool, _ToolSpec
+
+
+def test_pool_caps_concurrency_and_sheds_past_the_queue():
+    pool = _ToolPool("tool", max_concurrency=2, max_queue=1)
+    running = 0
+    peak = 0
+
+    async def run():
+        nonlocal running, peak
+        async with pool.slot():
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.02)
+            running -= 1
+
+    async def scenario():
+        tasks = [asyncio.create_task(run()) for _ in range(3)]
+        await asyncio.sleep(0)
+        # Two running, one waiting: the next caller is turned away
+        assert pool.stats()["running"] == 2 and pool.stats()["queue_depth"] == 1
+        with pytest.raises(StaticAnalysisBusy):
+            await run()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(scenario())
+    stats = pool.stats()
+    assert peak == 2
+    assert stats["completed"] == 3 and stats["rejected"] == 1
+    assert stats["queue_depth"] == 0 and stats["running"] == 0
+    assert stats["max_wait_seconds"] > 0
+
+
+def _alive(pid: int) -> bool:
+    """Whether *pid* is still running; an unreaped zombie counts as dead."""
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            return not any(line.startswith("State:") and "Z" in line for line in status)
+    except FileNotFoundError:
+        return False
+
+
+def _spawning_spec(tmp_path):
+    """A tool that starts a grandchild, records its pid and waits on it."""
+    pidfile = tmp_path / "grandchild.pid"
+
+    def command(path):
+        return ["sh", "-c", f"sleep 30 & echo $! > {pidfile}; wait"]
+
+    return _ToolSpec("slow", ".txt", command, lambda out, err: []), pidfile
+
+
+def _grandchild(pidfile) -> int:
+    deadline = time.monotonic() + 5
+    while not (pidfile.exists() and pidfile.read_text().strip()):
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    return int(pidfile.read_text())
+
+
+@pytest.mark.skipif(not hasattr(os, "killpg"), reason="process groups are POSIX only")
+def test_timeout_kills_the_whole_process_group(tmp_path, monkeypatch):
+    spec, pidfile = _spawning_spec(tmp_path)
+    pool = _ToolPool("slow", 1, 1)
+    monkeypatch.setattr(static_executor, "STATIC_ANALYSIS_TIMEOUT_SECONDS", 0.5)
+
+    started = time.monotonic()
+    with pytest.warns(UserWarning, match="timed out"):
+        assert asyncio.run(static_executor._run_tool(spec, pool, "code")) == []
+    # A surviving grandchild would hold the pipes open until it exits
+    assert time.monotonic() - started < 10
+    assert pool.timeouts == 1
+    assert not _alive(_grandchild(pidfile))
+
+
+@pytest.mark.skipif(not hasattr(os, "killpg"), reason="process groups are POSIX only")
+def test_cancelled_request_kills_the_tool(tmp_path):
+    spec, pidfile = _spawning_spec(tmp_path)
+    pool = _ToolPool("slow", 1, 1)
+
+    async def scenario():
+        task = asyncio.create_task(static_executor._run_tool(spec, pool, "code"))
+        await asyncio.to_thread(_grandchild, pidfile)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    started = time.monotonic()
+    asyncio.run(scenario())
+    assert time.monotonic() - started < 10
+    assert not _alive(_grandchild(pidfile))
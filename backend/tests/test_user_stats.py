@@ -0,0 +1,160 @@
+import asyncio
+
+from sqlalchemy.dialects import postgresql
+
+from models.analysis_history import AnalysisHistory
+from models.user_stats import UserStats
+from services.user_stats import _drifted, count_analyses
+
+
+class _Session:
+    def __init__(self):
+        self.statements = []
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+
+
+def _analysis(user_id: int, language: str, mode: str, confidence):
+    return AnalysisHistory(
+        user_id=user_id, language=language, mode=mode, code_snippet="x = 1", confidence_score=confidence,
+    )
+
+
+def test_count_analyses_adds_confidence_per_group():
+    session = _Session()
+    records = [
+        _analysis(1, "python", "bug", 80.0),
+        _analysis(1, "python", "bug", None),
+        _analysis(1, "python", "bug", 60.5),
+        _analysis(2, "java", "security", 90.0),
+        object(),
+    ]
+    asyncio.run(count_analyses(session, records))
+
+    assert len(session.statements) == 2
+    params = [
+        statement.compile(dialect=postgresql.dialect()).params for statement in session.statements
+    ]
+    assert params[0]["user_id_1"] == 1
+    assert params[0]["analyses_count_1"] == 3
+    assert params[0]["confidence_sum_1"] == 140.5
+    assert params[1]["user_id_1"] == 2
+    assert params[1]["confidence_sum_1"] == 90.0
+
+
+def test_drifted_ignores_float_rounding_only():
+    values = {"projects_count": 1, "analyses_count": 3, "confidence_sum": 0.1 + 0.2, "languages": {}, "modes": {}}
+    row = UserStats(user_id=1, projects_count=1, analyses_count=3, confidence_sum=0.3, languages={}, modes={})
+    assert not _drifted(row, values)
+    row.confidence_sum = 0.4
+    assert _drifted(row, values)
+    row.confidence_sum = 0.3
+    row.analyses_count = 2
+    assert _drifted(row, values)
+
+
+class _StatsSession:
+    """Holds one user's analysis and stats rows; applies confidence_sum UPDATEs to the stats row."""
+
+    def __init__(self, record, stats):
+        self.record = record
+        self.stats = stats
+        self.committed = False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def get(self, model, key, **kwargs):
+        return self.stats if model is UserStats else self.record
+
+    async def execute(self, statement, params=None):
+        if getattr(getattr(statement, "table", None), "name", None) == "user_stats":
+            compiled = statement.compile(dialect=postgresql.dialect()).params
+            self.stats.confidence_sum += compiled["confidence_sum_1"]
+        return None
+
+    async def commit(self):
+        self.committed = True
+
+
+def test_enrichment_moves_the_profile_average(monkeypatch):
+    from models.analysis_job import AnalysisJob
+    from routes import profile
+    from services import job_queue
+
+    record = _analysis(1, "python", "bug", 40.0)
+    record.id = 9
+    stats = UserStats(
+        user_id=1, projects_count=0, analyses_count=2, confidence_sum=100.0, languages={}, modes={},
+    )
+    session = _StatsSession(record, stats)
+    monkeypatch.setattr(job_queue, "AsyncSessionLocal", lambda: session)
+
+    async def locked(session, job):
+        return job
+
+    monkeypatch.setattr(job_queue, "_locked_job", locked)
+    job = AnalysisJob(id="job1", enrichment=True, analysis_id=9, user_id=1, locked_by="w")
+    result = {
+        "static_issues": [], "ai_suggestions": [], "aggregated_issues": [],
+        "optimized_code": "", "explanation": "", "confidence_score": 90.0,
+    }
+
+    user = type("U", (), {
+        "id": 1, "username": "u", "email": "u@example.com", "full_name": None,
+        "is_active": True, "is_verified": False, "created_at": None,
+    })()
+    before = asyncio.run(profile._build_profile_response(user, session))["average_confidence"]
+    asyncio.run(job_queue._finish_job(job, result))
+    after = asyncio.run(profile._build_profile_response(user, session))["average_confidence"]
+
+    assert session.committed
+    assert record.confidence_score == 90.0
+    assert (before, after) == (50.0, 75.0)
+
+
+def test_rescore_applies_score_changes_to_confidence_sum(monkeypatch):
+    from services import history_rescore
+
+    rows = [
+        type("Row", (), {"id": 1, "user_id": 1, "aggregated_issues": [], "confidence_score": 10.0})(),
+        type("Row", (), {"id": 2, "user_id": 1, "aggregated_issues": [], "confidence_score": None})(),
+        type("Row", (), {"id": 3, "user_id": 2, "aggregated_issues": [], "confidence_score": 30.0})(),
+    ]
+    batches = [rows, []]
+    adjusted = []
+
+    class Result:
+        def __init__(self, rows):
+            self.rows = rows
+
+        def all(self):
+            return self.rows
+
+    class Session(_Session):
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            return False
+
+        async def execute(self, statement, params=None):
+            if params is None and statement.is_select:
+                return Result(batches.pop(0))
+
+        async def commit(self):
+            pass
+
+    async def fake_adjust(session, deltas):
+        adjusted.append(dict(deltas))
+
+    monkeypatch.setattr(history_rescore, "AsyncSessionLocal", Session)
+    monkeypatch.setattr(history_rescore, "adjust_confidence", fake_adjust)
+    monkeypatch.setattr(history_rescore, "compute_confidence_batch", lambda issues, weights: [25.0, 5.0, 30.0])
+
+    assert asyncio.run(history_rescore.rescore_history(batch_size=3)) == {"scanned": 3, "updated": 2}
+    assert adjusted == [{1: 20.0}]
@@ -1,8 +1,9 @@
+import secrets
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 import bcrypt
 from jose import JWTError, jwt
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from fastapi.security.utils import get_authorization_scheme_param
 from fastapi import Request
@@ -10,11 +11,19 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from database import get_db
 from models.user import User
-from config.settings import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES
+from config.settings import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES, METRICS_TOKEN
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
 
 
+def user_by_username_query(username: str):
+    return select(User).where(User.username == username)
+
+
+def user_by_email_query(email: str):
+    return select(User).where(User.email == email)
+
+
 def _truncate_password(password: str) -> bytes:
     return password.encode('utf-8')[:72]
 
@@ -60,7 +69,7 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
 
-    result = await db.execute(select(User).where(User.username == username))
+    result = await db.execute(user_by_username_query(username))
     user = result.scalar_one_or_none()
     if user is None:
         raise credentials_exception
@@ -90,6 +99,14 @@ async def get_current_user_optional(
             return None
     except JWTError:
         return None
-    result = await db.execute(select(User).where(User.username == username))
+    result = await db.execute(user_by_username_query(username))
     user = result.scalar_one_or_none()
     return user
+
+
+async def require_metrics_access(x_metrics_token: Optional[str] = Header(default=None)) -> None:
+    """Guard the operational stats endpoints: 404 while METRICS_TOKEN is unset, 403 on a wrong token."""
+    if not METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if x_metrics_token is None or not secrets.compare_digest(x_metrics_token, METRICS_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid metrics token")
@@ -0,0 +1,43 @@
+"""Background worker for durable analysis jobs.
+
+Run alongside the API, from the backend directory::
+
+    python worker.py
+
+Scale by starting more processes; jobs are claimed with FOR UPDATE SKIP LOCKED.
+"""
+import asyncio
+import logging
+import signal
+from dotenv import load_dotenv
+from database import init_db
+from services.llm_backend import close_llm_backend
+from services.single_flight import close_single_flight
+from services.job_queue import run_worker
+import models  # noqa: F401 — ensure all models are registered before init_db
+
+load_dotenv()
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+async def main() -> None:
+    await init_db()
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopping.set)
+
+    logger.info("Analysis worker started")
+    await run_worker(stopping)
+    await close_llm_backend()
+    await close_single_flight()
+    logger.info("Analysis worker stopped")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
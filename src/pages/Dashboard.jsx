@@ -75,16 +75,17 @@ function Dashboard() {
   useEffect(() => {
     const loadData = async () => {
       try {
-        const [historyData, projectsData] = await Promise.all([
-          api.getHistory().catch(() => []),
+        const [historyPage, projectsData, profile] = await Promise.all([
+          api.getHistory({ limit: 5 }).catch(() => ({ items: [] })),
           api.getProjects().catch(() => []),
+          api.getProfile().catch(() => null),
         ])
-        const total = historyData.length
-        const avgConf = total > 0
-          ? Math.round(historyData.reduce((s, h) => s + (h.confidence_score || 0), 0) / total)
-          : 0
+        const historyData = historyPage.items
+        // Averaged over every analysis by the server
+        const avgConf = profile ? Math.round(profile.average_confidence) : 0
+        const total = profile ? profile.total_analyses : historyData.length
         setMetrics({ totalAnalyses: total, projects: projectsData.length, avgConfidence: avgConf })
-        setRecentAnalyses(historyData.slice(0, 5))
+        setRecentAnalyses(historyData)
       } catch {
         // leave defaults
       } finally {
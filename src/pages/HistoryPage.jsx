@@ -1,4 +1,4 @@
-import { useState, useEffect } from 'react'
+import { useState, useEffect, useRef } from 'react'
 import { motion } from 'framer-motion'
 import AppLayout from '../layouts/AppLayout'
 import AnalysisCard from '../components/AnalysisCard'
@@ -6,37 +6,74 @@ import { getHistory } from '../services/api'
 
 function HistoryPage() {
   const [history, setHistory] = useState([])
+  const [nextCursor, setNextCursor] = useState(null)
   const [loading, setLoading] = useState(true)
+  const [loadingMore, setLoadingMore] = useState(false)
   const [searchTerm, setSearchTerm] = useState('')
   const [filterLang, setFilterLang] = useState('')
   const [filterMode, setFilterMode] = useState('')
 
+  // Aborted when the filters change, so no response for the old filters lands in the new list
+  const requestsRef = useRef(null)
+
+  // Filtering is done by the server, so it covers every page, not just the loaded ones
   useEffect(() => {
-    getHistory()
-      .then((data) => setHistory(data || []))
-      .catch(() => setHistory([]))
-      .finally(() => setLoading(false))
-  }, [])
+    const controller = new AbortController()
+    requestsRef.current = controller
+    setLoading(true)
+    setLoadingMore(false)
+    // Wait for typing to pause before searching
+    const timer = setTimeout(() => {
+      getHistory({ language: filterLang, mode: filterMode, search: searchTerm.trim() }, { signal: controller.signal })
+        .then((page) => {
+          if (controller.signal.aborted) return
+          setHistory(page.items)
+          setNextCursor(page.next_cursor)
+        })
+        .catch(() => {
+          if (controller.signal.aborted) return
+          setHistory([])
+          setNextCursor(null)
+        })
+        .finally(() => {
+          if (!controller.signal.aborted) setLoading(false)
+        })
+    }, searchTerm ? 300 : 0)
+    return () => {
+      controller.abort()
+      clearTimeout(timer)
+    }
+  }, [searchTerm, filterLang, filterMode])
+
+  const loadMore = () => {
+    const controller = requestsRef.current
+    setLoadingMore(true)
+    getHistory(
+      { cursor: nextCursor, language: filterLang, mode: filterMode, search: searchTerm.trim() },
+      { signal: controller.signal },
+    )
+      .then((page) => {
+        if (controller.signal.aborted) return
+        setHistory((prev) => [...prev, ...page.items])
+        setNextCursor(page.next_cursor)
+      })
+      .catch(() => {})
+      .finally(() => {
+        if (!controller.signal.aborted) setLoadingMore(false)
+      })
+  }
 
   const transformItem = (item) => ({
     id: item.id,
-    title: item.code_snippet ? item.code_snippet.split('\n')[0].slice(0, 60) : `${item.language} analysis`,
+    title: item.code_preview ? item.code_preview.split('\n')[0].slice(0, 60) : `${item.language} analysis`,
     language: item.language,
     mode: item.mode,
     confidence: item.confidence_score != null ? Math.round(item.confidence_score) : 0,
     date: item.created_at ? new Date(item.created_at).toLocaleDateString() : '',
-    snippet: item.code_snippet ? item.code_snippet.split('\n')[0] : '',
+    snippet: item.code_preview ? item.code_preview.split('\n')[0] : '',
   })
 
-  const filtered = history
-    .map(transformItem)
-    .filter((item) => {
-      const search = searchTerm.toLowerCase()
-      const matchSearch = !search || item.title.toLowerCase().includes(search) || item.snippet.toLowerCase().includes(search)
-      const matchLang = !filterLang || item.language.toLowerCase() === filterLang
-      const matchMode = !filterMode || item.mode.toLowerCase().includes(filterMode)
-      return matchSearch && matchLang && matchMode
-    })
+  const filtered = history.map(transformItem)
 
   return (
     <AppLayout>
@@ -101,6 +138,18 @@ function HistoryPage() {
           </div>
         )}
 
+        {!loading && nextCursor && (
+          <div className="flex justify-center mt-6">
+            <button
+              onClick={loadMore}
+              disabled={loadingMore}
+              className="bg-white/5 border border-white/10 text-gray-300 rounded-xl px-4 py-2 text-sm hover:border-blue-500 transition-colors disabled:opacity-50"
+            >
+              {loadingMore ? 'Loading...' : 'Load more'}
+            </button>
+          </div>
+        )}
+
         {!loading && filtered.length > 0 && (
           <p className="text-center text-gray-500 text-sm mt-8">Showing {filtered.length} {filtered.length === 1 ? 'analysis' : 'analyses'}</p>
         )}
@@ -109,7 +109,18 @@ export const getProfile = () => authFetch('/profile/');
 export const updateProfile = (data) => authFetch('/profile/', { method: 'PUT', body: JSON.stringify(data) });
 
 // History
-export const getHistory = () => authFetch('/history/');
+// Returns { items, next_cursor }; pass next_cursor back, with the same filters, for the following (older) page.
+// options.signal (an AbortSignal) cancels the request.
+export const getHistory = ({ cursor, language, mode, search, limit } = {}, options = {}) => {
+  const params = new URLSearchParams();
+  if (cursor) params.set('cursor', cursor);
+  if (limit) params.set('limit', limit);
+  if (language) params.set('language', language);
+  if (mode) params.set('mode', mode);
+  if (search) params.set('search', search);
+  const query = params.toString();
+  return authFetch(`/history/${query ? `?${query}` : ''}`, { signal: options.signal });
+};
 
 // Projects
 export const getProjects = () => authFetch('/projects/');